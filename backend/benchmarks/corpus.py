@@ -0,0 +1,163 @@
+"""Generate a reproducible corpus of synthetic financial documents
+
+Usage: python benchmarks/corpus.py out_dir [--documents N] [--min-pages N] [--max-pages N]
+                                   [--scanned FRACTION] [--pii-density FRACTION] [--seed N]
+
+Born-digital documents are reportlab PDFs with a text layer. Scanned-looking
+documents are the same pages rendered to noisy, slightly skewed images and
+embedded without any text. ``corpus.json`` lists every document with the PII
+values planted in it.
+"""
+import argparse
+import io
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+FIRST_NAMES = ["John", "Maria", "Wei", "Aisha", "Carlos", "Emma", "Raj", "Olga", "Kwame", "Sofia"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Khan", "Silva", "Johnson", "Patel", "Ivanova", "Mensah", "Rossi"]
+BANKS = ["Example National Bank", "First Harbor Trust", "Northwind Savings", "Contoso Credit Union"]
+MERCHANTS = ["Grocery Store", "Gas Station", "Online Shopping", "Utility Payment", "Restaurant", "Pharmacy"]
+
+LINES_PER_PAGE = 36
+SCAN_DPI = 150
+
+def fake_pii(rng: random.Random):
+    """One ``(pii_type, value, line)`` with a financial label so regexes see context"""
+    kind = rng.choice(["name", "ssn", "account_number", "credit_card", "phone", "swift_code"])
+    if kind == "name":
+        value = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        return kind, value, f"Account holder: {value}"
+    if kind == "ssn":
+        value = f"{rng.randint(100, 899)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}"
+        return kind, value, f"SSN: {value}"
+    if kind == "account_number":
+        value = "".join(str(rng.randint(0, 9)) for _ in range(rng.randint(10, 14)))
+        return kind, value, f"Bank account number: {value}"
+    if kind == "credit_card":
+        value = "-".join(f"{rng.randint(0, 9999):04d}" for _ in range(4))
+        return kind, value, f"Credit card: {value}"
+    if kind == "phone":
+        value = f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}"
+        return kind, value, f"Phone: {value}"
+    value = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(6)) + f"{rng.randint(10, 99)}"
+    return kind, value, f"SWIFT code: {value}"
+
+def filler_line(rng: random.Random) -> str:
+    return (
+        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}  "
+        f"{rng.choice(MERCHANTS):<18} ${rng.randint(1, 5000)}.{rng.randint(0, 99):02d}"
+    )
+
+def page_lines(rng: random.Random, page_number: int, pii_density: float):
+    """Text lines of one statement page and the PII planted in them"""
+    lines = [f"{rng.choice(BANKS)} - Statement page {page_number}", ""]
+    planted = []
+    for _ in range(LINES_PER_PAGE):
+        if rng.random() < pii_density:
+            kind, value, line = fake_pii(rng)
+            planted.append({"type": kind, "value": value, "page": page_number})
+            lines.append(line)
+        else:
+            lines.append(filler_line(rng))
+    return lines, planted
+
+def scanned_page(lines, rng: random.Random) -> Image.Image:
+    """Render text lines as a grayscale scan: slight skew, blur and sensor noise"""
+    width, height = int(8.5 * SCAN_DPI), int(11 * SCAN_DPI)
+    image = Image.new("L", (width, height), 250)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=SCAN_DPI // 7)
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        font = ImageFont.load_default()
+    y = SCAN_DPI // 2
+    for line in lines:
+        draw.text((SCAN_DPI // 2, y), line, fill=20, font=font)
+        y += SCAN_DPI // 5
+    
+    image = image.rotate(rng.uniform(-1.0, 1.0), fillcolor=250, resample=Image.BICUBIC)
+    image = image.filter(ImageFilter.GaussianBlur(0.6))
+    noise = np.random.default_rng(rng.randint(0, 2 ** 32 - 1)).normal(0, 8, (height, width))
+    return Image.fromarray(np.clip(np.asarray(image, dtype=np.float32) + noise, 0, 255).astype(np.uint8))
+
+def write_document(path: Path, page_count: int, scanned: bool, pii_density: float, rng: random.Random):
+    # invariant=1 keeps reportlab from stamping the creation time, so bytes are reproducible
+    c = canvas.Canvas(str(path), pagesize=letter, invariant=1)
+    planted = []
+    for page_number in range(1, page_count + 1):
+        lines, page_pii = page_lines(rng, page_number, pii_density)
+        planted.extend(page_pii)
+        if scanned:
+            buffer = io.BytesIO()
+            scanned_page(lines, rng).save(buffer, format="PNG")
+            buffer.seek(0)
+            c.drawImage(ImageReader(buffer), 0, 0, width=letter[0], height=letter[1])
+        else:
+            c.setFont("Helvetica", 10)
+            y = 750
+            for line in lines:
+                c.drawString(50, y, line)
+                y -= 19
+        c.showPage()
+    c.save()
+    return planted
+
+def generate_corpus(out_dir: Path, documents: int = 10, min_pages: int = 1, max_pages: int = 5,
+                    scanned: float = 0.3, pii_density: float = 0.2, seed: int = 0):
+    """Write the corpus and its ``corpus.json`` description; the same arguments give the same files"""
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for index in range(documents):
+        page_count = rng.randint(min_pages, max_pages)
+        is_scanned = rng.random() < scanned
+        path = out_dir / f"{'scanned' if is_scanned else 'digital'}_{index:05d}.pdf"
+        planted = write_document(path, page_count, is_scanned, pii_density, rng)
+        entries.append({
+            "file": path.name,
+            "pages": page_count,
+            "kind": "scanned" if is_scanned else "born_digital",
+            "pii": planted,
+        })
+    
+    corpus = {
+        "seed": seed,
+        "pii_density": pii_density,
+        "scanned_fraction": scanned,
+        "documents": entries,
+    }
+    with open(out_dir / "corpus.json", "w") as f:
+        json.dump(corpus, f, indent=2)
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic financial document corpus")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=5, help="Up to 500 pages per document")
+    parser.add_argument("--scanned", type=float, default=0.3, help="Fraction of scanned-looking documents")
+    parser.add_argument("--pii-density", type=float, default=0.2, help="Fraction of lines carrying PII")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    if not 1 <= args.min_pages <= args.max_pages <= 500:
+        parser.error("page counts must satisfy 1 <= min-pages <= max-pages <= 500")
+    
+    corpus = generate_corpus(
+        args.out_dir, args.documents, args.min_pages, args.max_pages,
+        args.scanned, args.pii_density, args.seed
+    )
+    pages = sum(doc["pages"] for doc in corpus["documents"])
+    pii = sum(len(doc["pii"]) for doc in corpus["documents"])
+    print(f"Wrote {len(corpus['documents'])} documents, {pages} pages, {pii} PII values to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
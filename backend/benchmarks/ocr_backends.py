@@ -0,0 +1,81 @@
+"""Compare OCR backends on the same rasterized pages
+
+Usage: python benchmarks/ocr_backends.py [pdf] [--repeat N] [--json out.json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pdf2image import convert_from_path
+
+from src.processing.ocr import OCR_BACKENDS
+from src.processing.pdf_handler import PDFHandler
+from src.utils.config import Config
+
+def benchmark_backend(name, pages, repeat):
+    """Time one backend; the first page is reported separately as the cold start"""
+    try:
+        start = time.perf_counter()
+        backend = OCR_BACKENDS[name]()
+        init_seconds = time.perf_counter() - start
+    except Exception as e:
+        return {"backend": name, "available": False, "error": str(e)}
+    
+    timings = []
+    words = 0
+    try:
+        for _ in range(repeat):
+            for image in pages:
+                start = time.perf_counter()
+                ocr_page = backend.recognize(image, Config.PDF_DPI)
+                timings.append(time.perf_counter() - start)
+                words = len(ocr_page.words)
+    except Exception as e:
+        return {"backend": name, "available": False, "error": str(e)}
+    
+    warm = timings[1:] or timings
+    return {
+        "backend": name,
+        "available": True,
+        "init_seconds": round(init_seconds, 4),
+        "first_page_seconds": round(timings[0], 4),
+        "mean_page_seconds": round(sum(warm) / len(warm), 4),
+        "pages": len(timings),
+        "words_last_page": words,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR backends")
+    parser.add_argument("pdf", nargs="?", type=Path, default=Config.DATA_DIR / "sample_financial.pdf")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the document per backend")
+    parser.add_argument("--json", type=Path, help="Write the results to a JSON file")
+    args = parser.parse_args()
+    
+    # Rasterize and preprocess once so only recognition is timed
+    images = convert_from_path(args.pdf, dpi=Config.PDF_DPI)
+    pages = [PDFHandler._preprocess_for_ocr(image) for image in images]
+    
+    results = [benchmark_backend(name, pages, args.repeat) for name in OCR_BACKENDS]
+    
+    print(f"{args.pdf.name}: {len(pages)} page(s) at {Config.PDF_DPI} DPI, {args.repeat} pass(es)")
+    for result in results:
+        if not result["available"]:
+            print(f"  {result['backend']:12} unavailable: {result['error']}")
+            continue
+        print(
+            f"  {result['backend']:12} init {result['init_seconds']:.3f}s  "
+            f"first page {result['first_page_seconds']:.3f}s  "
+            f"mean page {result['mean_page_seconds']:.3f}s"
+        )
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
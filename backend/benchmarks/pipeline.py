@@ -0,0 +1,290 @@
+"""Benchmark the redaction pipeline end to end and stage by stage
+
+Usage: python benchmarks/pipeline.py corpus_dir [--stage-pages N] [--repeat N]
+                                     [--json out.json] [--baseline baseline.json] [--tolerance 0.1]
+
+Each stage (rasterize, ocr, regex, spacy, bert, yolo, redact, redact_vector,
+write) runs in isolation over a sample of the corpus pages, then
+``process_document`` runs over every document. Stages whose model or binary
+is unavailable are reported as such instead of failing the run. With
+``--baseline`` every stage's throughput is compared against a stored result
+and the exit status is 1 if any stage got slower than the tolerance allows.
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import PyPDF2
+
+from src.models.pii_detector import PIIDetector
+from src.models.visual_detector import VisualDetector
+from src.processing.image_processor import ImageProcessor
+from src.processing.ocr import get_ocr_backend
+from src.processing.page_scheduler import rasterize_page
+from src.processing.pdf_handler import PDFHandler, PDFPageWriter
+from src.processing.pdf_redactor import PageTextLayer, VectorRedactor
+from src.utils.config import Config
+from src.utils.helpers import get_pii_scanner
+
+class StageUnavailable(Exception):
+    pass
+
+def timed(fn, repeat):
+    """Best of ``repeat`` runs of ``fn``, which returns the number of items it processed"""
+    best = None
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, items
+
+def run_stage(fn, repeat, unit):
+    try:
+        seconds, items = timed(fn, repeat)
+    except StageUnavailable as e:
+        return {"available": False, "error": str(e)}
+    except Exception as e:
+        return {"available": False, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "available": True,
+        "seconds": round(seconds, 4),
+        "items": items,
+        "unit": unit,
+        "per_second": round(items / seconds, 3) if seconds > 0 else None,
+    }
+
+def sample_pages(corpus_dir, corpus, count, seed):
+    """``(pdf_path, page_number, kind)`` for a reproducible sample of corpus pages"""
+    pages = [
+        (corpus_dir / doc["file"], n, doc["kind"])
+        for doc in corpus["documents"]
+        for n in range(1, doc["pages"] + 1)
+    ]
+    random.Random(seed).shuffle(pages)
+    return pages[:count]
+
+def benchmark_stages(corpus_dir, corpus, stage_pages, repeat, seed):
+    pages = sample_pages(corpus_dir, corpus, stage_pages, seed)
+    digital = [(path, n) for path, n, kind in pages if kind == "born_digital"]
+    values = [pii["value"] for doc in corpus["documents"] for pii in doc["pii"]]
+    pii_detector = PIIDetector()
+    visual_detector = VisualDetector()
+    stages = {}
+    
+    # Rasterized pages feed the image stages; they are kept from the timed run
+    images = []
+    def rasterize():
+        images.clear()
+        for path, n, _ in pages:
+            image, _ = rasterize_page(path, n, Config.PDF_DPI)
+            images.append(image)
+        return len(images)
+    stages["rasterize"] = run_stage(rasterize, repeat, "pages")
+    
+    def needs_images():
+        if not images:
+            raise StageUnavailable("no rasterized pages")
+    
+    def ocr():
+        needs_images()
+        backend = get_ocr_backend()
+        for image in images:
+            backend.recognize(PDFHandler._preprocess_for_ocr(image), Config.PDF_DPI)
+        return len(images)
+    stages["ocr"] = run_stage(ocr, repeat, "pages")
+    
+    readers = {}
+    texts = []
+    for path, n in digital:
+        reader = readers.setdefault(path, PyPDF2.PdfReader(str(path)))
+        texts.append(reader.pages[n - 1].extract_text() or "")
+    
+    def regex():
+        scanner = get_pii_scanner()
+        for text in texts:
+            scanner.scan(text)
+        return len(texts)
+    stages["regex"] = run_stage(regex, repeat, "pages")
+    
+    def spacy():
+        if pii_detector.nlp is None:
+            raise StageUnavailable("spaCy model not loaded")
+        pii_detector.detect_pii_spacy_batch(texts)
+        return len(texts)
+    stages["spacy"] = run_stage(spacy, repeat, "pages")
+    
+    def bert():
+        if pii_detector.ner_pipeline is None:
+            raise StageUnavailable("transformer NER model not loaded")
+        for text in texts:
+            pii_detector.detect_pii_transformers(text)
+        return len(texts)
+    stages["bert"] = run_stage(bert, repeat, "pages")
+    
+    def yolo():
+        needs_images()
+        if visual_detector.model is None:
+            raise StageUnavailable("YOLO model not loaded")
+        visual_detector.detect(images)
+        return len(images)
+    stages["yolo"] = run_stage(yolo, repeat, "pages")
+    
+    image_processor = ImageProcessor()
+    def redact():
+        needs_images()
+        for image in images:
+            w, h = image.size
+            image_processor.redact_boxes(image, [(w // 10, h // 10 * i, w // 2, h // 10 * i + h // 40) for i in range(1, 9)])
+        return len(images)
+    stages["redact"] = run_stage(redact, repeat, "pages")
+    
+    vector_redactor = VectorRedactor()
+    def redact_vector():
+        if not digital:
+            raise StageUnavailable("no born-digital pages in the sample")
+        for path, n in digital:
+            reader = PyPDF2.PdfReader(str(path))
+            vector_redactor.redact(PageTextLayer(reader.pages[n - 1], reader), values)
+        return len(digital)
+    stages["redact_vector"] = run_stage(redact_vector, repeat, "pages")
+    
+    def write():
+        needs_images()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = PDFPageWriter(Path(tmp_dir) / "out.pdf", resolution=Config.PDF_DPI)
+            for image in images:
+                writer.add_page(image)
+        return len(images)
+    stages["write"] = run_stage(write, repeat, "pages")
+    
+    return stages
+
+def benchmark_end_to_end(corpus_dir, corpus):
+    """Time process_document over every document with the caches off"""
+    from src.processing.document_processor import DocumentProcessor
+    
+    Config.RESULT_CACHE_ENABLED = False
+    Config.PAGE_CACHE_ENABLED = False
+    processor = DocumentProcessor()
+    out_dir = Path(tempfile.mkdtemp())
+    documents = []
+    try:
+        for doc in corpus["documents"]:
+            start = time.perf_counter()
+            try:
+                processor.process_document(corpus_dir / doc["file"], out_dir / f"redacted_{doc['file']}")
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            documents.append({
+                "file": doc["file"],
+                "kind": doc["kind"],
+                "pages": doc["pages"],
+                "seconds": round(time.perf_counter() - start, 4),
+                "error": error,
+            })
+    finally:
+        processor.close()
+        shutil.rmtree(out_dir, ignore_errors=True)
+    
+    ok = [doc for doc in documents if doc["error"] is None]
+    seconds = sum(doc["seconds"] for doc in ok)
+    pages = sum(doc["pages"] for doc in ok)
+    return {
+        "available": bool(ok),
+        "seconds": round(seconds, 4),
+        "items": pages,
+        "unit": "pages",
+        "per_second": round(pages / seconds, 3) if seconds > 0 else None,
+        "docs_per_second": round(len(ok) / seconds, 3) if seconds > 0 else None,
+        "failed": len(documents) - len(ok),
+        "documents": documents,
+    }
+
+def compare(results, baseline, tolerance):
+    """Per-stage throughput relative to the baseline; stages slower by more than ``tolerance`` regress"""
+    comparison = {}
+    for name, stage in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not stage.get("per_second") or not base or not base.get("per_second"):
+            continue
+        ratio = stage["per_second"] / base["per_second"]
+        comparison[name] = {
+            "baseline_per_second": base["per_second"],
+            "per_second": stage["per_second"],
+            "ratio": round(ratio, 3),
+            "regression": ratio < 1 - tolerance,
+        }
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the redaction pipeline")
+    parser.add_argument("corpus_dir", type=Path, help="Directory written by benchmarks/corpus.py")
+    parser.add_argument("--stage-pages", type=int, default=10, help="Pages sampled for the isolated stages")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-end-to-end", action="store_true", help="Only run the isolated stages")
+    parser.add_argument("--json", type=Path, help="Write the results to a JSON file")
+    parser.add_argument("--baseline", type=Path, help="Compare against an earlier --json result")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown before a stage regresses")
+    args = parser.parse_args()
+    
+    with open(args.corpus_dir / "corpus.json") as f:
+        corpus = json.load(f)
+    
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pdf_dpi": Config.PDF_DPI,
+            "page_workers": Config.PAGE_WORKERS,
+            "ocr_backend": Config.OCR_BACKEND,
+        },
+        "corpus": {
+            "seed": corpus["seed"],
+            "documents": len(corpus["documents"]),
+            "pages": sum(doc["pages"] for doc in corpus["documents"]),
+        },
+        "stages": benchmark_stages(args.corpus_dir, corpus, args.stage_pages, args.repeat, args.seed),
+    }
+    if not args.no_end_to_end:
+        results["stages"]["end_to_end"] = benchmark_end_to_end(args.corpus_dir, corpus)
+    
+    print(f"{args.corpus_dir}: {results['corpus']['documents']} documents, {results['corpus']['pages']} pages")
+    for name, stage in results["stages"].items():
+        if not stage["available"]:
+            print(f"  {name:14} unavailable: {stage.get('error', 'every document failed')}")
+            continue
+        print(f"  {name:14} {stage['seconds']:8.3f}s  {stage['items']:5} {stage['unit']}  {stage['per_second']} {stage['unit']}/s")
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["comparison"] = compare(results, json.load(f), args.tolerance)
+        print(f"Against {args.baseline}:")
+        for name, entry in results["comparison"].items():
+            flag = "  REGRESSION" if entry["regression"] else ""
+            print(f"  {name:14} x{entry['ratio']:.3f}{flag}")
+            if entry["regression"]:
+                regressions.append(name)
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,17 +1,47 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
+import asyncio
+import threading
 import uuid
 import json
 
+from .jobs import DONE, FAILED, QUEUED, RUNNING, JobStore, JobWorkerPool, job_timings
+from ..models.registry import get_model_registry
 from ..processing.document_processor import DocumentProcessor
 from ..utils.config import Config
-from ..utils.logger import setup_logger
+from ..utils.logger import correlation_id, setup_logger, stop_log_listener
+from ..utils.metrics import get_metrics
 
 logger = setup_logger(__name__)
 
-app = FastAPI(title="Financial Document Redaction API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the model warm-up and job workers with the API, and stop everything it started on shutdown"""
+    # Optionally load the models in the background so the first request does not pay for it
+    if Config.WARM_MODELS_ON_STARTUP:
+        threading.Thread(target=model_registry.warm_up, name="model-warm-up", daemon=True).start()
+    
+    # Resume jobs interrupted by the last shutdown
+    requeued = job_store.requeue_running()
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted job(s)")
+    if Config.JOB_WORKERS > 0:
+        job_workers.start()
+    
+    try:
+        yield
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        processor.close()
+        await run_in_threadpool(job_workers.stop)
+        stop_log_listener()
+
+app = FastAPI(title="Financial Document Redaction API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -22,27 +52,107 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Creating the processor is cheap: its models are loaded on first use or by /ready
 processor = DocumentProcessor()
+model_registry = get_model_registry()
+
+# Documents are processed on a bounded thread pool so the event loop never blocks on them
+executor = ThreadPoolExecutor(max_workers=Config.API_WORKERS, thread_name_prefix="redact")
+
+# Submitted jobs are queued in SQLite and processed by separate worker processes
+job_store = JobStore(Config.JOBS_DB)
+job_workers = JobWorkerPool(Config.JOBS_DB, Config.JOB_WORKERS, Config.JOB_POLL_INTERVAL)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class InFlightLimiter:
+    """Non-blocking count of documents being uploaded or processed"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.count >= self.limit:
+                return False
+            self.count += 1
+            return True
+    
+    def release(self) -> None:
+        with self._lock:
+            self.count -= 1
+
+
+in_flight = InFlightLimiter(Config.API_MAX_IN_FLIGHT)
+
+# Room for the multipart boundaries and part headers around an uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject uploads whose declared size is over the limit before their body is read
+    
+    Starlette spools the whole multipart body before an endpoint runs, so
+    this is the only point where an oversized upload can be refused cheaply.
+    Uploads without a Content-Length are still limited by ``save_upload``.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit():
+        if int(content_length) > Config.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+            return JSONResponse({"detail": f"Upload exceeds {Config.MAX_UPLOAD_BYTES} bytes"}, status_code=413)
+    return await call_next(request)
+
+def save_upload(file: UploadFile, path: Path) -> None:
+    """Copy an upload to disk in chunks, enforcing the upload size limit"""
+    size = 0
+    with open(path, "wb") as f:
+        while True:
+            chunk = file.file.read(Config.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > Config.MAX_UPLOAD_BYTES:
+                raise UploadTooLarge(f"Upload exceeds {Config.MAX_UPLOAD_BYTES} bytes")
+            f.write(chunk)
+
+def process_upload(file_id: str, input_path: Path, output_path: Path) -> dict:
+    """Process an upload on the executor, logging under the upload's id"""
+    with correlation_id(file_id):
+        return processor.process_document(input_path, output_path)
+
+def busy(status_code: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(Config.API_RETRY_AFTER)})
 
 @app.post("/redact/")
 async def redact_document(file: UploadFile = File(...)):
     """API endpoint to redact a document"""
+    # The body is already spooled by now, but a saturated server still refuses to save or process it
+    if not in_flight.try_acquire():
+        raise busy(429, "Too many documents in flight, retry later")
+    
+    input_path = None
     try:
         # Generate unique filename
         file_id = str(uuid.uuid4())
-        input_path = Config.INPUT_DIR / f"{file_id}_{file.filename}"
-        output_path = Config.OUTPUT_DIR / f"redacted_{file_id}_{file.filename}"
+        filename = Path(file.filename).name
+        input_path = Config.INPUT_DIR / f"{file_id}_{filename}"
+        output_path = Config.OUTPUT_DIR / f"redacted_{file_id}_{filename}"
         
         # Save uploaded file
-        with open(input_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Process document
-        result = processor.process_document(input_path, output_path)
+        await run_in_threadpool(save_upload, file, input_path)
         
-        # Clean up input file
-        input_path.unlink(missing_ok=True)
+        # Process document off the event loop
+        try:
+            future = executor.submit(process_upload, file_id, input_path, output_path)
+        except RuntimeError:
+            # The executor is shutting down
+            raise busy(503, "Server is shutting down, retry later")
+        result = await asyncio.wrap_future(future)
         
         return {
             "status": "success",
@@ -50,9 +160,89 @@ async def redact_document(file: UploadFile = File(...)):
             "audit_log": result
         }
     
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"API error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        in_flight.release()
+        # Clean up input file
+        if input_path is not None:
+            input_path.unlink(missing_ok=True)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """Queue a document for redaction and return its job id immediately"""
+    job_id = str(uuid.uuid4())
+    filename = Path(file.filename).name
+    Config.JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    input_path = Config.JOBS_DIR / f"{job_id}_{filename}"
+    output_path = Config.JOBS_DIR / f"redacted_{job_id}_{filename}"
+    
+    try:
+        await run_in_threadpool(save_upload, file, input_path)
+    except UploadTooLarge as e:
+        input_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    await run_in_threadpool(job_store.create, filename, input_path, output_path, job_id)
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result"
+    }
+
+def get_job(job_id: str) -> dict:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status, per-page progress and timings of a job"""
+    job = await run_in_threadpool(get_job, job_id)
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "filename": job["filename"],
+        "progress": {"pages_done": job["pages_done"], "pages_total": job["pages_total"]},
+        "timings": job_timings(job),
+        "error": job["error"]
+    }
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """Audit log of a finished job, with the link to its redacted file"""
+    job = await run_in_threadpool(get_job, job_id)
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=job["error"] or "Job failed")
+    if job["status"] != DONE:
+        raise busy(409, f"Job is {job['status']}")
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "redacted_file": f"/jobs/{job_id}/result/file",
+        "timings": job_timings(job),
+        "audit_log": job["audit"]
+    }
+
+@app.get("/jobs/{job_id}/result/file")
+async def job_result_file(job_id: str):
+    """Download the redacted file of a finished job"""
+    job = await run_in_threadpool(get_job, job_id)
+    output_path = Path(job["output_path"])
+    if job["status"] != DONE or not output_path.exists():
+        raise HTTPException(status_code=404, detail="Result not available")
+    return FileResponse(
+        output_path,
+        media_type="application/octet-stream",
+        filename=f"redacted_{job['filename']}"
+    )
 
 @app.get("/download/{file_id}")
 async def download_file(file_id: str):
@@ -68,6 +258,32 @@ async def download_file(file_id: str):
         filename=file_path.name
     )
 
+@app.get("/health")
+async def health():
+    """Liveness check; reports model status without loading anything"""
+    return {"status": "ok", "models": model_registry.status()}
+
+@app.get("/ready")
+async def ready():
+    """Readiness check; loads every enabled model before reporting ready"""
+    models = await run_in_threadpool(model_registry.warm_up)
+    status_code = 200 if model_registry.is_ready() else 503
+    return JSONResponse({"ready": status_code == 200, "models": models}, status_code=status_code)
+
+@app.get("/metrics")
+async def metrics():
+    """Stage timings, page counts, queue depth and model load times in the Prometheus text format
+    
+    Documents processed by job workers are measured in those processes and
+    only appear here through the job queue depth.
+    """
+    registry = get_metrics()
+    registry.set_gauge("redaction_queue_depth", in_flight.count, queue="api")
+    for status in (QUEUED, RUNNING):
+        count = await run_in_threadpool(job_store.count, status)
+        registry.set_gauge("redaction_queue_depth", count, queue=f"jobs_{status}")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Financial Document Redaction API", "version": "1.0.0"}
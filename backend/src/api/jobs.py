@@ -0,0 +1,346 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..utils.config import Config
+from ..utils.logger import correlation_id, setup_logger
+
+logger = setup_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    audit TEXT,
+    error TEXT,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    pages_total INTEGER,
+    worker_pid INTEGER,
+    heartbeat_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """Persistent job queue in a SQLite database
+    
+    The database is shared by the API and the worker processes. Jobs are
+    claimed inside an immediate transaction, so each job goes to exactly one
+    worker, and everything survives an API restart.
+    """
+    
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or Config.JOBS_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Databases created before jobs had heartbeats
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; writes that must be atomic open their own transaction
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def create(self, filename: str, input_path: Path, output_path: Path, job_id: str = None) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, filename, input_path, output_path, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, filename, str(input_path), str(output_path), time.time())
+            )
+        return job_id
+    
+    def claim_next(self, worker_pid: int) -> Optional[Dict]:
+        """Mark the oldest queued job as running for this worker and return it"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, started_at = ?, heartbeat_at = ?, pages_done = 0, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, worker_pid, now, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row["id"])
+    
+    def update_progress(self, job_id: str, pages_done: int, pages_total: int) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET pages_done = ?, pages_total = ?, heartbeat_at = ? WHERE id = ?",
+                (pages_done, pages_total, time.time(), job_id)
+            )
+    
+    def heartbeat(self, job_id: str) -> None:
+        """Record that the worker running a job is still alive"""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+    
+    def complete(self, job_id: str, audit: Dict) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, audit = ?, finished_at = ?, pages_done = COALESCE(pages_total, pages_done) "
+                "WHERE id = ?",
+                (DONE, json.dumps(audit), time.time(), job_id)
+            )
+    
+    def fail(self, job_id: str, error: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id)
+            )
+    
+    def requeue_running(self, max_attempts: int = None, stale_after: float = None) -> int:
+        """Put running jobs whose worker is gone back in the queue
+        
+        A worker is gone when its process no longer exists on this host or
+        it has not sent a heartbeat for ``stale_after`` seconds, so jobs of
+        live workers (e.g. of another API instance) are left alone. A job that
+        was already interrupted ``max_attempts`` times (e.g. because it crashes
+        its worker) is marked failed instead, so it cannot take the workers
+        down on every restart.
+        """
+        max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        stale_after = Config.JOB_HEARTBEAT_TIMEOUT if stale_after is None else stale_after
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, input_path, worker_pid, heartbeat_at, attempts FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            stale_before = time.time() - stale_after
+            interrupted = [
+                row for row in rows
+                if not _pid_alive(row["worker_pid"]) or (row["heartbeat_at"] or 0) < stale_before
+            ]
+            given_up = [row for row in interrupted if row["attempts"] >= max_attempts]
+            requeued = [row for row in interrupted if row["attempts"] < max_attempts]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                [(FAILED, f"Interrupted {max_attempts} times, giving up", time.time(), row["id"], RUNNING)
+                 for row in given_up]
+            )
+            conn.executemany(
+                "UPDATE jobs SET status = ?, worker_pid = NULL, started_at = NULL, heartbeat_at = NULL, "
+                "pages_done = 0 WHERE id = ? AND status = ?",
+                [(QUEUED, row["id"], RUNNING) for row in requeued]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        
+        for row in given_up:
+            logger.warning(f"Job {row['id']} failed after {max_attempts} interrupted attempts")
+            Path(row["input_path"]).unlink(missing_ok=True)
+        return len(requeued)
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["audit"] = json.loads(job["audit"]) if job["audit"] else None
+        return job
+    
+    def count(self, status: str) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+    
+    def list(self, status: str = None, limit: int = 100) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self.get(row["id"]) for row in rows]
+
+def job_timings(job: Dict) -> Dict:
+    """Queue wait, processing time and throughput of a job, in seconds"""
+    now = time.time()
+    timings = {}
+    if job["started_at"] is not None:
+        timings["queue_seconds"] = round(job["started_at"] - job["created_at"], 3)
+        processing = (job["finished_at"] or now) - job["started_at"]
+        timings["processing_seconds"] = round(processing, 3)
+        if job["pages_done"] and processing > 0:
+            timings["pages_per_second"] = round(job["pages_done"] / processing, 3)
+    else:
+        timings["queue_seconds"] = round(now - job["created_at"], 3)
+    return timings
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this id exists on this host"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    except OSError:
+        return False
+    return True
+
+@contextmanager
+def _heartbeat(store: JobStore, job_id: str, interval: float):
+    """Send heartbeats for a job from a background thread while it runs"""
+    stop = threading.Event()
+    
+    def beat() -> None:
+        while not stop.wait(interval):
+            try:
+                store.heartbeat(job_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not record heartbeat of job {job_id}: {e}")
+    
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def job_worker(db_path: str, stop_event, poll_interval: float) -> None:
+    """Worker process loop: claim queued jobs and process them until stopped
+    
+    The processor and its models are created once per worker and reused for
+    every job it runs.
+    """
+    from ..models.registry import get_model_registry
+    from ..processing.document_processor import DocumentProcessor
+    
+    store = JobStore(db_path)
+    processor = DocumentProcessor()
+    get_model_registry().warm_up()
+    pid = os.getpid()
+    logger.info(f"Job worker {pid} ready")
+    
+    try:
+        while not stop_event.is_set():
+            job = store.claim_next(pid)
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+            
+            job_id = job["id"]
+            with correlation_id(job_id):
+                logger.info(f"Worker {pid} processing job {job_id}")
+                try:
+                    with _heartbeat(store, job_id, Config.JOB_HEARTBEAT_INTERVAL):
+                        audit = processor.process_document(
+                            Path(job["input_path"]),
+                            Path(job["output_path"]),
+                            progress=lambda done, total: store.update_progress(job_id, done, total)
+                        )
+                    store.complete(job_id, audit)
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {e}")
+                    store.fail(job_id, str(e))
+                finally:
+                    Path(job["input_path"]).unlink(missing_ok=True)
+    finally:
+        processor.close()
+        logger.info(f"Job worker {pid} stopped")
+
+
+class JobWorkerPool:
+    """Job worker processes started and stopped with the API
+    
+    While the workers run, a monitor thread puts jobs of dead or silent
+    workers back in the queue every ``JOB_HEARTBEAT_INTERVAL`` seconds.
+    """
+    
+    def __init__(self, db_path: Path, workers: int, poll_interval: float):
+        self.db_path = db_path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = None
+        self._processes: List[multiprocessing.Process] = []
+        self._monitor: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        self._stop_event = self._context.Event()
+        for i in range(self.workers):
+            # Not daemonic: workers start their own page worker pools
+            process = self._context.Process(
+                target=job_worker,
+                args=(str(self.db_path), self._stop_event, self.poll_interval),
+                name=f"job-worker-{i}"
+            )
+            process.start()
+            self._processes.append(process)
+        self._monitor = threading.Thread(target=self._requeue_interrupted, name="job-monitor", daemon=True)
+        self._monitor.start()
+        logger.info(f"Started {self.workers} job worker(s)")
+    
+    def _requeue_interrupted(self) -> None:
+        store = JobStore(self.db_path)
+        while not self._stop_event.wait(Config.JOB_HEARTBEAT_INTERVAL):
+            try:
+                requeued = store.requeue_running()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not check for interrupted jobs: {e}")
+                continue
+            if requeued:
+                logger.info(f"Requeued {requeued} job(s) of workers that stopped")
+    
+    def stop(self, timeout: float = 30.0) -> None:
+        """Let workers finish their current job, then terminate any that do not stop in time"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
\ No newline at end of file
@@ -1,9 +1,8 @@
 import argparse
 import sys
 from pathlib import Path
-from typing import List
 
-from .processing.document_processor import DocumentProcessor
+from .processing.batch import BatchRunner, Manifest, discover_inputs, input_root
 from .utils.config import Config
 from .utils.logger import setup_logger
 
@@ -17,7 +16,12 @@ def main():
     parser.add_argument("input", nargs="+", help="Input file(s) or directory to process")
     parser.add_argument("-o", "--output", help="Output directory for redacted files")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
-    parser.add_argument("--batch", action="store_true", help="Process files in batch mode")
+    parser.add_argument("--batch", action="store_true",
+                        help="Process files in batch mode, sharing one NER stream per group of documents")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes, each with its own warm models (default: 1)")
+    parser.add_argument("--manifest",
+                        help="File recording completed inputs; a rerun with the same manifest skips them")
     
     args = parser.parse_args()
     
@@ -29,52 +33,36 @@ def main():
     output_dir = Path(args.output) if args.output else Config.OUTPUT_DIR
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Get input files
-    input_files = []
-    for input_path in args.input:
-        path = Path(input_path)
-        if path.is_dir():
-            # Add all supported files from directory
-            for ext in [".pdf", ".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
-                input_files.extend(path.glob(f"**/*{ext}"))
-        elif path.exists():
-            input_files.append(path)
-        else:
-            logger.warning(f"Input path does not exist: {path}")
+    # In batch mode the text layers of a group of documents share one NER stream
+    group_size = Config.CLI_BATCH_DOCUMENTS if args.batch else 1
+    manifest = Manifest(Path(args.manifest)) if args.manifest else None
+    runner = BatchRunner(workers=args.workers, group_size=group_size, manifest=manifest)
     
-    if not input_files:
+    # Input files are found with one directory walk per input; outputs mirror their place under the inputs
+    input_paths = [Path(input_path) for input_path in args.input if Path(input_path).exists()]
+    input_files = discover_inputs(Path(input_path) for input_path in args.input)
+    summary = runner.run(input_files, output_dir, root=input_root(input_paths) if input_paths else None)
+    
+    if not summary["results"] and not summary["skipped"]:
         logger.error("No valid input files found")
         sys.exit(1)
     
-    # Process files
-    processor = DocumentProcessor()
-    results = []
-    
-    for input_file in input_files:
-        try:
-            logger.info(f"Processing: {input_file}")
-            
-            # Determine output path
-            output_file = output_dir / f"redacted_{input_file.name}"
-            
-            # Process document
-            result = processor.process_document(input_file, output_file)
-            results.append(result)
-            
-            logger.info(f"Completed: {input_file} -> {output_file}")
-            
-        except Exception as e:
-            logger.error(f"Error processing {input_file}: {e}")
-    
     # Print summary
-    logger.info(f"Processing complete. Processed {len(results)} files.")
+    logger.info(f"Processing complete. Processed {summary['documents']} files.")
+    
+    for result in summary["results"]:
+        if result["status"] != "done":
+            continue
+        doc_name = Path(result["input"]).name
+        logger.info(f"{doc_name}: {result['text_pii']} text PII, {result['visual_pii']} visual PII redacted")
     
-    for result in results:
-        doc_name = Path(result['document']).name
-        text_pii_count = sum(len(items) for items in result['text_pii'].values())
-        visual_pii_count = len(result['visual_pii'])
-        
-        logger.info(f"{doc_name}: {text_pii_count} text PII, {visual_pii_count} visual PII redacted")
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in summary["stage_seconds"].items())
+    logger.info(
+        f"{summary['documents']} documents ({summary['failed']} failed, {summary['skipped']} skipped), "
+        f"{summary['pages']} pages in {summary['seconds']:.2f}s: "
+        f"{summary['docs_per_second']:.2f} docs/s, {summary['pages_per_second']:.2f} pages/s"
+    )
+    logger.info(f"Time per stage: {stages}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence, Tuple
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class MicroBatcher:
+    """Group model inputs from concurrent callers into batched forward passes
+    
+    Callers hand their inputs to ``submit`` and block until their results are
+    ready. A background thread takes the first pending input, keeps collecting
+    until ``max_batch_size`` inputs are pending or ``max_wait_ms`` has passed,
+    runs them through ``run`` in one call and hands each caller its results.
+    """
+    
+    def __init__(self, run: Callable[[List[Any]], Sequence[Any]], max_batch_size: int,
+                 max_wait_ms: float, name: str = "micro-batcher"):
+        self.logger = setup_logger(__name__)
+        self.run = run
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def submit(self, items: Sequence[Any]) -> List[Any]:
+        """Results for ``items``, in order; re-raises the error of a failed batch"""
+        futures = []
+        for item in items:
+            future = Future()
+            self._queue.put((item, future))
+            futures.append(future)
+        self._ensure_thread()
+        return [future.result() for future in futures]
+    
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+    
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                    self._thread.start()
+    
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    # Inputs already pending are taken without waiting
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+    
+    def _run_batch(self, batch: List[Tuple[Any, Future]]) -> None:
+        try:
+            results = self.run([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            self.logger.error(f"Error running batch in {self.name}: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
\ No newline at end of file
@@ -0,0 +1,77 @@
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from ..models.spans import locate_values
+from ..utils.config import Config
+
+# spaCy labels the transformer model also knows (as PER, ORG and LOC)
+NAME_LABELS = ("PERSON", "ORG", "GPE")
+
+# Cheap signals for names, organizations and places: runs of two or more capitalized or
+# all-caps words, and single capitalized words after an honorific or a "Label:" prefix
+UNCASED_CANDIDATES = re.compile(r"\b[A-Z]{2,}(?:[ \t]+[A-Z]{2,})+\b")
+NAME_CANDIDATES = re.compile(
+    r"\b(?:Mr|Mrs|Ms|Miss|Dr|Prof)\.?[ \t]+[A-Z][A-Za-z'-]+"
+    r"|" + UNCASED_CANDIDATES.pattern +
+    r"|\b[A-Z][a-z]+(?:\.?[ \t]+(?:[A-Z]\.|[A-Z][a-z]+))+"
+    r"|:[ \t]*[A-Z][A-Za-z'-]+(?:[ \t]+[A-Z][A-Za-z'-]+)*"
+)
+
+def spacy_prefilter(segment: str) -> bool:
+    """Whether a page or paragraph is worth a spaCy pass in cascade mode
+    
+    Tables of amounts and dates are mostly digits and punctuation; a segment
+    passes when enough of it is letters and it has a name candidate.
+    """
+    chars = [c for c in segment if not c.isspace()]
+    if not chars:
+        return False
+    alpha_ratio = sum(c.isalpha() for c in chars) / len(chars)
+    return alpha_ratio >= Config.CASCADE_MIN_ALPHA_RATIO and NAME_CANDIDATES.search(segment) is not None
+
+def transformer_regions(text: str, spacy_segments: Sequence[Tuple[int, int]],
+                        spacy_result: Dict[str, List[str]]) -> List[Tuple[int, int]]:
+    """Line-aligned regions of ``text`` that are worth a transformer pass in cascade mode
+    
+    Those are the lines around spaCy's person, organization and place hits,
+    which the transformer confirms, around name candidates in text spaCy did
+    not see, which nothing has classified yet, and around all-caps runs,
+    where spaCy has no casing to go by.
+    """
+    values = [(label, entity, 0.0) for label in NAME_LABELS for entity in spacy_result.get(label, [])]
+    flags = [(span.start, span.end) for span in locate_values(text, values, "spacy")]
+    for match in NAME_CANDIDATES.finditer(text):
+        if not any(start <= match.start() < end for start, end in spacy_segments):
+            flags.append(match.span())
+    flags.extend(match.span() for match in UNCASED_CANDIDATES.finditer(text))
+    return _line_regions(text, flags, Config.CASCADE_REGION_CHARS)
+
+def _line_regions(text: str, flags: List[Tuple[int, int]], margin: int) -> List[Tuple[int, int]]:
+    """Widen each flagged span by ``margin`` characters to whole lines and merge overlaps"""
+    regions = []
+    for start, end in sorted(flags):
+        start = text.rfind("\n", 0, max(0, start - margin)) + 1
+        end = text.find("\n", min(len(text), end + margin))
+        end = len(text) if end == -1 else end
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+        else:
+            regions.append((start, end))
+    return regions
+
+def tier_report(text_chars: int, usages: List[Dict[str, int]]) -> Dict[str, Dict]:
+    """Characters each detection tier saw and its policy, for the audit log
+    
+    ``usages`` are the per-text tier counts of ``PIIDetector.detect_entities_batch``;
+    regex always sees all ``text_chars`` characters.
+    """
+    policies = {"regex": "always", "spacy": Config.SPACY_POLICY, "transformer": Config.TRANSFORMER_POLICY}
+    report = {}
+    for tier, policy in policies.items():
+        chars = text_chars if tier == "regex" else sum(usage.get(tier, 0) for usage in usages)
+        report[tier] = {
+            "policy": policy,
+            "chars": chars,
+            "share": round(chars / text_chars, 4) if text_chars else 0.0,
+        }
+    return report
\ No newline at end of file
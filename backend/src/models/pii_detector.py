@@ -1,41 +1,74 @@
 import re
-import spacy
-from transformers import pipeline
 from typing import Dict, List, Tuple
+from ..models.cascade import spacy_prefilter, transformer_regions
+from ..models.registry import ModelRegistry, get_model_registry
+from ..models.spans import PIISpan, fuse_spans, locate_values, spans_to_results
 from ..utils.config import Config
 from ..utils.logger import setup_logger
-from ..utils.helpers import detect_pii_with_regex, is_financial_context
+from ..utils.metrics import get_metrics, stage_timer
+from ..utils.helpers import FinancialContext, get_pii_scanner, split_text_segments
 
 logger = setup_logger(__name__)
 
+def run_ner_batch(ner_pipeline, chunks: List[str]) -> List[List[Dict]]:
+    """Entities of each chunk from one batched NER pipeline call"""
+    results = ner_pipeline(chunks, batch_size=Config.NER_BATCH_SIZE)
+    if results and isinstance(results[0], dict):
+        # A single input comes back as a flat list of entities
+        results = [results]
+    return results
+
 class PIIDetector:
-    def __init__(self):
+    def __init__(self, registry: ModelRegistry = None):
         self.logger = setup_logger(__name__)
-        self.nlp = spacy.load("en_core_web_sm")
-        
-        # Initialize Hugging Face models for PII detection
-        try:
-            self.ner_pipeline = pipeline(
-                "token-classification",
-                model="dslim/bert-base-NER",
-                aggregation_strategy="simple"
-            )
-        except Exception as e:
-            self.logger.warning(f"Could not load BERT NER model: {e}")
-            self.ner_pipeline = None
+        # spaCy and the Hugging Face NER model are loaded on first use and shared process-wide
+        self.registry = registry or get_model_registry()
+    
+    @property
+    def nlp(self):
+        return self.registry.get("spacy")
+    
+    @property
+    def ner_pipeline(self):
+        return self.registry.get("transformer_ner")
     
     def detect_pii_spacy(self, text: str) -> Dict[str, List[str]]:
         """Detect PII using spaCy NER"""
-        doc = self.nlp(text)
-        pii_entities = {}
+        return self.detect_pii_spacy_batch([text])[0]
+    
+    def detect_pii_spacy_batch(self, texts: List[str]) -> List[Dict[str, List[str]]]:
+        """Detect PII in several texts with one spaCy ``nlp.pipe`` stream
+        
+        Each text is split into pages/paragraphs, and the segments of all texts
+        are streamed through the pipeline together in batches.
+        """
+        results = [{} for _ in texts]
+        nlp = self.nlp
+        if nlp is None:
+            return results
         
-        for ent in doc.ents:
-            if ent.label_ in ["PERSON", "ORG", "GPE", "DATE", "CARDINAL"]:
-                if ent.label_ not in pii_entities:
-                    pii_entities[ent.label_] = []
-                pii_entities[ent.label_].append(ent.text)
+        segments = [
+            (segment, index)
+            for index, text in enumerate(texts)
+            for _, segment in split_text_segments(text, Config.SPACY_MAX_SEGMENT_CHARS)
+        ]
         
-        return pii_entities
+        docs = nlp.pipe(
+            segments,
+            as_tuples=True,
+            batch_size=Config.SPACY_BATCH_SIZE,
+            n_process=Config.SPACY_N_PROCESS
+        )
+        with stage_timer("spacy"):
+            for doc, index in docs:
+                pii_entities = results[index]
+                for ent in doc.ents:
+                    if ent.label_ in ["PERSON", "ORG", "GPE", "DATE", "CARDINAL"]:
+                        if ent.label_ not in pii_entities:
+                            pii_entities[ent.label_] = []
+                        pii_entities[ent.label_].append(ent.text)
+        
+        return results
     
     def detect_pii_transformers(self, text: str) -> Dict[str, List[Tuple[str, float]]]:
         """Detect PII using transformer models"""
@@ -43,61 +76,214 @@ class PIIDetector:
             return {}
         
         try:
-            results = self.ner_pipeline(text)
             pii_entities = {}
             
-            for entity in results:
+            for entity in self._detect_transformer_entities(text):
                 entity_type = entity['entity_group']
-                entity_text = entity['word']
-                confidence = entity['score']
-                
                 if entity_type not in pii_entities:
                     pii_entities[entity_type] = []
                 
-                pii_entities[entity_type].append((entity_text, confidence))
+                pii_entities[entity_type].append((text[entity['start']:entity['end']], entity['score']))
             
             return pii_entities
         except Exception as e:
             self.logger.error(f"Error in transformer PII detection: {e}")
             return {}
     
-    def detect_pii_hybrid(self, text: str) -> Dict[str, List[Tuple[str, str, float]]]:
-        """Hybrid PII detection using multiple methods"""
-        results = {}
-        
-        # 1. Regex detection
-        regex_results = detect_pii_with_regex(text)
-        for pii_type, matches in regex_results.items():
-            if pii_type not in results:
-                results[pii_type] = []
-            for match in matches:
-                # Add context awareness
-                if is_financial_context(text):
-                    results[pii_type].append((match, "regex", 0.9))
+    def _detect_transformer_entities(self, text: str) -> List[Dict]:
+        """Run the NER pipeline over overlapping token windows of the text
+        
+        Windows are sent through the pipeline in batches of ``NER_BATCH_SIZE``.
+        Entity offsets are mapped back to the full text, and entities found
+        twice in the overlap between two windows are reported once.
+        """
+        windows = self._token_windows(text)
+        if not windows:
+            return []
+        
+        chunks = [text[start:end] for start, end in windows]
+        with stage_timer("bert"):
+            if Config.MICRO_BATCHING:
+                batcher = self.registry.batcher("transformer_ner", run_ner_batch, Config.NER_BATCH_SIZE)
+                chunk_results = batcher.submit(chunks)
+            else:
+                chunk_results = run_ner_batch(self.ner_pipeline, chunks)
+        
+        entities = []
+        for (offset, _), results in zip(windows, chunk_results):
+            for entity in results:
+                entities.append({
+                    'entity_group': entity['entity_group'],
+                    'start': offset + entity['start'],
+                    'end': offset + entity['end'],
+                    'score': float(entity['score']),
+                })
+        
+        return self._merge_window_entities(entities)
+    
+    def _token_windows(self, text: str) -> List[Tuple[int, int]]:
+        """Character spans of overlapping windows of at most NER_WINDOW_TOKENS tokens"""
+        if not text.strip():
+            return []
+        
+        window = Config.NER_WINDOW_TOKENS
+        overlap = min(Config.NER_WINDOW_OVERLAP, window // 4)
+        
+        try:
+            encoding = self.ner_pipeline.tokenizer(
+                text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+            )
+            offsets = encoding['offset_mapping']
+        except (NotImplementedError, ValueError, KeyError):
+            # Slow tokenizers have no offset mapping; approximate tokens with characters
+            step = window * 4
+            return [(start, min(start + step, len(text))) for start in range(0, len(text), step - overlap * 4)]
+        
+        spans = []
+        first = 0
+        while True:
+            last = min(first + window, len(offsets)) - 1
+            spans.append((offsets[first][0], offsets[last][1]))
+            if last == len(offsets) - 1:
+                return spans
+            
+            # Step forward keeping the overlap, backing up a little to start on a word boundary
+            first = last + 1 - overlap
+            word_start = first
+            while word_start > first - overlap and offsets[word_start][0] == offsets[word_start - 1][1]:
+                word_start -= 1
+            if offsets[word_start][0] != offsets[word_start - 1][1]:
+                first = word_start
+    
+    @staticmethod
+    def _merge_window_entities(entities: List[Dict]) -> List[Dict]:
+        """Drop duplicates from window overlaps, preferring the longest, then most confident span"""
+        merged = []
+        for entity in sorted(entities, key=lambda e: (e['start'], -e['end'])):
+            previous = merged[-1] if merged else None
+            if (previous and previous['entity_group'] == entity['entity_group']
+                    and entity['start'] < previous['end']):
+                previous_length = previous['end'] - previous['start']
+                entity_length = entity['end'] - entity['start']
+                if (entity_length, entity['score']) > (previous_length, previous['score']):
+                    merged[-1] = entity
+                continue
+            merged.append(entity)
+        return merged
+    
+    def detect_pii_hybrid_batch(self, texts: List[str]) -> List[Dict[str, List[Tuple[str, str, float]]]]:
+        """Hybrid PII detection for several documents, sharing one spaCy pipe stream"""
+        return [
+            self.detect_pii_hybrid(text, spacy_results=entities["spacy"], transformer_results=entities["transformer"])
+            for text, entities in zip(texts, self.detect_entities_batch(texts))
+        ]
+    
+    def detect_entities_batch(self, texts: List[str]) -> List[Dict]:
+        """spaCy and transformer entities of several texts, run through the detection cascade
+        
+        Each NER tier runs on all of a text ("always"), none of it ("never"),
+        or in "cascade" mode only where cheaper signals fire: spaCy on segments
+        passing the prefilter, the transformer on the regions left flagged.
+        Returns ``{"spacy": ..., "transformer": ..., "tiers": {tier: characters}}``
+        per text.
+        """
+        spacy_policy, transformer_policy = Config.SPACY_POLICY, Config.TRANSFORMER_POLICY
+        
+        # spaCy tier: one pipe stream over the selected segments of every text
+        spacy_segments = [[] for _ in texts]
+        selected = []
+        if spacy_policy != "never" and self.nlp is not None:
+            for index, text in enumerate(texts):
+                for offset, segment in split_text_segments(text, Config.SPACY_MAX_SEGMENT_CHARS):
+                    if spacy_policy == "always" or spacy_prefilter(segment):
+                        spacy_segments[index].append((offset, offset + len(segment)))
+                        selected.append((index, segment))
+        
+        spacy_results = [{} for _ in texts]
+        for (index, _), result in zip(selected, self.detect_pii_spacy_batch([segment for _, segment in selected])):
+            for label, entities in result.items():
+                spacy_results[index].setdefault(label, []).extend(entities)
+        
+        # Transformer tier
+        run_transformer = transformer_policy != "never" and self.ner_pipeline is not None
+        results = []
+        for text, segments, spacy_result in zip(texts, spacy_segments, spacy_results):
+            regions = []
+            if run_transformer:
+                if transformer_policy == "always":
+                    regions = [(0, len(text))] if text.strip() else []
+                else:
+                    regions = transformer_regions(text, segments, spacy_result)
+            
+            transformer_result = {}
+            if regions:
+                # Regions are whole lines, so joining them with line breaks keeps their entities apart
+                transformer_result = self.detect_pii_transformers("\n".join(text[start:end] for start, end in regions))
+            
+            tiers = {
+                "spacy": sum(end - start for start, end in segments),
+                "transformer": sum(end - start for start, end in regions),
+            }
+            for tier, chars in tiers.items():
+                get_metrics().inc("redaction_detection_chars_total", chars, tier=tier)
+            get_metrics().inc("redaction_detection_chars_total", len(text), tier="regex")
+            results.append({"spacy": spacy_result, "transformer": transformer_result, "tiers": tiers})
+        
+        return results
+    
+    def detect_pii_hybrid(self, text: str, spacy_results: Dict[str, List[str]] = None,
+                          transformer_results: Dict[str, List[Tuple[str, float]]] = None
+                          ) -> Dict[str, List[Tuple[str, str, float]]]:
+        """Hybrid PII detection using multiple methods
+        
+        NER results computed elsewhere (e.g. per page or per batch) can be
+        passed in, in which case only the regex pass runs over ``text``.
+        Returns one ``(value, source, confidence)`` entry per distinct value
+        of the fused spans.
+        """
+        return spans_to_results(text, self.detect_pii_spans(text, spacy_results, transformer_results))
+    
+    def detect_pii_spans(self, text: str, spacy_results: Dict[str, List[str]] = None,
+                         transformer_results: Dict[str, List[Tuple[str, float]]] = None) -> List[PIISpan]:
+        """Detections of every method as spans of ``text``, fused where they overlap"""
+        spans = []
+        
+        # 1. Regex detection, scored by the financial context around each match
+        with stage_timer("regex"):
+            context = FinancialContext(text)
+            if context.is_financial:
+                for match in get_pii_scanner().scan(text):
+                    confidence = context.confidence(match.start, match.end)
+                    spans.append(PIISpan(match.start, match.end, match.type, "regex", confidence))
+        
+        if spacy_results is None and transformer_results is None:
+            entities = self.detect_entities_batch([text])[0]
+            spacy_results, transformer_results = entities["spacy"], entities["transformer"]
         
         # 2. spaCy NER
-        spacy_results = self.detect_pii_spacy(text)
-        for entity_type, entities in spacy_results.items():
-            pii_type = self._map_spacy_to_pii_type(entity_type)
-            if pii_type:
-                if pii_type not in results:
-                    results[pii_type] = []
-                for entity in entities:
-                    results[pii_type].append((entity, "spacy", 0.85))
+        if spacy_results is None:
+            spacy_results = self.detect_pii_spacy(text)
+        spacy_values = [
+            (self._map_spacy_to_pii_type(entity_type), entity, 0.85)
+            for entity_type, entities in spacy_results.items()
+            for entity in entities
+        ]
+        spans.extend(locate_values(text, [value for value in spacy_values if value[0]], "spacy"))
         
         # 3. Transformers NER (if available)
         if self.ner_pipeline:
-            transformer_results = self.detect_pii_transformers(text)
-            for entity_type, entities in transformer_results.items():
-                pii_type = self._map_transformer_to_pii_type(entity_type)
-                if pii_type:
-                    if pii_type not in results:
-                        results[pii_type] = []
-                    for entity, confidence in entities:
-                        if confidence > Config.CONFIDENCE_THRESHOLD:
-                            results[pii_type].append((entity, "transformer", confidence))
+            if transformer_results is None:
+                transformer_results = self.detect_pii_transformers(text)
+            transformer_values = [
+                (self._map_transformer_to_pii_type(entity_type), entity, confidence)
+                for entity_type, entities in transformer_results.items()
+                for entity, confidence in entities
+                if confidence > Config.CONFIDENCE_THRESHOLD
+            ]
+            spans.extend(locate_values(text, [value for value in transformer_values if value[0]], "transformer"))
         
-        return results
+        with stage_timer("fuse"):
+            return fuse_spans(spans)
     
     def _map_spacy_to_pii_type(self, spacy_label: str) -> str:
         """Map spaCy entity labels to PII types"""
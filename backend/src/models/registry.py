@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+from ..models.batching import MicroBatcher
+from ..utils.config import Config
+from ..utils.logger import setup_logger
+from ..utils.metrics import get_metrics
+
+logger = setup_logger(__name__)
+
+class ModelRegistry:
+    """Process-wide registry of lazily loaded models
+    
+    A model is loaded on first use and the instance is shared by every
+    detector and processor in the process. Disabled models are never loaded,
+    so their libraries (spaCy, transformers, torch, ultralytics) are never
+    imported. A model that fails to load is remembered as unavailable.
+    """
+    
+    def __init__(self):
+        self.logger = setup_logger(__name__)
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._enabled: Dict[str, Callable[[], bool]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._batchers_lock = threading.Lock()
+    
+    def register(self, name: str, loader: Callable[[], Any], enabled: Callable[[], bool] = lambda: True) -> None:
+        self._loaders[name] = loader
+        self._enabled[name] = enabled
+        self._locks[name] = threading.Lock()
+    
+    def enabled(self, name: str) -> bool:
+        return self._enabled[name]()
+    
+    def get(self, name: str) -> Any:
+        """The shared model instance, loading it on first use; None if disabled or unavailable"""
+        if name in self._models:
+            return self._models[name]
+        if not self.enabled(name) or name in self._errors:
+            return None
+        
+        with self._locks[name]:
+            # Another thread may have loaded it while we waited
+            if name in self._models or name in self._errors:
+                return self._models.get(name)
+            try:
+                start = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                seconds = time.perf_counter() - start
+                get_metrics().set_gauge("redaction_model_load_seconds", seconds, model=name)
+                self.logger.info(f"Loaded model {name} in {seconds:.2f}s")
+            except Exception as e:
+                self._errors[name] = str(e)
+                self.logger.warning(f"Could not load model {name}: {e}")
+                return None
+        return self._models[name]
+    
+    def batcher(self, name: str, run: Callable[[Any, List[Any]], Sequence[Any]], max_batch_size: int) -> MicroBatcher:
+        """Shared micro-batcher in front of a model
+        
+        ``run(model, inputs)`` runs one batched forward pass. Every detector
+        in the process submits through the same batcher, so inputs from
+        concurrent documents share forward passes.
+        """
+        with self._batchers_lock:
+            if name not in self._batchers:
+                self._batchers[name] = MicroBatcher(
+                    lambda inputs: run(self.get(name), inputs),
+                    max_batch_size,
+                    Config.MICRO_BATCH_WAIT_MS,
+                    name=f"{name}-batcher"
+                )
+            return self._batchers[name]
+    
+    def warm_up(self, names: Iterable[str] = None) -> Dict[str, str]:
+        """Load the given (default: all enabled) models now, returning their status"""
+        for name in names or self._loaders:
+            self.get(name)
+        return self.status()
+    
+    def status(self) -> Dict[str, str]:
+        status = {}
+        for name in self._loaders:
+            if name in self._models:
+                status[name] = "loaded"
+            elif not self.enabled(name):
+                status[name] = "disabled"
+            elif name in self._errors:
+                status[name] = "failed"
+            else:
+                status[name] = "not_loaded"
+        return status
+    
+    def is_ready(self) -> bool:
+        """Whether every enabled model has been loaded, or has failed and will not be retried"""
+        return "not_loaded" not in self.status().values()
+    
+    def clear(self) -> None:
+        """Forget loaded models and load errors"""
+        self._models.clear()
+        self._errors.clear()
+
+def _load_spacy():
+    import spacy
+    # Only doc.ents is used, so every other pipeline component is excluded
+    return spacy.load(Config.SPACY_MODEL, exclude=Config.SPACY_EXCLUDE)
+
+def _load_transformer_ner():
+    from transformers import pipeline
+    return pipeline(
+        "token-classification",
+        model=Config.NER_MODEL,
+        aggregation_strategy="simple"
+    )
+
+def _load_yolo():
+    import torch
+    from ultralytics import YOLO
+    device = "cuda" if torch.cuda.is_available() and Config.USE_GPU else "cpu"
+    model = YOLO(Config.YOLO_MODEL)
+    # Prediction arguments default to the model's overrides; without a device
+    # ultralytics picks the GPU whenever there is one, ignoring USE_GPU
+    model.overrides["device"] = device
+    logger.info(f"Loaded YOLOv8 model on {device}")
+    return model
+
+registry = ModelRegistry()
+registry.register("spacy", _load_spacy, lambda: Config.ENABLE_SPACY)
+registry.register("transformer_ner", _load_transformer_ner, lambda: Config.ENABLE_TRANSFORMER_NER)
+registry.register("yolo", _load_yolo, lambda: Config.ENABLE_VISUAL_DETECTION)
+
+def get_model_registry() -> ModelRegistry:
+    return registry
\ No newline at end of file
@@ -0,0 +1,90 @@
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+class PIISpan:
+    """One detected PII occurrence: character offsets, type, detector and confidence
+    
+    Fused spans name every detector that contributed, joined by ``+``.
+    """
+    
+    __slots__ = ("start", "end", "type", "source", "confidence")
+    
+    def __init__(self, start: int, end: int, type: str, source: str, confidence: float):
+        self.start = start
+        self.end = end
+        self.type = type
+        self.source = source
+        self.confidence = confidence
+    
+    def to_list(self) -> list:
+        return [self.start, self.end, self.type, self.source, round(self.confidence, 4)]
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PIISpan) and self.to_list() == other.to_list()
+    
+    def __repr__(self) -> str:
+        return f"PIISpan({self.start}, {self.end}, {self.type!r}, {self.source!r}, {self.confidence:.3f})"
+
+def fuse_spans(spans: Iterable[PIISpan]) -> List[PIISpan]:
+    """Merge overlapping spans of the same type into one span per covered interval, in O(n log n)
+    
+    Spans are sorted once and swept left to right, one type at a time, so
+    text matching several types (a card number is also an account number)
+    keeps a span for each. A merged span's confidence combines detectors
+    with a noisy-OR over each detector's best score, so agreement between
+    independent detectors raises confidence while repeated hits from one
+    detector do not.
+    """
+    ordered = sorted((span for span in spans if span.end > span.start), key=lambda span: (span.start, -span.end))
+    groups: List[List[PIISpan]] = []
+    open_groups: Dict[str, Tuple[List[PIISpan], int]] = {}
+    for span in ordered:
+        group, group_end = open_groups.get(span.type, (None, -1))
+        if group is not None and span.start < group_end:
+            group.append(span)
+            open_groups[span.type] = (group, max(group_end, span.end))
+        else:
+            group = [span]
+            groups.append(group)
+            open_groups[span.type] = (group, span.end)
+    return [_merge(group) for group in groups]
+
+def _merge(group: List[PIISpan]) -> PIISpan:
+    best_by_source: Dict[str, float] = {}
+    for span in group:
+        best_by_source[span.source] = max(best_by_source.get(span.source, 0.0), span.confidence)
+    miss = 1.0
+    for confidence in best_by_source.values():
+        miss *= 1.0 - confidence
+    
+    end = max(span.end for span in group)
+    return PIISpan(group[0].start, end, group[0].type, "+".join(sorted(best_by_source)), 1.0 - miss)
+
+def locate_values(text: str, values: Sequence[Tuple[str, str, float]], source: str) -> List[PIISpan]:
+    """Spans for every occurrence of detected ``(type, value, confidence)`` strings in ``text``
+    
+    Used for detectors that report strings rather than offsets.
+    """
+    spans = []
+    seen = set()
+    for pii_type, value, confidence in values:
+        value = value.strip()
+        if not value or (pii_type, value) in seen:
+            continue
+        seen.add((pii_type, value))
+        # Whole-token matches only, so "123" does not hit inside "123-45-6789"
+        pattern = re.compile(rf"(?<![\w-]){re.escape(value)}(?![\w-])")
+        for match in pattern.finditer(text):
+            spans.append(PIISpan(match.start(), match.end(), pii_type, source, confidence))
+    return spans
+
+def spans_to_results(text: str, spans: Iterable[PIISpan]) -> Dict[str, List[Tuple[str, str, float]]]:
+    """``{type: [(value, source, confidence)]}`` with one entry per distinct value"""
+    results: Dict[str, Dict[str, Tuple[str, str, float]]] = {}
+    for span in spans:
+        value = text[span.start:span.end]
+        entries = results.setdefault(span.type, {})
+        if value not in entries or span.confidence > entries[value][2]:
+            entries[value] = (value, span.source, round(span.confidence, 4))
+    return {pii_type: list(entries.values()) for pii_type, entries in results.items()}
\ No newline at end of file
@@ -1,84 +1,138 @@
 import cv2
 import numpy as np
 from PIL import Image
-import torch
-from ultralytics import YOLO
-from typing import List, Tuple, Dict
+from typing import Any, List, Tuple, Dict
 from pathlib import Path
 
+from ..models.registry import ModelRegistry, get_model_registry
+from ..processing.image_processor import ImageProcessor
 from ..utils.config import Config
 from ..utils.logger import setup_logger
+from ..utils.metrics import stage_timer
 
 logger = setup_logger(__name__)
 
+# Class ids of our YOLOv8 model (assuming it was trained for signatures and logos)
+VISUAL_CLASSES = {
+    0: "signature",
+    1: "logo",
+}
+
+def run_yolo_batch(model, inputs: List[Any]) -> List[Any]:
+    """YOLO results for several images from one forward pass"""
+    return model(inputs, conf=Config.CONFIDENCE_THRESHOLD)
+
 class VisualDetector:
-    def __init__(self):
+    def __init__(self, registry: ModelRegistry = None):
         self.logger = setup_logger(__name__)
-        self.device = "cuda" if torch.cuda.is_available() and Config.USE_GPU else "cpu"
+        self.image_processor = ImageProcessor()
+        
+        # The YOLOv8 model for signature and logo detection is loaded on first use
+        self.registry = registry or get_model_registry()
         
-        # Initialize YOLOv8 model for signature and logo detection
-        try:
-            self.model = YOLO("yolov8n.pt")  # Using nano version for speed
-            self.logger.info(f"Loaded YOLOv8 model on {self.device}")
-        except Exception as e:
-            self.logger.error(f"Could not load YOLO model: {e}")
-            self.model = None
+        # Last detection result, so per-class views do not re-run inference
+        self._cached_source = None
+        self._cached_detection = None
     
-    def detect_signatures(self, image_path: Path) -> List[Tuple[int, int, int, int, float]]:
-        """Detect signatures in an image using YOLOv8"""
-        if not self.model:
-            return []
+    @property
+    def model(self):
+        return self.registry.get("yolo")
+    
+    def detect(self, images: Any, batch_size: int = None) -> List[Dict[str, List[Tuple[int, int, int, int, float]]]]:
+        """Detect signatures, logos and other objects with a single YOLOv8 pass per image
         
-        try:
-            # Run inference
-            results = self.model(image_path, conf=Config.CONFIDENCE_THRESHOLD)
-            
-            signatures = []
-            for result in results:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-                    
-                    # Assuming we've trained our model to detect signatures (class 0)
-                    if class_id == 0:
-                        signatures.append((x1, y1, x2, y2, confidence))
-            
-            return signatures
-        except Exception as e:
-            self.logger.error(f"Error detecting signatures: {e}")
-            return []
+        Accepts a path, a PIL image or an RGB NumPy array, or a list of them.
+        Lists are run through the model in batches of ``batch_size`` images.
+        """
+        if not isinstance(images, (list, tuple)):
+            images = [images]
+        
+        model = self.model
+        if not model or not images:
+            return [self._empty_detection() for _ in images]
+        
+        with stage_timer("yolo"):
+            return self._detect(model, images, max(1, batch_size or Config.VISUAL_BATCH_SIZE))
     
-    def detect_logos(self, image_path: Path) -> List[Tuple[int, int, int, int, float]]:
-        """Detect logos in an image using YOLOv8"""
-        if not self.model:
-            return []
+    def _detect(self, model, images: List[Any], batch_size: int) -> List[Dict[str, List[Tuple[int, int, int, int, float]]]]:
+        if Config.MICRO_BATCHING:
+            # Pages of concurrent documents share forward passes
+            try:
+                batcher = self.registry.batcher("yolo", run_yolo_batch, batch_size)
+                results = batcher.submit([self._to_model_input(image) for image in images])
+                return [self._bucket_boxes(result) for result in results]
+            except Exception as e:
+                self.logger.error(f"Error running visual detection: {e}")
+                return [self._empty_detection() for _ in images]
         
-        try:
-            results = self.model(image_path, conf=Config.CONFIDENCE_THRESHOLD)
-            
-            logos = []
-            for result in results:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-                    
-                    # Assuming we've trained our model to detect logos (class 1)
-                    if class_id == 1:
-                        logos.append((x1, y1, x2, y2, confidence))
-            
-            return logos
-        except Exception as e:
-            self.logger.error(f"Error detecting logos: {e}")
-            return []
+        detections = []
+        for start in range(0, len(images), batch_size):
+            batch = images[start:start + batch_size]
+            try:
+                results = run_yolo_batch(model, [self._to_model_input(image) for image in batch])
+                detections.extend(self._bucket_boxes(result) for result in results)
+            except Exception as e:
+                self.logger.error(f"Error running visual detection: {e}")
+                detections.extend(self._empty_detection() for _ in batch)
+        
+        return detections
+    
+    def detect_signatures(self, image_path: Any) -> List[Tuple[int, int, int, int, float]]:
+        """Detect signatures in an image using YOLOv8"""
+        return self._detect_cached(image_path)["signature"]
+    
+    def detect_logos(self, image_path: Any) -> List[Tuple[int, int, int, int, float]]:
+        """Detect logos in an image using YOLOv8"""
+        return self._detect_cached(image_path)["logo"]
     
     def redact_areas(self, image: Image.Image, areas: List[Tuple[int, int, int, int]]) -> Image.Image:
         """Redact specified areas in an image"""
-        img_array = np.array(image)
+        return self.image_processor.redact_boxes(image, areas)
+    
+    def _detect_cached(self, image: Any) -> Dict[str, List[Tuple[int, int, int, int, float]]]:
+        """Return the detection for an image, reusing the last result for the same input"""
+        if self._cached_detection is not None and self._is_cached_source(image):
+            return self._cached_detection
         
-        for (x1, y1, x2, y2) in areas:
-            # Create a black rectangle to redact the area
-            cv2.rectangle(img_array, (x1, y1), (x2, y2), (0, 0, 0), -1)
+        self._cached_detection = self.detect(image)[0]
+        self._cached_source = image
+        return self._cached_detection
+    
+    def _is_cached_source(self, image: Any) -> bool:
+        if image is self._cached_source:
+            return True
+        # Paths are compared by value since callers usually pass a new Path object
+        if isinstance(image, (str, Path)) and isinstance(self._cached_source, (str, Path)):
+            return str(image) == str(self._cached_source)
+        return False
+    
+    @staticmethod
+    def _to_model_input(image: Any) -> Any:
+        """Convert an in-memory image to what YOLO expects, without touching disk"""
+        if isinstance(image, np.ndarray):
+            # YOLO reads arrays as BGR, our arrays come from PIL in RGB order
+            if image.ndim == 2:
+                return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            if image.shape[2] == 4:
+                return cv2.cvtColor(image, cv2.COLOR_RGBA2BGR)
+            return np.ascontiguousarray(image[:, :, ::-1])
+        if isinstance(image, Path):
+            return str(image)
+        return image
+    
+    def _bucket_boxes(self, result) -> Dict[str, List[Tuple[int, int, int, int, float]]]:
+        """Split the boxes of one YOLO result into signature/logo/other buckets"""
+        detection = self._empty_detection()
         
-        return Image.fromarray(img_array)
\ No newline at end of file
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+            confidence = float(box.conf[0])
+            class_id = int(box.cls[0])
+            
+            detection[VISUAL_CLASSES.get(class_id, "other")].append((x1, y1, x2, y2, confidence))
+        
+        return detection
+    
+    @staticmethod
+    def _empty_detection() -> Dict[str, List[Tuple[int, int, int, int, float]]]:
+        return {"signature": [], "logo": [], "other": []}
\ No newline at end of file
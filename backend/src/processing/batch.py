@@ -0,0 +1,260 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from ..utils.config import Config
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SUPPORTED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
+
+def discover_inputs(paths: Iterable[Path]) -> Iterator[Path]:
+    """Supported files under the given files and directories, in a single walk per directory"""
+    for path in paths:
+        if path.is_dir():
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        yield Path(root) / name
+        elif path.exists():
+            yield path
+        else:
+            logger.warning(f"Input path does not exist: {path}")
+
+def input_root(paths: Iterable[Path]) -> Path:
+    """Resolved common directory of the files and directories given as inputs"""
+    resolved = [path.resolve() for path in paths]
+    return Path(os.path.commonpath([path if path.is_dir() else path.parent for path in resolved]))
+
+def output_paths(inputs: List[Path], output_dir: Path, root: Path = None) -> Dict[Path, Path]:
+    """Output path of each input, mirroring its place under ``root``
+    
+    ``root`` defaults to the inputs' common directory. Inputs with the same
+    name in different directories get separate outputs.
+    """
+    if not inputs:
+        return {}
+    resolved = [path.resolve() for path in inputs]
+    root = root.resolve() if root is not None else Path(os.path.commonpath([path.parent for path in resolved]))
+    return {
+        path: output_dir / source.parent.relative_to(root) / f"redacted_{source.name}"
+        for path, source in zip(inputs, resolved)
+    }
+
+
+class Manifest:
+    """Append-only JSON lines record of finished inputs, used to resume a run
+    
+    Inputs are recorded by their resolved path, so a run resumed from another
+    working directory recognizes them.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+    
+    def completed(self) -> Set[str]:
+        """Inputs that were processed successfully by earlier runs"""
+        done = set()
+        if not self.path.exists():
+            return done
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves a partial last line
+                    continue
+                if entry.get("status") == "done":
+                    done.add(entry["input"])
+        return done
+    
+    def record(self, entries: List[Dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+_processor = None
+
+def _init_worker(page_workers: int) -> None:
+    """Create this worker's processor and load its models once"""
+    global _processor
+    from ..models.registry import get_model_registry
+    from ..processing.document_processor import DocumentProcessor
+    
+    Config.PAGE_WORKERS = page_workers
+    _processor = DocumentProcessor()
+    get_model_registry().warm_up()
+
+def _process_group(jobs: List[Tuple[str, str]], share_text_pii: bool) -> List[Dict]:
+    """Process ``(input, output)`` pairs in this worker, one manifest entry per document
+    
+    The stages of an entry are the stage timings of its audit log, plus its
+    share of the group's text PII batch.
+    """
+    processor = _processor
+    input_paths = [Path(input_file) for input_file, _ in jobs]
+    text_pii = {}
+    shared_seconds = {}
+    if share_text_pii and len(jobs) > 1:
+        start = time.perf_counter()
+        try:
+            text_pii = processor.detect_text_pii_batch(input_paths)
+        except Exception as e:
+            logger.error(f"Error in batch text PII detection, falling back to per-document: {e}")
+        # The shared NER stream is charged evenly to the documents that used its results
+        sharing = [path for path in input_paths if path in text_pii] or input_paths
+        shared_seconds = {path: (time.perf_counter() - start) / len(sharing) for path in sharing}
+    
+    entries = []
+    for (input_file, output_file), input_path in zip(jobs, input_paths):
+        output_path = Path(output_file)
+        pages = [0]
+        stages = defaultdict(float)
+        if input_path in shared_seconds:
+            stages["text_pii_batch"] = shared_seconds[input_path]
+        entry = {"input": input_file, "output": output_file, "pid": os.getpid()}
+        start = time.perf_counter()
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            result = processor.process_document(
+                input_path,
+                output_path,
+                text_pii=text_pii.get(input_path),
+                progress=lambda done, total: pages.__setitem__(0, total)
+            )
+            for name, timing in result.get("timings", {}).items():
+                stages[name] += timing["seconds"]
+            entry.update({
+                "status": "done",
+                "text_pii": sum(len(items) for items in result["text_pii"].values()),
+                "visual_pii": len(result["visual_pii"]),
+            })
+        except Exception as e:
+            logger.error(f"Error processing {input_file}: {e}")
+            entry.update({"status": "failed", "error": str(e)})
+        entry["pages"] = pages[0]
+        entry["seconds"] = round(time.perf_counter() - start, 4)
+        entry["stages"] = {name: round(value, 4) for name, value in stages.items()}
+        entries.append(entry)
+    return entries
+
+
+class BatchRunner:
+    """Process many documents on a pool of worker processes
+    
+    Each worker keeps one DocumentProcessor with warm models for the whole
+    run. Inputs are queued in groups of ``group_size`` (a group shares one
+    NER stream), at most two groups per worker are in flight, and finished
+    documents are appended to the manifest as they complete so an
+    interrupted run can resume. Outputs mirror the inputs' directory layout
+    under the output directory.
+    """
+    
+    def __init__(self, workers: int = 1, group_size: int = 1, manifest: Manifest = None):
+        self.logger = setup_logger(__name__)
+        self.workers = max(1, workers)
+        self.group_size = max(1, group_size)
+        self.manifest = manifest
+    
+    def run(self, inputs: Iterable[Path], output_dir: Path, root: Path = None) -> Dict:
+        """Process every input not yet completed in the manifest and return the throughput summary
+        
+        Outputs mirror the inputs' place under ``root`` (see ``output_paths``).
+        """
+        start = time.perf_counter()
+        # Discovery is usually a lazy directory walk, so it is timed as it is consumed.
+        # A file given both on its own and inside a directory is processed once.
+        paths = list(dict.fromkeys(path.resolve() for path in inputs))
+        outputs = output_paths(paths, output_dir, root)
+        
+        completed = self.manifest.completed() if self.manifest else set()
+        pending = []
+        skipped = 0
+        for path in paths:
+            if str(path) in completed:
+                skipped += 1
+            else:
+                pending.append((str(path), str(outputs[path])))
+        if skipped:
+            self.logger.info(f"Resuming: skipping {skipped} inputs completed by an earlier run")
+        discovery_seconds = time.perf_counter() - start
+        
+        groups = [pending[i:i + self.group_size] for i in range(0, len(pending), self.group_size)]
+        entries = []
+        
+        start = time.perf_counter()
+        if not groups:
+            self.logger.info("No inputs left to process")
+        elif self.workers == 1:
+            # Pages of a document still fan out to the page worker pool
+            _init_worker(Config.PAGE_WORKERS)
+            try:
+                for group in groups:
+                    self._finish(_process_group(group, self.group_size > 1), entries, len(pending))
+            finally:
+                _processor.close()
+        else:
+            # Documents are the unit of parallelism, so pages are processed inline in each worker
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(1,)
+            ) as executor:
+                queued = iter(groups)
+                in_flight = set()
+                while True:
+                    while len(in_flight) < self.workers * 2:
+                        group = next(queued, None)
+                        if group is None:
+                            break
+                        in_flight.add(executor.submit(_process_group, group, self.group_size > 1))
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(future.result(), entries, len(pending))
+        
+        return self.summary(entries, time.perf_counter() - start, skipped, discovery_seconds)
+    
+    def _finish(self, group_entries: List[Dict], entries: List[Dict], total: int) -> None:
+        if self.manifest:
+            self.manifest.record(group_entries)
+        entries.extend(group_entries)
+        for entry in group_entries:
+            if entry["status"] == "done":
+                self.logger.info(f"Completed: {entry['input']} -> {entry['output']}")
+        self.logger.info(f"Progress: {len(entries)}/{total} documents")
+    
+    def summary(self, entries: List[Dict], seconds: float, skipped: int = 0, discovery_seconds: float = 0.0) -> Dict:
+        """Throughput of a run: documents and pages per second, and time per stage
+        
+        Stage times are summed over all documents and workers, so with
+        several workers they add up to more than the run's wall time.
+        """
+        done = [entry for entry in entries if entry["status"] == "done"]
+        pages = sum(entry["pages"] for entry in done)
+        stages = defaultdict(float)
+        stages["discovery"] = discovery_seconds
+        for entry in entries:
+            for name, value in entry["stages"].items():
+                stages[name] += value
+        return {
+            "documents": len(done),
+            "failed": len(entries) - len(done),
+            "skipped": skipped,
+            "pages": pages,
+            "seconds": round(seconds, 3),
+            "docs_per_second": round(len(done) / seconds, 3) if seconds > 0 else 0.0,
+            "pages_per_second": round(pages / seconds, 3) if seconds > 0 else 0.0,
+            "stage_seconds": {name: round(value, 3) for name, value in stages.items()},
+            "results": entries,
+        }
\ No newline at end of file
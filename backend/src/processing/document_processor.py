@@ -1,20 +1,34 @@
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from collections import Counter
+from itertools import islice
 from PIL import Image
 import PyPDF2
 import json
+import tempfile
 from datetime import datetime
 
+from ..models.cascade import tier_report
 from ..models.pii_detector import PIIDetector
+from ..models.spans import spans_to_results
 from ..models.visual_detector import VisualDetector
-from ..processing.pdf_handler import PDFHandler
+from ..processing.pdf_handler import PDFHandler, PDFPageWriter
+from ..processing.pdf_redactor import PageTextLayer, VectorRedactor, remaining_values, to_pixel_boxes
+from ..processing.ocr import OCRPage
 from ..processing.image_processor import ImageProcessor
+from ..processing.page_scheduler import PageScheduler
+from ..processing.page_triage import OCR_LAYER, PageTriage
+from ..utils.cache import PageCache, ResultCache
 from ..utils.config import Config
-from ..utils.logger import setup_logger
+from ..utils.logger import correlation_id, get_correlation_id, setup_logger
 from ..utils.helpers import save_audit_log
+from ..utils.metrics import collect_stages, current_timings, get_metrics, stage_timer
 
 logger = setup_logger(__name__)
 
+# Page entries that can show or carry the original page content but are not redacted
+UNREDACTED_PAGE_KEYS = ("/Annots", "/Thumb", "/PieceInfo", "/Metadata")
+
 class DocumentProcessor:
     def __init__(self):
         self.logger = setup_logger(__name__)
@@ -22,9 +36,20 @@ class DocumentProcessor:
         self.visual_detector = VisualDetector()
         self.pdf_handler = PDFHandler()
         self.image_processor = ImageProcessor()
+        self.vector_redactor = VectorRedactor()
+        self.page_triage = PageTriage()
+        self.page_scheduler = PageScheduler(workers=Config.PAGE_WORKERS, lookahead=Config.PDF_PAGE_WINDOW)
+        self.result_cache = ResultCache() if Config.RESULT_CACHE_ENABLED else None
+        self.page_cache = PageCache() if Config.PAGE_CACHE_ENABLED else None
     
-    def process_document(self, input_path: Path, output_path: Path = None) -> Dict:
-        """Process a document and redact PII"""
+    def process_document(self, input_path: Path, output_path: Path = None, text_pii: Dict = None,
+                         progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Process a document and redact PII
+        
+        ``text_pii`` can carry text PII already detected for a PDF's text layer,
+        e.g. by ``detect_text_pii_batch``. ``progress`` is called with
+        ``(pages_done, page_count)`` as redacted pages are written.
+        """
         if not input_path.exists():
             raise FileNotFoundError(f"Input file not found: {input_path}")
         
@@ -34,93 +59,537 @@ class DocumentProcessor:
         
         # Process based on file type
         file_extension = input_path.suffix.lower()
+        if file_extension != '.pdf' and file_extension not in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
+            raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        # Log lines and the audit log of this document share one correlation id
+        with correlation_id(), collect_stages():
+            try:
+                result = self._process_document(input_path, output_path, file_extension, text_pii, progress)
+            except Exception:
+                get_metrics().inc("redaction_documents_processed_total", status="failed")
+                raise
+        get_metrics().inc("redaction_documents_processed_total", status="done")
+        return result
+    
+    def _process_document(self, input_path: Path, output_path: Path, file_extension: str,
+                          text_pii: Optional[Dict], progress: Optional[Callable[[int, int], None]]) -> Dict:
+        # Re-submitted documents are served from the result cache
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.key_for(input_path)
+            cached = self.result_cache.get(cache_key, input_path, output_path)
+            if cached is not None:
+                self.logger.info(f"Result cache hit for {input_path}")
+                self._save_audit_log(cached, output_path)
+                if progress is not None:
+                    page_count = len(cached.get("page_triage", ())) or 1
+                    progress(page_count, page_count)
+                return cached
         
         if file_extension == '.pdf':
-            return self._process_pdf(input_path, output_path)
-        elif file_extension in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-            return self._process_image(input_path, output_path)
+            result = self._process_pdf(input_path, output_path, text_pii=text_pii, progress=progress)
         else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+            result = self._process_image(input_path, output_path)
+            if progress is not None:
+                progress(1, 1)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, output_path, result)
+        
+        return result
+    
+    def detect_text_pii_batch(self, input_paths: List[Path]) -> Dict[Path, Dict]:
+        """Detect text PII for the text layers of several PDFs in one spaCy pipe stream
+        
+        Documents that need OCR (images, PDFs with scanned pages) are left out
+        and get their text PII detected while they are processed.
+        """
+        texts = {}
+        for input_path in input_paths:
+            if input_path.suffix.lower() == '.pdf' and input_path.exists():
+                page_texts = self.pdf_handler.extract_page_texts(input_path)
+                triage = self.page_triage.classify(input_path, page_texts)
+                if any(text.strip() for text in page_texts) and not any(page["ocr"] for page in triage):
+                    texts[input_path] = "\n".join(page_texts)
+        
+        results = self.pii_detector.detect_pii_hybrid_batch(list(texts.values()))
+        return dict(zip(texts.keys(), results))
+    
+    def close(self) -> None:
+        """Stop the page worker pool"""
+        self.page_scheduler.shutdown()
     
-    def _process_pdf(self, pdf_path: Path, output_path: Path) -> Dict:
+    def _process_pdf(self, pdf_path: Path, output_path: Path, text_pii: Dict = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict:
         """Process a PDF document"""
         self.logger.info(f"Processing PDF: {pdf_path}")
         
-        # Extract text for PII detection
-        text = self.pdf_handler.extract_text_from_pdf(pdf_path)
+        # Extract the text layer of each page for PII detection
+        with stage_timer("text_extraction"):
+            page_texts = self.pdf_handler.extract_page_texts(pdf_path)
+            page_count = len(page_texts) or self.pdf_handler.get_page_count(pdf_path)
         
-        # Detect PII in text
-        pii_results = self.pii_detector.detect_pii_hybrid(text)
+        if len(page_texts) < page_count:
+            page_texts = [""] * page_count
         
-        # Convert PDF to images for visual detection
-        images = self.pdf_handler.convert_pdf_to_images(pdf_path)
+        # Only scanned pages get their text from OCR of the rasterized page
+        with stage_timer("triage"):
+            triage = self.page_triage.classify(pdf_path, page_texts)
+        ocr_pages = {page["page"] for page in triage if page["ocr"]}
+        self.logger.info(f"Page triage: {len(ocr_pages)}/{page_count} pages need OCR")
         
-        # Process each page
-        redacted_images = []
-        visual_pii = []
+        if self._use_vector_redaction(page_texts, ocr_pages):
+            return self._process_pdf_vector(pdf_path, output_path, page_texts, triage, text_pii=text_pii, progress=progress)
+        
+        # Scanned pages are rasterized once: the OCR pass spools its images for the render pass
+        with tempfile.TemporaryDirectory(prefix="redaction-pages-") as spool_dir:
+            return self._process_pdf_raster(pdf_path, output_path, page_texts, triage, ocr_pages, Path(spool_dir),
+                                            text_pii=text_pii, progress=progress)
+    
+    def _process_pdf_raster(self, pdf_path: Path, output_path: Path, page_texts: List[str],
+                            triage: List[Dict], ocr_pages: Set[int], spool_dir: Path, text_pii: Dict = None,
+                            progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Process a PDF document by redacting rasterized pages
+        
+        Text PII is detected before any page is rendered, so each page is
+        rasterized for redaction once with both its visual and text PII blacked
+        out. Pages whose content is unchanged since an earlier run are stitched
+        from the page cache, unless they were not checked for every value to
+        redact in this run.
+        """
+        page_count = len(page_texts)
+        page_keys, cached_pages = self._cached_page_results(pdf_path, page_count)
+        fresh_pages = [n for n in range(1, page_count + 1) if n not in cached_pages]
+        if cached_pages:
+            self.logger.info(f"Reusing {len(cached_pages)}/{page_count} pages from the page cache")
+        
+        # OCR the new scanned pages first (in the page workers); their OCR page is kept for redaction
+        page_results = {}
+        self._load_page_texts(pdf_path, page_texts, ocr_pages, fresh_pages, page_results, spool_dir)
+        
+        # Detect PII in the text of the new pages; NER runs per page
+        if text_pii is None:
+            tier_usages = self._detect_page_entities(page_results, fresh_pages)
+            text = "\n".join(page_results[n]["text"] for n in fresh_pages)
+            spans = self.pii_detector.detect_pii_spans(
+                text,
+                spacy_results=self._merge_page_entities(page_results, "spacy"),
+                transformer_results=self._merge_page_entities(page_results, "transformer")
+            )
+            pii_results = spans_to_results(text, spans)
+            detection_tiers = tier_report(len(text), tier_usages)
+        else:
+            spans = detection_tiers = None
+            pii_results = {pii_type: list(entries) for pii_type, entries in text_pii.items()}
+        
+        # Values redacted on cached pages are redacted wherever they occur on the other pages,
+        # and cached pages that were not checked for every value are processed again
+        cached_digests = {digest: pii_type for result in cached_pages.values() for pii_type, digest in result["pii"]}
+        new_pages = fresh_pages
+        while True:
+            if cached_digests:
+                self._add_cached_values(pii_results, page_results, new_pages, cached_digests)
+            values = self._text_redaction_values(pii_results)
+            digests = {self.page_cache.digest(value) for value in values} if page_keys else set()
+            new_pages = [n for n in sorted(cached_pages) if not digests <= set(cached_pages[n]["checked"])]
+            if not new_pages:
+                break
+            self.logger.info(f"Processing {len(new_pages)} cached pages again for values they were not checked for")
+            for page_number in new_pages:
+                page_results[page_number] = {"visual": cached_pages.pop(page_number)["visual"]}
+            self._load_page_texts(pdf_path, page_texts, ocr_pages, new_pages, page_results, spool_dir)
+        
+        render_pages = sorted(page_results)
+        for page_number in render_pages:
+            result = page_results[page_number]
+            result["redacted_values"] = remaining_values(result["text"], values)
+        
+        # Locate text PII on born-digital pages in their text layer; values the layer
+        # cannot place are located by OCR while the page is rendered
+        text_areas, ocr_values = self._text_layer_areas(pdf_path, page_results, render_pages)
+        
+        # Stream the pages through rasterize -> detect -> redact -> write. Rasterization runs
+        # in the page workers, visual detection and redaction run here in page batches.
+        on_page = (lambda pages_done: progress(pages_done, page_count)) if progress is not None else None
+        writer = PDFPageWriter(output_path, resolution=Config.PDF_DPI, on_page=on_page)
+        next_page = 1
         
-        for i, image in enumerate(images):
-            self.logger.info(f"Processing page {i+1}/{len(images)}")
+        pages = self.page_scheduler.iter_pages(pdf_path, render_pages, Config.PDF_DPI,
+                                               ocr_pages=set(ocr_values), spool_dir=spool_dir)
+        for batch in self._batched(pages, Config.VISUAL_BATCH_SIZE):
+            # Detect visual PII (signatures, logos) on the in-memory pages in batches
+            unseen = [(page_number, image) for page_number, image, _ in batch if "visual" not in page_results[page_number]]
+            detections = self.visual_detector.detect([image for _, image in unseen])
+            for (page_number, _), detection in zip(unseen, detections):
+                page_results[page_number]["visual"] = detection
             
-            # Detect visual PII (signatures, logos)
-            temp_image_path = Config.OUTPUT_DIR / f"temp_page_{i}.png"
-            image.save(temp_image_path)
+            for page_number, _, ocr_page in batch:
+                result = page_results[page_number]
+                if "ocr" in result:
+                    text_areas[page_number] = OCRPage.from_dict(result["ocr"]).find(result["redacted_values"])
+                elif ocr_page is not None:
+                    text_areas.setdefault(page_number, []).extend(ocr_page.find(ocr_values[page_number]))
             
-            signatures = self.visual_detector.detect_signatures(temp_image_path)
-            logos = self.visual_detector.detect_logos(temp_image_path)
+            redacted_pages = [
+                self.page_scheduler.redact(
+                    image,
+                    self._redaction_areas(page_results[page_number]["visual"]),
+                    self.page_cache.image_path(page_keys[page_number - 1]) if page_keys else None,
+                    text_areas=text_areas.get(page_number, [])
+                )
+                for page_number, image, _ in batch
+            ]
             
-            # Redact visual PII
-            redaction_areas = [(x1, y1, x2, y2) for x1, y1, x2, y2, conf in signatures + logos]
-            redacted_image = self.visual_detector.redact_areas(image, redaction_areas)
+            for (page_number, _, _), redacted in zip(batch, redacted_pages):
+                self.logger.info(f"Processing page {page_number}/{page_count}")
+                
+                # Append the redacted page to the output PDF, in page order
+                next_page = self._write_cached_pages(writer, page_keys, cached_pages, next_page, page_number)
+                writer.add_page(redacted)
+                next_page = page_number + 1
+        
+        self._write_cached_pages(writer, page_keys, cached_pages, next_page, page_count + 1)
+        get_metrics().inc("redaction_pages_processed_total", writer.page_count)
+        
+        visual_pii = []
+        for page_number in range(1, page_count + 1):
+            result = page_results.get(page_number) or cached_pages[page_number]
+            if "visual" in result:
+                visual_pii.extend(self._visual_audit_entries(result["visual"], page=page_number))
+        
+        # Cache entries keep what is needed to reuse the page, not its text or PII values
+        if page_keys:
+            value_types = {str(value).strip(): pii_type
+                           for pii_type, entries in pii_results.items() for value, _, _ in entries}
+            checked = sorted(digests)
+            for page_number in render_pages:
+                result = page_results[page_number]
+                self.page_cache.put(page_keys[page_number - 1], {
+                    "visual": result["visual"],
+                    "pii": [[value_types[value], self.page_cache.digest(value)] for value in result["redacted_values"]],
+                    "checked": checked,
+                })
+            self.page_cache.evict()
+        
+        # Prepare audit log data
+        audit_data = {
+            "document": str(pdf_path),
+            "text_pii": pii_results,
+            "visual_pii": visual_pii,
+            "page_triage": triage,
+            "timestamp": datetime.now().isoformat(),
+            "redacted_output": str(output_path)
+        }
+        
+        if spans is not None:
+            audit_data["pii_spans"] = [span.to_list() for span in spans]
+            audit_data["detection_tiers"] = detection_tiers
+        
+        if cached_pages:
+            pii_types = Counter(pii_type for result in cached_pages.values() for pii_type, _ in result["pii"])
+            audit_data["page_cache"] = {"pages": sorted(cached_pages), "pii_types": dict(pii_types)}
+        
+        # Save audit log
+        self._save_audit_log(audit_data, output_path)
+        
+        self.logger.info(f"Processing complete. Output: {output_path}")
+        return audit_data
+    
+    def _process_pdf_vector(self, pdf_path: Path, output_path: Path, page_texts: List[str],
+                            triage: List[Dict], text_pii: Dict = None,
+                            progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Process a born-digital PDF by redacting its content streams
+        
+        Text PII is removed from the text layer and covered with vector boxes,
+        so unaffected text stays selectable and the output stays small. Only
+        pages that cannot be handled this way are rasterized: pages with
+        unsupported fonts, pages where redaction could not be verified, and
+        pages with detected signatures or logos.
+        """
+        self.logger.info(f"Processing PDF with vector redaction: {pdf_path}")
+        
+        reader = PyPDF2.PdfReader(str(pdf_path))
+        page_count = len(reader.pages)
+        
+        # Detect PII in text; NER runs per page, regex and context over the whole document
+        if text_pii is None:
+            page_results = {n: {"text": text} for n, text in enumerate(page_texts, start=1)}
+            tier_usages = self._detect_page_entities(page_results, list(page_results))
+            text = "\n".join(page_texts)
+            spans = self.pii_detector.detect_pii_spans(
+                text,
+                spacy_results=self._merge_page_entities(page_results, "spacy"),
+                transformer_results=self._merge_page_entities(page_results, "transformer")
+            )
+            pii_results = spans_to_results(text, spans)
+            detection_tiers = tier_report(len(text), tier_usages)
+        else:
+            spans = detection_tiers = None
+            pii_results = text_pii
+        values = self._text_redaction_values(pii_results)
+        
+        # Pages whose text layer is OCR over a scan carry the same PII in their image
+        ocr_layer_pages = {page["page"] for page in triage if page["kind"] == OCR_LAYER}
+        
+        # Redact each page's content stream and check the result by re-extracting its text
+        layers = {}
+        vector_streams = {}
+        raster_pages = set()
+        for page_number, page in enumerate(reader.pages, start=1):
+            try:
+                with stage_timer("redact_vector"):
+                    layer = PageTextLayer(page, reader)
+                    stream, boxes = self.vector_redactor.redact(layer, values)
+            except Exception as e:
+                self.logger.info(f"Page {page_number} falls back to raster redaction: {e}")
+                raster_pages.add(page_number)
+                continue
             
-            redacted_images.append(redacted_image)
+            layers[page_number] = layer
+            if page_number in ocr_layer_pages or layer.overlaps_images(boxes):
+                # A box drawn over an image hides it, but the image XObject still holds the PII
+                self.logger.info(f"Page {page_number} has text PII over an image, rasterizing it")
+                raster_pages.add(page_number)
+                continue
+            if stream is not None:
+                page[PyPDF2.generic.NameObject("/Contents")] = stream
             
-            # Record visual PII for audit log
-            for x1, y1, x2, y2, conf in signatures:
-                visual_pii.append({
-                    "type": "signature",
-                    "page": i + 1,
-                    "bbox": [x1, y1, x2, y2],
-                    "confidence": conf
-                })
+            # Check every page, not only the rewritten ones: a value the interpreter could not
+            # locate leaves the content stream unchanged
+            remaining = remaining_values(page.extract_text() or "", values) if values else []
+            if remaining:
+                self.logger.warning(f"Vector redaction left {len(remaining)} values on page {page_number}, rasterizing it")
+                raster_pages.add(page_number)
+            elif stream is not None:
+                vector_streams[page_number] = stream
+        
+        # Pages with images are rasterized for visual detection, if it is on; pages with hits are redacted as images
+        visual_pages = set(raster_pages)
+        if Config.ENABLE_VISUAL_DETECTION:
+            visual_pages.update(n for n, layer in layers.items() if layer.has_images)
+        raster_output = {}
+        visual_pii = []
+        
+        pages = self.page_scheduler.iter_pages(pdf_path, sorted(visual_pages), Config.PDF_DPI)
+        for batch in self._batched(pages, Config.VISUAL_BATCH_SIZE):
+            detections = self.visual_detector.detect([image for _, image, _ in batch])
             
-            for x1, y1, x2, y2, conf in logos:
-                visual_pii.append({
-                    "type": "logo",
-                    "page": i + 1,
-                    "bbox": [x1, y1, x2, y2],
-                    "confidence": conf
-                })
+            for (page_number, image, _), detection in zip(batch, detections):
+                visual_pii.extend(self._visual_audit_entries(detection, page=page_number))
+                areas = self._redaction_areas(detection)
+                if not areas and page_number not in raster_pages:
+                    continue
+                
+                raster_pages.add(page_number)
+                if page_number in layers:
+                    page_values = remaining_values(page_texts[page_number - 1], values)
+                    text_areas, missing = self._layer_text_areas(layers[page_number], page_values)
+                else:
+                    text_areas, missing = [], values
+                if missing:
+                    # Values the text layer cannot place are located by OCR of the page image
+                    text_areas += self.pdf_handler.ocr_page(image, dpi=Config.PDF_DPI).find(missing)
+                redacted = self.page_scheduler.redact(image, areas, text_areas=text_areas)
+                raster_output[page_number] = self.pdf_handler.image_to_pdf_page(redacted, Config.PDF_DPI)
+        
+        writer = PyPDF2.PdfWriter()
+        stripped_pages = []
+        for page_number, page in enumerate(reader.pages, start=1):
+            if page_number in raster_output:
+                writer.add_page(raster_output[page_number])
+                if progress is not None:
+                    progress(page_number, page_count)
+                continue
+            if page_number in raster_pages:
+                # Rasterization failed, so the page cannot be written without leaking PII
+                raise RuntimeError(f"Could not redact page {page_number} of {pdf_path}")
             
-            # Clean up temp file
-            temp_image_path.unlink(missing_ok=True)
-        
-        # Save redacted PDF
-        if redacted_images:
-            redacted_images[0].save(
-                output_path, 
-                save_all=True, 
-                append_images=redacted_images[1:],
-                format="PDF"
-            )
+            # Annotations (form field values, links, notes), thumbnails, private application
+            # data and page metadata are not redacted, so they are dropped before the page
+            # is copied along with the objects it references
+            dropped = [key for key in UNREDACTED_PAGE_KEYS if key in page]
+            for key in dropped:
+                del page[PyPDF2.generic.NameObject(key)]
+            if dropped:
+                stripped_pages.append(page_number)
+            if page_number in vector_streams:
+                # add_page stores the new content stream as an object of the output file
+                page[PyPDF2.generic.NameObject("/Contents")] = vector_streams[page_number].flate_encode()
+            writer.add_page(page)
+            if progress is not None:
+                progress(page_number, page_count)
+        
+        if stripped_pages:
+            self.logger.info(f"Removed annotations, thumbnails and page metadata from pages {stripped_pages}")
+        
+        with stage_timer("write"), open(output_path, 'wb') as f:
+            writer.write(f)
+        get_metrics().inc("redaction_pages_processed_total", page_count)
         
         # Prepare audit log data
         audit_data = {
             "document": str(pdf_path),
             "text_pii": pii_results,
             "visual_pii": visual_pii,
+            "redaction_mode": "vector",
+            "vector_pages": [n for n in range(1, page_count + 1) if n not in raster_pages],
+            "raster_pages": sorted(raster_pages),
+            "page_triage": triage,
             "timestamp": datetime.now().isoformat(),
             "redacted_output": str(output_path)
         }
         
+        if spans is not None:
+            audit_data["pii_spans"] = [span.to_list() for span in spans]
+            audit_data["detection_tiers"] = detection_tiers
+        
         # Save audit log
-        audit_log_path = output_path.with_suffix('.json')
-        with open(audit_log_path, 'w') as f:
-            json.dump(audit_data, f, indent=2)
+        self._save_audit_log(audit_data, output_path)
         
         self.logger.info(f"Processing complete. Output: {output_path}")
         return audit_data
     
+    def _use_vector_redaction(self, page_texts: List[str], ocr_pages: Set[int]) -> bool:
+        """Whether a PDF goes through the vector redaction path
+        
+        In auto mode that is any PDF with a text layer and no scanned pages,
+        since scanned pages need OCR of the rasterized page.
+        """
+        mode = Config.PDF_REDACTION_MODE
+        if mode == "vector":
+            return bool(page_texts)
+        if mode == "raster":
+            return False
+        return not ocr_pages and any(text.strip() for text in page_texts)
+    
+    def _text_redaction_values(self, pii_results: Dict) -> List[str]:
+        """Distinct PII values to remove from a text layer, longest first"""
+        values = set()
+        for pii_type, entries in pii_results.items():
+            if Config.TEXT_REDACTION_TYPES is not None and pii_type not in Config.TEXT_REDACTION_TYPES:
+                continue
+            for value, _, confidence in entries:
+                value = str(value).strip()
+                if confidence > 0 and len(value) >= Config.TEXT_REDACTION_MIN_CHARS:
+                    values.add(value)
+        return sorted(values, key=lambda value: (-len(value), value))
+    
+    def _cached_page_results(self, pdf_path: Path, page_count: int) -> Tuple[List[str], Dict[int, Dict]]:
+        """Page cache keys of a PDF and the cache entries of its unchanged pages"""
+        if self.page_cache is None:
+            return [], {}
+        
+        try:
+            page_keys = self.page_cache.keys_for(self.pdf_handler.page_fingerprints(pdf_path))
+        except Exception as e:
+            self.logger.warning(f"Could not fingerprint pages, page cache disabled for {pdf_path}: {e}")
+            return [], {}
+        if len(page_keys) != page_count:
+            return [], {}
+        
+        page_results = {}
+        for page_number, key in enumerate(page_keys, start=1):
+            result = self.page_cache.get(key)
+            if result is not None:
+                page_results[page_number] = result
+        return page_keys, page_results
+    
+    def _load_page_texts(self, pdf_path: Path, page_texts: List[str], ocr_pages: Set[int],
+                         page_numbers: List[int], page_results: Dict[int, Dict], spool_dir: Path) -> None:
+        """Add the text of the given pages to ``page_results``, keeping the OCR page of scanned pages"""
+        ocr_numbers = [n for n in page_numbers if n in ocr_pages]
+        for page_number, ocr_page in self.page_scheduler.iter_ocr_pages(pdf_path, ocr_numbers, Config.PDF_DPI, spool_dir):
+            page_results.setdefault(page_number, {}).update(text=ocr_page.text, ocr=ocr_page.to_dict())
+        for page_number in page_numbers:
+            if page_number not in ocr_pages:
+                page_results.setdefault(page_number, {})["text"] = page_texts[page_number - 1]
+    
+    def _add_cached_values(self, pii_results: Dict, page_results: Dict[int, Dict], page_numbers: List[int],
+                           cached_digests: Dict[str, str]) -> None:
+        """Add the values redacted on cached pages that occur on the given pages to ``pii_results``"""
+        for page_number in page_numbers:
+            for value, pii_type in self.page_cache.find_values(page_results[page_number]["text"], cached_digests):
+                entries = pii_results.setdefault(pii_type, [])
+                if all(str(entry[0]).strip() != value for entry in entries):
+                    entries.append((value, "page_cache", 1.0))
+    
+    def _write_cached_pages(self, writer: PDFPageWriter, page_keys: List[str],
+                            cached_pages: Set[int], first_page: int, stop_page: int) -> int:
+        """Append cached redacted pages ``first_page`` up to ``stop_page`` (exclusive)"""
+        for page_number in range(first_page, stop_page):
+            if page_keys and page_number in cached_pages:
+                writer.add_page(self.page_cache.load_image(page_keys[page_number - 1]))
+        return stop_page
+    
+    def _text_layer_areas(self, pdf_path: Path, page_results: Dict[int, Dict],
+                          page_numbers: List[int]) -> Tuple[Dict[int, List], Dict[int, List[str]]]:
+        """Pixel areas of the text PII on born-digital pages, located in the PDF text layer
+        
+        Also returns, per page, the values the text layer could not locate (all
+        of them when it cannot be interpreted), which are located by OCR instead.
+        """
+        text_areas = {}
+        ocr_values = {}
+        pages = [n for n in page_numbers if page_results[n]["redacted_values"] and "ocr" not in page_results[n]]
+        if not pages:
+            return text_areas, ocr_values
+        
+        reader = PyPDF2.PdfReader(str(pdf_path))
+        for page_number in pages:
+            values = page_results[page_number]["redacted_values"]
+            try:
+                layer = PageTextLayer(reader.pages[page_number - 1], reader)
+            except Exception as e:
+                self.logger.info(f"Locating text PII on page {page_number} by OCR: {e}")
+                ocr_values[page_number] = values
+                continue
+            
+            text_areas[page_number], missing = self._layer_text_areas(layer, values)
+            if missing:
+                self.logger.info(f"Locating {len(missing)} values on page {page_number} by OCR")
+                ocr_values[page_number] = missing
+        return text_areas, ocr_values
+    
+    @staticmethod
+    def _layer_text_areas(layer: PageTextLayer, values: List[str]) -> Tuple[List, List[str]]:
+        """Pixel areas of values located in a page's text layer, and the values it could not locate"""
+        areas = []
+        missing = []
+        for value in values:
+            occurrences = layer.find([value])
+            if not occurrences:
+                missing.append(value)
+            for refs in occurrences:
+                for x0, y0, x1, y1 in to_pixel_boxes(layer.page, layer.glyph_bbox(refs), Config.PDF_DPI):
+                    areas.append((value, (x0, y0, x1 - x0, y1 - y0)))
+        return areas, missing
+    
+    def _detect_page_entities(self, page_results: Dict[int, Dict], page_numbers: List[int]) -> List[Dict[str, int]]:
+        """Run NER on the given pages, sharing one spaCy stream across them
+        
+        Returns the characters each detection tier saw on every page.
+        """
+        page_numbers = [n for n in page_numbers if n in page_results]
+        texts = [page_results[n]["text"] for n in page_numbers]
+        
+        results = self.pii_detector.detect_entities_batch(texts)
+        for page_number, entities in zip(page_numbers, results):
+            page_results[page_number]["entities"] = {
+                "spacy": entities["spacy"],
+                "transformer": entities["transformer"],
+            }
+        return [entities["tiers"] for entities in results]
+    
+    @staticmethod
+    def _merge_page_entities(page_results: Dict[int, Dict], source: str) -> Dict[str, List]:
+        """Combine per-page NER results of one detector into document-level results"""
+        merged = {}
+        for page_number in sorted(page_results):
+            for label, entities in page_results[page_number].get("entities", {}).get(source, {}).items():
+                merged.setdefault(label, []).extend(entities)
+        return merged
+    
     def _process_image(self, image_path: Path, output_path: Path) -> Dict:
         """Process an image document"""
         self.logger.info(f"Processing image: {image_path}")
@@ -128,38 +597,32 @@ class DocumentProcessor:
         # Open image
         image = Image.open(image_path)
         
-        # Extract text for PII detection
-        text = self.pdf_handler.extract_text_from_image(image)
+        # One OCR pass gives the text for PII detection and the word boxes for redaction
+        ocr_page = self.pdf_handler.ocr_page(image)
         
         # Detect PII in text
-        pii_results = self.pii_detector.detect_pii_hybrid(text)
+        entities = self.pii_detector.detect_entities_batch([ocr_page.text])[0]
+        spans = self.pii_detector.detect_pii_spans(ocr_page.text, entities["spacy"], entities["transformer"])
+        pii_results = spans_to_results(ocr_page.text, spans)
+        detection_tiers = tier_report(len(ocr_page.text), [entities["tiers"]])
         
         # Detect visual PII
-        signatures = self.visual_detector.detect_signatures(image_path)
-        logos = self.visual_detector.detect_logos(image_path)
+        detection = self.visual_detector.detect(image)[0]
         
-        # Redact visual PII
-        redaction_areas = [(x1, y1, x2, y2) for x1, y1, x2, y2, conf in signatures + logos]
-        redacted_image = self.visual_detector.redact_areas(image, redaction_areas)
+        # Redact visual and text PII
+        redacted_image = self.visual_detector.redact_areas(image, self._redaction_areas(detection))
+        redacted_image = self.image_processor.redact_text_areas(
+            redacted_image,
+            ocr_page.find(self._text_redaction_values(pii_results))
+        )
         
         # Save redacted image
-        redacted_image.save(output_path)
+        with stage_timer("write"):
+            redacted_image.save(output_path)
+        get_metrics().inc("redaction_pages_processed_total")
         
         # Prepare visual PII data for audit log
-        visual_pii = []
-        for x1, y1, x2, y2, conf in signatures:
-            visual_pii.append({
-                "type": "signature",
-                "bbox": [x1, y1, x2, y2],
-                "confidence": conf
-            })
-        
-        for x1, y1, x2, y2, conf in logos:
-            visual_pii.append({
-                "type": "logo",
-                "bbox": [x1, y1, x2, y2],
-                "confidence": conf
-            })
+        visual_pii = self._visual_audit_entries(detection)
         
         # Prepare audit log data
         audit_data = {
@@ -167,13 +630,54 @@ class DocumentProcessor:
             "text_pii": pii_results,
             "visual_pii": visual_pii,
             "timestamp": datetime.now().isoformat(),
-            "redacted_output": str(output_path)
+            "redacted_output": str(output_path),
+            "pii_spans": [span.to_list() for span in spans],
+            "detection_tiers": detection_tiers
         }
         
         # Save audit log
+        self._save_audit_log(audit_data, output_path)
+        
+        self.logger.info(f"Processing complete. Output: {output_path}")
+        return audit_data
+    
+    def _save_audit_log(self, audit_data: Dict, output_path: Path) -> None:
+        """Write the audit log next to the redacted output, with the stage timings so far"""
+        if get_correlation_id() is not None:
+            audit_data["correlation_id"] = get_correlation_id()
+        timings = current_timings()
+        if timings is not None and timings.durations:
+            audit_data["timings"] = timings.summary()
+        else:
+            # A result cache hit must not report the timings of the run that produced it
+            audit_data.pop("timings", None)
         audit_log_path = output_path.with_suffix('.json')
         with open(audit_log_path, 'w') as f:
             json.dump(audit_data, f, indent=2)
-        
-        self.logger.info(f"Processing complete. Output: {output_path}")
-        return audit_data
\ No newline at end of file
+    
+    def _redaction_areas(self, detection: Dict) -> List[Tuple[int, int, int, int]]:
+        """Boxes of a visual detection that should be blacked out"""
+        return [(x1, y1, x2, y2) for x1, y1, x2, y2, conf in detection["signature"] + detection["logo"]]
+    
+    def _visual_audit_entries(self, detection: Dict, page: int = None) -> List[Dict]:
+        """Audit log entries for the signatures and logos of a visual detection"""
+        entries = []
+        for visual_type in ("signature", "logo"):
+            for x1, y1, x2, y2, conf in detection[visual_type]:
+                entry = {"type": visual_type}
+                if page is not None:
+                    entry["page"] = page
+                entry["bbox"] = [x1, y1, x2, y2]
+                entry["confidence"] = conf
+                entries.append(entry)
+        return entries
+    
+    @staticmethod
+    def _batched(items: Iterable, size: int) -> Iterator[List]:
+        """Group an iterable into lists of at most ``size`` items"""
+        iterator = iter(items)
+        while True:
+            batch = list(islice(iterator, max(1, size)))
+            if not batch:
+                return
+            yield batch
\ No newline at end of file
@@ -26,6 +26,15 @@ class ImageProcessor:
         
         return image
     
+    def redact_boxes(self, image: Image.Image, boxes: List[Tuple[int, int, int, int]]) -> Image.Image:
+        """Black out ``(x1, y1, x2, y2)`` boxes in an image"""
+        img_array = np.array(image)
+        
+        for (x1, y1, x2, y2) in boxes:
+            cv2.rectangle(img_array, (x1, y1), (x2, y2), (0, 0, 0), -1)
+        
+        return Image.fromarray(img_array)
+    
     def enhance_image_quality(self, image_path: Path) -> Image.Image:
         """Enhance image quality for better OCR results"""
         try:
@@ -0,0 +1,191 @@
+import threading
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from ..processing.word_index import Word, WordBoxIndex
+from ..utils.config import Config
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr is optional, pytesseract is always available as a fallback
+    tesserocr = None
+
+Box = Tuple[int, int, int, int]
+
+
+class OCRWord(NamedTuple):
+    """One recognized word with its ``(x, y, w, h)`` box and Tesseract confidence"""
+    text: str
+    box: Box
+    confidence: float
+    line: int
+
+
+class OCRPage:
+    """Everything one OCR pass produced for a page
+    
+    Holds the recognized words with their boxes, confidences and line
+    numbers, and the page text rebuilt from them (words joined by spaces,
+    lines by newlines) together with the character-to-box index over it.
+    """
+    
+    def __init__(self, words: Sequence[OCRWord]):
+        self.words = list(words)
+        self.index = WordBoxIndex([(word.text, word.box) for word in self.words], [word.line for word in self.words])
+    
+    @classmethod
+    def from_tesseract(cls, data: Dict[str, list]) -> "OCRPage":
+        """Build a page from ``image_to_data`` output (a dict of columns)"""
+        words = []
+        line_ids: Dict[Tuple[int, int, int], int] = {}
+        for i in range(len(data["text"])):
+            text = str(data["text"][i]).strip()
+            confidence = float(data["conf"][i])
+            # Tesseract reports -1 for layout rows (blocks, paragraphs, lines)
+            if not text or confidence < 0:
+                continue
+            line_key = (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+            line = line_ids.setdefault(line_key, len(line_ids))
+            box = (int(data["left"][i]), int(data["top"][i]), int(data["width"][i]), int(data["height"][i]))
+            words.append(OCRWord(text, box, confidence, line))
+        return cls(words)
+    
+    @property
+    def text(self) -> str:
+        return self.index.text
+    
+    @property
+    def lines(self) -> List[Word]:
+        """``(text, (x, y, w, h))`` per line, in reading order"""
+        lines: Dict[int, List[OCRWord]] = {}
+        for word in self.words:
+            lines.setdefault(word.line, []).append(word)
+        
+        result = []
+        for words in lines.values():
+            x0 = min(word.box[0] for word in words)
+            y0 = min(word.box[1] for word in words)
+            x1 = max(word.box[0] + word.box[2] for word in words)
+            y1 = max(word.box[1] + word.box[3] for word in words)
+            result.append((" ".join(word.text for word in words), (x0, y0, x1 - x0, y1 - y0)))
+        return result
+    
+    @property
+    def mean_confidence(self) -> float:
+        if not self.words:
+            return 0.0
+        return sum(word.confidence for word in self.words) / len(self.words)
+    
+    def word_boxes(self, min_confidence: float = 0) -> List[Word]:
+        """``(text, (x, y, w, h))`` of the words at or above a confidence"""
+        return [(word.text, word.box) for word in self.words if word.confidence >= min_confidence]
+    
+    def find(self, values: Sequence[str]) -> List[Word]:
+        """Areas covering every occurrence of the given values in the page text"""
+        return self.index.find(values)
+    
+    def to_dict(self) -> Dict:
+        return {"words": [[word.text, list(word.box), word.confidence, word.line] for word in self.words]}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "OCRPage":
+        return cls([OCRWord(text, tuple(box), confidence, line) for text, box, confidence, line in data["words"]])
+
+
+class PytesseractBackend:
+    """OCR through the tesseract binary; every call starts a new process"""
+    
+    name = "pytesseract"
+    
+    def recognize(self, image: np.ndarray, dpi: int) -> OCRPage:
+        ocr_data = pytesseract.image_to_data(
+            image,
+            lang=Config.TESSERACT_LANG,
+            config=f"--oem {Config.TESSERACT_OEM} --psm {Config.TESSERACT_PSM} --dpi {dpi}",
+            output_type=pytesseract.Output.DICT
+        )
+        return OCRPage.from_tesseract(ocr_data)
+
+
+class TesserocrBackend:
+    """In-process OCR through the Tesseract C++ API
+    
+    Each thread keeps its own engine with the language data loaded once, so
+    pages after the first skip process startup and model loading entirely.
+    """
+    
+    name = "tesserocr"
+    
+    def __init__(self):
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed")
+        self._local = threading.local()
+        # Fail early (e.g. missing traineddata) so the caller can fall back
+        self._engine()
+    
+    def _engine(self):
+        engine = getattr(self._local, "engine", None)
+        if engine is None:
+            kwargs = {"lang": Config.TESSERACT_LANG, "psm": Config.TESSERACT_PSM, "oem": Config.TESSERACT_OEM}
+            if Config.TESSDATA_PATH:
+                kwargs["path"] = Config.TESSDATA_PATH
+            engine = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.engine = engine
+        return engine
+    
+    def recognize(self, image: np.ndarray, dpi: int) -> OCRPage:
+        engine = self._engine()
+        engine.SetImage(Image.fromarray(image))
+        engine.SetSourceResolution(dpi)
+        engine.Recognize()
+        
+        words = []
+        line = -1
+        level = tesserocr.RIL.WORD
+        iterator = engine.GetIterator()
+        for result in tesserocr.iterate_level(iterator, level):
+            if result.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line += 1
+            text = (result.GetUTF8Text(level) or "").strip()
+            if not text:
+                continue
+            x1, y1, x2, y2 = result.BoundingBox(level)
+            words.append(OCRWord(text, (x1, y1, x2 - x1, y2 - y1), float(result.Confidence(level)), max(line, 0)))
+        engine.Clear()
+        return OCRPage(words)
+
+
+OCR_BACKENDS = {
+    "tesserocr": TesserocrBackend,
+    "pytesseract": PytesseractBackend,
+}
+
+_backends: Dict[str, object] = {}
+_backends_lock = threading.Lock()
+
+def get_ocr_backend(name: str = None):
+    """Shared OCR backend for this process
+    
+    ``auto`` prefers the in-process tesserocr engine and falls back to
+    pytesseract when tesserocr is missing or cannot load its language data.
+    """
+    name = (name or Config.OCR_BACKEND).lower()
+    with _backends_lock:
+        if name not in _backends:
+            candidates = ["tesserocr", "pytesseract"] if name == "auto" else [name]
+            for candidate in candidates:
+                try:
+                    _backends[name] = OCR_BACKENDS[candidate]()
+                    break
+                except Exception as e:
+                    logger.warning(f"OCR backend {candidate} unavailable: {e}")
+            else:
+                raise RuntimeError(f"No usable OCR backend for {name}")
+            logger.info(f"Using OCR backend {_backends[name].name}")
+        return _backends[name]
\ No newline at end of file
@@ -0,0 +1,218 @@
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Collection, Deque, Iterator, List, Optional, Tuple
+
+from PIL import Image
+from pdf2image import convert_from_path
+
+from ..processing.image_processor import ImageProcessor
+from ..processing.ocr import OCRPage
+from ..processing.pdf_handler import PDFHandler
+from ..utils.cache import PageCache
+from ..utils.logger import setup_logger
+from ..utils.metrics import collect_stages, record_stages, stage_timer
+
+logger = setup_logger(__name__)
+
+# Per-process helpers used by the worker functions below
+_pdf_handler = None
+_image_processor = None
+
+def _get_pdf_handler() -> PDFHandler:
+    global _pdf_handler
+    if _pdf_handler is None:
+        _pdf_handler = PDFHandler()
+    return _pdf_handler
+
+def _get_image_processor() -> ImageProcessor:
+    global _image_processor
+    if _image_processor is None:
+        _image_processor = ImageProcessor()
+    return _image_processor
+
+def rasterize_page(pdf_path: Path, page_number: int, dpi: int, ocr: bool = False,
+                   spool_dir: Path = None) -> Tuple[Optional[Image.Image], Optional[OCRPage]]:
+    """Rasterize one PDF page and optionally OCR it
+    
+    A page already spooled to ``spool_dir`` by ``ocr_scanned_page`` is loaded from
+    there instead of being rasterized again.
+    """
+    spooled = _spool_path(spool_dir, page_number)
+    if spooled is not None and spooled.exists():
+        with stage_timer("rasterize"), Image.open(spooled) as spooled_image:
+            image = spooled_image.copy()
+    else:
+        with stage_timer("rasterize"):
+            images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+        if not images:
+            return None, None
+        image = images[0]
+    
+    ocr_page = _get_pdf_handler().ocr_page(image, dpi=dpi) if ocr else None
+    return image, ocr_page
+
+def ocr_scanned_page(pdf_path: Path, page_number: int, dpi: int, spool_dir: Path) -> Optional[OCRPage]:
+    """Rasterize and OCR one page, spooling the image to ``spool_dir`` for the render pass
+    
+    Only the OCR result goes back to the parent; the image stays on disk.
+    """
+    image, page = rasterize_page(pdf_path, page_number, dpi, ocr=True)
+    if image is not None:
+        with stage_timer("spool"):
+            image.save(_spool_path(spool_dir, page_number), compress_level=1)
+    return page
+
+def _spool_path(spool_dir: Optional[Path], page_number: int) -> Optional[Path]:
+    return spool_dir / f"page-{page_number}.png" if spool_dir is not None else None
+
+def redact_page(image: Image.Image, areas: List[Tuple[int, int, int, int]],
+                cache_image_path: Path = None,
+                text_areas: List[Tuple[str, Tuple[int, int, int, int]]] = ()) -> Image.Image:
+    """Black out boxes and text areas on a page image, optionally storing it in the page cache"""
+    image_processor = _get_image_processor()
+    with stage_timer("redact"):
+        redacted = image_processor.redact_boxes(image, areas)
+        if text_areas:
+            redacted = image_processor.redact_text_areas(redacted, text_areas)
+    if cache_image_path is not None:
+        try:
+            PageCache.save_image(redacted, cache_image_path)
+        except OSError as e:
+            logger.warning(f"Could not cache redacted page: {e}")
+    return redacted
+
+
+def _timed_task(fn: Callable, *args):
+    """Run a worker task, returning its result with the stage timings measured while it ran"""
+    with collect_stages(forward=False) as timings:
+        result = fn(*args)
+    return result, timings.durations
+
+
+class WorkerResult:
+    """Future for a worker task whose stage timings are recorded when its result is taken
+    
+    ``result()`` runs in the thread processing the document, so the timings
+    land in that document's audit log as well as the process-wide metrics.
+    """
+    
+    def __init__(self, future: Future):
+        self._future = future
+    
+    def result(self):
+        result, durations = self._future.result()
+        record_stages(durations)
+        return result
+
+
+class _InlineExecutor(Executor):
+    """Executor that runs tasks immediately in the calling process"""
+    
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class PageScheduler:
+    """Fan per-page rasterization and OCR out to a process pool
+    
+    Model inference and redaction stay in the parent process; pages are
+    always handed back in page order so the output document is deterministic.
+    """
+    
+    def __init__(self, workers: int = 0, lookahead: int = 4):
+        self.logger = setup_logger(__name__)
+        self.workers = workers
+        self.lookahead = max(1, lookahead)
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def executor(self) -> Executor:
+        # Several API threads may share one scheduler, so the pool is created under a lock
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 1:
+                    # spawn keeps the parent's model state and threads out of the workers
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                    self.logger.info(f"Started page worker pool with {self.workers} processes")
+                else:
+                    self._executor = _InlineExecutor()
+            return self._executor
+    
+    def iter_pages(self, pdf_path: Path, page_numbers: List[int], dpi: int,
+                   ocr_pages: Collection[int] = (),
+                   spool_dir: Path = None) -> Iterator[Tuple[int, Image.Image, Optional[OCRPage]]]:
+        """Yield ``(page_number, image, ocr_page)`` for the given pages, in order
+        
+        Only pages in ``ocr_pages`` are OCRed; the others yield None. Pages
+        spooled to ``spool_dir`` by ``iter_ocr_pages`` are not rasterized
+        again. A page that cannot be rasterized raises.
+        """
+        tasks = ((rasterize_page, pdf_path, n, dpi, n in ocr_pages, spool_dir) for n in page_numbers)
+        for page_number, (image, page) in self._iter_results(page_numbers, tasks):
+            if image is None:
+                raise RuntimeError(f"Page {page_number} of {pdf_path} rendered no image")
+            yield page_number, image, page
+    
+    def iter_ocr_pages(self, pdf_path: Path, page_numbers: List[int], dpi: int,
+                       spool_dir: Path) -> Iterator[Tuple[int, OCRPage]]:
+        """Yield ``(page_number, ocr_page)`` for the given pages, in order
+        
+        The page images are spooled to ``spool_dir``, so a later
+        ``iter_pages`` with the same directory reuses them.
+        """
+        tasks = ((ocr_scanned_page, pdf_path, n, dpi, spool_dir) for n in page_numbers)
+        for page_number, page in self._iter_results(page_numbers, tasks):
+            if page is None:
+                raise RuntimeError(f"Page {page_number} of {pdf_path} rendered no image")
+            yield page_number, page
+    
+    def _iter_results(self, page_numbers: List[int], tasks: Iterator[Tuple]) -> Iterator[Tuple[int, object]]:
+        """Run one worker task per page and yield the results in page order
+        
+        At most ``lookahead`` pages run ahead of the consumer, which keeps
+        memory bounded while the workers stay busy.
+        """
+        pending: Deque[Tuple[int, WorkerResult]] = deque()
+        remaining = deque(zip(page_numbers, tasks))
+        
+        while remaining or pending:
+            while remaining and len(pending) < self.lookahead:
+                page_number, (fn, *args) = remaining.popleft()
+                pending.append((page_number, WorkerResult(self.executor.submit(_timed_task, fn, *args))))
+            
+            page_number, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                # A skipped page would silently be missing from the output, so the document fails
+                self.logger.error(f"Error rasterizing page {page_number}: {e}")
+                raise
+            yield page_number, result
+    
+    def redact(self, image: Image.Image, areas: List[Tuple[int, int, int, int]],
+               cache_image_path: Path = None,
+               text_areas: List[Tuple[str, Tuple[int, int, int, int]]] = ()) -> Image.Image:
+        """Redact a page in this process
+        
+        The image is already here for visual detection; drawing boxes is
+        cheap next to pickling a full-resolution page to a worker and back.
+        """
+        return redact_page(image, areas, cache_image_path, text_areas)
+    
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
\ No newline at end of file
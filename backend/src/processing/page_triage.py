@@ -0,0 +1,130 @@
+from pathlib import Path
+from typing import Dict, List
+
+import PyPDF2
+from PyPDF2.generic import ContentStream
+
+from ..processing.pdf_redactor import IDENTITY, Matrix, multiply, resolve, transform_bbox
+from ..utils.config import Config
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Page kinds; only scanned pages are sent to OCR
+BORN_DIGITAL = "born_digital"
+OCR_LAYER = "ocr_layer"
+SCANNED = "scanned"
+BLANK = "blank"
+
+# Nested form XObjects deeper than this are not inspected for images
+MAX_FORM_DEPTH = 3
+
+
+class PageTriage:
+    """Classify PDF pages as born-digital or scanned without rasterizing them
+    
+    A page is judged on the density of its text layer, whether it uses any
+    fonts, and how much of it is covered by images. Pages with a usable text
+    layer never go through OCR.
+    """
+    
+    def __init__(self, min_text_density: float = None, image_coverage: float = None):
+        self.logger = setup_logger(__name__)
+        self.min_text_density = Config.TRIAGE_MIN_TEXT_DENSITY if min_text_density is None else min_text_density
+        self.image_coverage = Config.TRIAGE_IMAGE_COVERAGE if image_coverage is None else image_coverage
+    
+    def classify(self, pdf_path: Path, page_texts: List[str]) -> List[Dict]:
+        """Triage decision for each page, given the page texts from the text layer"""
+        try:
+            with open(pdf_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                return [
+                    self.classify_page(page, reader, page_texts[i] if i < len(page_texts) else "", i + 1)
+                    for i, page in enumerate(reader.pages)
+                ]
+        except Exception as e:
+            self.logger.error(f"Error triaging PDF pages, treating them as scanned: {e}")
+            return [
+                {"page": n, "kind": SCANNED, "ocr": True}
+                for n in range(1, len(page_texts) + 1)
+            ]
+    
+    def classify_page(self, page: PyPDF2.PageObject, reader: PyPDF2.PdfReader,
+                      text: str, page_number: int) -> Dict:
+        box = page.cropbox
+        area = max(float(box.width) * float(box.height), 1.0)
+        resources = resolve(page.get("/Resources"), {})
+        
+        has_fonts = bool(resolve(resources.get("/Font"), {}))
+        text_chars = sum(1 for char in text if not char.isspace())
+        # Characters per square inch of page
+        text_density = text_chars / (area / 72.0 ** 2)
+        coverage = self._image_coverage(page, reader, resources, area)
+        
+        if has_fonts and text_density >= self.min_text_density:
+            kind = OCR_LAYER if coverage >= self.image_coverage else BORN_DIGITAL
+        elif coverage > 0:
+            kind = SCANNED
+        else:
+            kind = BLANK
+        
+        return {
+            "page": page_number,
+            "kind": kind,
+            "ocr": kind == SCANNED,
+            "text_density": round(text_density, 3),
+            "image_coverage": round(coverage, 3),
+            "has_fonts": has_fonts,
+        }
+    
+    def _image_coverage(self, page: PyPDF2.PageObject, reader: PyPDF2.PdfReader,
+                        resources: Dict, area: float) -> float:
+        """Fraction of the page area covered by painted images"""
+        contents = page.get_contents()
+        if contents is None:
+            return 0.0
+        # Pages without image XObjects or inline images are not parsed
+        if not resolve(resources.get("/XObject"), {}) and b"BI" not in contents.get_data():
+            return 0.0
+        
+        box = page.cropbox
+        left, bottom, right, top = float(box.left), float(box.bottom), float(box.right), float(box.top)
+        covered = 0.0
+        for x0, y0, x1, y1 in self._image_boxes(contents, reader, resources, IDENTITY, 0):
+            # Clip to the visible page; overlapping images may count twice
+            width = min(x1, right) - max(x0, left)
+            height = min(y1, top) - max(y0, bottom)
+            if width > 0 and height > 0:
+                covered += width * height
+        return min(covered / area, 1.0)
+    
+    def _image_boxes(self, contents, reader: PyPDF2.PdfReader, resources: Dict,
+                     matrix: Matrix, depth: int) -> List[tuple]:
+        """User-space boxes of the images drawn by a content stream, following form XObjects"""
+        boxes = []
+        xobjects = resolve(resources.get("/XObject"), {})
+        ctm = matrix
+        stack = []
+        
+        for operands, operator in ContentStream(contents, reader).operations:
+            if operator == b"q":
+                stack.append(ctm)
+            elif operator == b"Q":
+                if stack:
+                    ctm = stack.pop()
+            elif operator == b"cm":
+                ctm = multiply(tuple(float(v) for v in operands), ctm)
+            elif operator == b"INLINE IMAGE":
+                boxes.append(transform_bbox(0.0, 0.0, 1.0, 1.0, ctm))
+            elif operator == b"Do" and str(operands[0]) in xobjects:
+                xobject = xobjects[str(operands[0])].get_object()
+                subtype = xobject.get("/Subtype")
+                if subtype == "/Image":
+                    boxes.append(transform_bbox(0.0, 0.0, 1.0, 1.0, ctm))
+                elif subtype == "/Form" and depth < MAX_FORM_DEPTH:
+                    form_matrix = tuple(float(v) for v in resolve(xobject.get("/Matrix"), IDENTITY))
+                    boxes.extend(self._image_boxes(
+                        xobject, reader, resolve(xobject.get("/Resources"), {}),
+                        multiply(form_matrix, ctm), depth + 1
+                    ))
+        return boxes
\ No newline at end of file
@@ -1,14 +1,18 @@
+import hashlib
+import io
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import pdfinfo_from_path
 from PIL import Image
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 import PyPDF2
 
+from ..processing.ocr import OCRPage, get_ocr_backend
 from ..utils.config import Config
 from ..utils.logger import setup_logger
+from ..utils.metrics import stage_timer
 
 logger = setup_logger(__name__)
 
@@ -16,8 +20,9 @@ logger = setup_logger(__name__)
 pytesseract.pytesseract.tesseract_cmd = Config.TESSERACT_PATH
 
 class PDFHandler:
-    def __init__(self):
+    def __init__(self, ocr_backend: str = None):
         self.logger = setup_logger(__name__)
+        self.ocr_backend = ocr_backend
     
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extract text from PDF using PyPDF2"""
@@ -32,29 +37,72 @@ class PDFHandler:
             self.logger.error(f"Error extracting text from PDF: {e}")
             return ""
     
-    def convert_pdf_to_images(self, pdf_path: Path, dpi: int = 300) -> List[Image.Image]:
-        """Convert PDF to images for OCR processing"""
+    def extract_page_texts(self, pdf_path: Path) -> List[str]:
+        """Extract the text layer of each page using PyPDF2"""
         try:
-            images = convert_from_path(pdf_path, dpi=dpi)
-            return images
+            with open(pdf_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                return [page.extract_text() or "" for page in reader.pages]
         except Exception as e:
-            self.logger.error(f"Error converting PDF to images: {e}")
+            self.logger.error(f"Error extracting page texts from PDF: {e}")
             return []
     
+    def page_fingerprints(self, pdf_path: Path) -> List[str]:
+        """SHA-256 of each page's content and resources, without rasterizing
+        
+        Every page is serialized on its own, so an unchanged page of a revised
+        document keeps its fingerprint.
+        """
+        fingerprints = []
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            for page in reader.pages:
+                writer = PyPDF2.PdfWriter()
+                writer.add_page(page)
+                buffer = io.BytesIO()
+                writer.write(buffer)
+                fingerprints.append(hashlib.sha256(buffer.getvalue()).hexdigest())
+        return fingerprints
+    
+    def get_page_count(self, pdf_path: Path) -> int:
+        """Number of pages in a PDF, without rasterizing it"""
+        try:
+            with open(pdf_path, 'rb') as file:
+                return len(PyPDF2.PdfReader(file).pages)
+        except Exception as e:
+            self.logger.warning(f"PyPDF2 could not count pages, falling back to pdfinfo: {e}")
+            return int(pdfinfo_from_path(pdf_path)["Pages"])
+    
+    def image_to_pdf_page(self, image: Image.Image, resolution: float = 300.0) -> PyPDF2.PageObject:
+        """Wrap a page image in a single-page PDF, for mixing raster pages into a PdfWriter"""
+        if image.mode not in ("RGB", "L", "1", "CMYK"):
+            image = image.convert("RGB")
+        
+        buffer = io.BytesIO()
+        image.save(buffer, format="PDF", resolution=resolution)
+        return PyPDF2.PdfReader(buffer).pages[0]
+    
+    def ocr_page(self, image: Image.Image, dpi: int = None) -> OCRPage:
+        """Run Tesseract once on a page image and return its words, lines, boxes and text
+        
+        The OCR backend is ``Config.OCR_BACKEND`` unless the handler was given
+        one. ``dpi`` is passed to Tesseract as a resolution hint; it defaults to
+        the image's own DPI metadata, then to ``Config.OCR_DPI``.
+        
+        OCR errors are raised: a page that could not be read must not pass
+        as a page without PII.
+        """
+        if dpi is None:
+            dpi = int(image.info.get("dpi", (Config.OCR_DPI,))[0]) or Config.OCR_DPI
+        
+        backend = get_ocr_backend(self.ocr_backend)
+        with stage_timer("ocr"):
+            return backend.recognize(self._preprocess_for_ocr(image), dpi)
+    
     def extract_text_from_image(self, image: Image.Image) -> str:
         """Extract text from image using Tesseract OCR"""
         try:
-            # Convert PIL Image to OpenCV format
-            open_cv_image = np.array(image)
-            open_cv_image = open_cv_image[:, :, ::-1].copy()  # Convert RGB to BGR
-            
-            # Preprocess image for better OCR
-            gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
-            thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-            
-            # Perform OCR
-            text = pytesseract.image_to_string(thresh)
-            return text
+            return self.ocr_page(image).text
         except Exception as e:
             self.logger.error(f"Error extracting text from image: {e}")
             return ""
@@ -62,24 +110,43 @@ class PDFHandler:
     def extract_text_with_coordinates(self, image: Image.Image) -> List[Tuple[str, Tuple[int, int, int, int]]]:
         """Extract text with bounding box coordinates"""
         try:
-            open_cv_image = np.array(image)
-            open_cv_image = open_cv_image[:, :, ::-1].copy()
-            gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
-            thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-            
-            # Get OCR data with bounding boxes
-            ocr_data = pytesseract.image_to_data(thresh, output_type=pytesseract.Output.DICT)
-            
-            text_with_boxes = []
-            n_boxes = len(ocr_data['text'])
-            for i in range(n_boxes):
-                if int(ocr_data['conf'][i]) > 60:  # Confidence threshold
-                    text = ocr_data['text'][i].strip()
-                    if text:
-                        x, y, w, h = ocr_data['left'][i], ocr_data['top'][i], ocr_data['width'][i], ocr_data['height'][i]
-                        text_with_boxes.append((text, (x, y, w, h)))
-            
-            return text_with_boxes
+            return self.ocr_page(image).word_boxes(min_confidence=60)
         except Exception as e:
             self.logger.error(f"Error extracting text with coordinates: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    @staticmethod
+    def _preprocess_for_ocr(image: Image.Image) -> np.ndarray:
+        """Grayscale and Otsu-binarize a page image for Tesseract"""
+        gray = cv2.cvtColor(np.array(image.convert("RGB")), cv2.COLOR_RGB2GRAY)
+        return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+class PDFPageWriter:
+    """Write a PDF one page image at a time
+    
+    Each page is appended to the output file as soon as it is added, so the
+    writer never keeps more than the current page in memory. ``on_page`` is
+    called with the number of pages written after each page.
+    """
+    
+    def __init__(self, output_path: Path, resolution: float = 300.0,
+                 on_page: Optional[Callable[[int], None]] = None):
+        self.output_path = output_path
+        self.resolution = resolution
+        self.on_page = on_page
+        self.page_count = 0
+    
+    def add_page(self, image: Image.Image) -> None:
+        if image.mode not in ("RGB", "L", "1", "CMYK"):
+            image = image.convert("RGB")
+        
+        with stage_timer("write"):
+            image.save(
+                self.output_path,
+                format="PDF",
+                resolution=self.resolution,
+                append=self.page_count > 0
+            )
+        self.page_count += 1
+        if self.on_page is not None:
+            self.on_page(self.page_count)
\ No newline at end of file
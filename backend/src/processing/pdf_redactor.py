@@ -0,0 +1,531 @@
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import PyPDF2
+from PyPDF2.generic import (ArrayObject, ByteStringObject, ContentStream, DecodedStreamObject,
+                            FloatObject, NumberObject)
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+try:
+    from reportlab.pdfbase import pdfmetrics
+except ImportError:  # reportlab only supplies standard-14 widths for fonts without /Widths
+    pdfmetrics = None
+
+Matrix = Tuple[float, float, float, float, float, float]
+BBox = Tuple[float, float, float, float]
+
+IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+# Glyph names from /Differences arrays that are not single characters
+GLYPH_NAMES = {
+    "space": " ", "exclam": "!", "quotedbl": '"', "numbersign": "#", "dollar": "$",
+    "percent": "%", "ampersand": "&", "quotesingle": "'", "parenleft": "(", "parenright": ")",
+    "asterisk": "*", "plus": "+", "comma": ",", "hyphen": "-", "period": ".", "slash": "/",
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "colon": ":", "semicolon": ";", "less": "<",
+    "equal": "=", "greater": ">", "question": "?", "at": "@", "bracketleft": "[",
+    "backslash": "\\", "bracketright": "]", "underscore": "_", "braceleft": "{", "bar": "|",
+    "braceright": "}", "endash": "–", "emdash": "—", "quoteright": "’",
+    "quoteleft": "‘", "quotedblleft": "“", "quotedblright": "”",
+}
+
+SIMPLE_ENCODINGS = {
+    "/WinAnsiEncoding": "cp1252",
+    "/MacRomanEncoding": "mac_roman",
+    "/StandardEncoding": "latin-1",
+}
+
+
+class UnsupportedPageError(Exception):
+    """Raised when a page cannot be redacted at the content-stream level"""
+
+
+def multiply(m1: Matrix, m2: Matrix) -> Matrix:
+    """PDF matrix product ``m1 x m2``"""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+        c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+        e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2,
+    )
+
+
+def transform_bbox(x0: float, y0: float, x1: float, y1: float, m: Matrix) -> BBox:
+    points = [(x, y) for x in (x0, x1) for y in (y0, y1)]
+    xs = [x * m[0] + y * m[2] + m[4] for x, y in points]
+    ys = [x * m[1] + y * m[3] + m[5] for x, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def value_pattern(value: str) -> Optional[re.Pattern]:
+    """Regex for a PII value that tolerates whitespace differences between text extractors"""
+    tokens = value.split()
+    if not tokens:
+        return None
+    pattern = r"\s*".join(re.escape(token) for token in tokens)
+    # Keep short numbers from matching inside longer ones
+    if re.match(r"\w", tokens[0]):
+        pattern = r"(?<!\w)" + pattern
+    if re.search(r"\w$", tokens[-1]):
+        pattern = pattern + r"(?!\w)"
+    return re.compile(pattern)
+
+
+def resolve(obj, default=None):
+    """Follow an indirect reference, with a default for missing entries"""
+    if obj is None:
+        return default
+    return obj.get_object() if hasattr(obj, "get_object") else obj
+
+
+def string_bytes(obj) -> bytes:
+    """Raw bytes of a string operand as it appeared in the content stream"""
+    if isinstance(obj, bytes):
+        return bytes(obj)
+    try:
+        return obj.get_original_bytes()
+    except Exception:
+        return str(obj).encode("latin-1", errors="replace")
+
+
+class FontInfo:
+    """Decoding and metrics of a simple (single-byte) PDF font"""
+    
+    __slots__ = ("widths", "default_width", "ascent", "descent", "to_unicode", "codec", "differences")
+    
+    def __init__(self, font: Dict):
+        subtype = font.get("/Subtype")
+        if subtype in ("/Type0", "/Type3"):
+            raise UnsupportedPageError(f"Unsupported font subtype {subtype}")
+        
+        self.widths: Dict[int, float] = {}
+        first_char = int(resolve(font.get("/FirstChar"), 0))
+        for offset, width in enumerate(resolve(font.get("/Widths"), [])):
+            self.widths[first_char + offset] = float(resolve(width))
+        
+        descriptor = resolve(font.get("/FontDescriptor"), {})
+        self.default_width = float(descriptor.get("/MissingWidth", 0)) or 500.0
+        self.ascent = float(descriptor.get("/Ascent", 0)) or 800.0
+        self.descent = float(descriptor.get("/Descent", 0)) or -200.0
+        
+        self.codec = "latin-1"
+        self.differences: Dict[int, str] = {}
+        encoding = resolve(font.get("/Encoding"))
+        if isinstance(encoding, str):
+            self.codec = SIMPLE_ENCODINGS.get(encoding, "latin-1")
+        elif isinstance(encoding, dict):
+            self.codec = SIMPLE_ENCODINGS.get(encoding.get("/BaseEncoding"), "latin-1")
+            self._read_differences(resolve(encoding.get("/Differences"), []))
+        
+        self.to_unicode: Dict[int, str] = {}
+        if "/ToUnicode" in font:
+            self._read_to_unicode(font["/ToUnicode"].get_object().get_data())
+        
+        base_font = str(font.get("/BaseFont", "")).lstrip("/")
+        if not self.widths and pdfmetrics is not None and base_font in pdfmetrics.standardFonts:
+            for code in range(256):
+                self.widths[code] = pdfmetrics.stringWidth(self.decode(code), base_font, 1000)
+    
+    def decode(self, code: int) -> str:
+        if code in self.to_unicode:
+            return self.to_unicode[code]
+        if code in self.differences:
+            return self.differences[code]
+        return bytes([code]).decode(self.codec, errors="replace")
+    
+    def width(self, code: int) -> float:
+        return self.widths.get(code, self.default_width)
+    
+    def _read_differences(self, differences: Iterable) -> None:
+        code = 0
+        for item in differences:
+            if isinstance(item, (int, float)):
+                code = int(item)
+                continue
+            name = str(item).lstrip("/")
+            if len(name) == 1:
+                self.differences[code] = name
+            elif name in GLYPH_NAMES:
+                self.differences[code] = GLYPH_NAMES[name]
+            elif name.startswith("uni") and len(name) == 7:
+                self.differences[code] = chr(int(name[3:], 16))
+            code += 1
+    
+    def _read_to_unicode(self, data: bytes) -> None:
+        text = data.decode("latin-1")
+        for block in re.findall(r"beginbfchar(.*?)endbfchar", text, re.S):
+            for src, dst in re.findall(r"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>", block):
+                self.to_unicode[int(src, 16)] = self._utf16(dst)
+        for block in re.findall(r"beginbfrange(.*?)endbfrange", text, re.S):
+            # Either "<lo> <hi> <dst>" (consecutive code points) or "<lo> <hi> [<dst> ...]" (one per code)
+            for start, end, dst in re.findall(r"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]+>|\[[^\]]*\])", block):
+                codes = range(int(start, 16), int(end, 16) + 1)
+                if dst.startswith("["):
+                    for code, target in zip(codes, re.findall(r"<([0-9A-Fa-f]+)>", dst)):
+                        self.to_unicode[code] = self._utf16(target)
+                    continue
+                base = int(dst[1:-1], 16)
+                for offset, code in enumerate(codes):
+                    self.to_unicode[code] = chr(base + offset)
+    
+    @staticmethod
+    def _utf16(hex_string: str) -> str:
+        try:
+            return bytes.fromhex(hex_string).decode("utf-16-be")
+        except ValueError:
+            return ""
+
+
+class Glyph:
+    """One shown glyph: its character, where it sits in the content stream and on the page"""
+    
+    __slots__ = ("char", "element", "byte", "advance", "bbox")
+    
+    def __init__(self, char: str, element: int, byte: int, advance: float, bbox: BBox):
+        self.char = char
+        self.element = element
+        self.byte = byte
+        self.advance = advance
+        self.bbox = bbox
+
+
+class TextRun:
+    """The glyphs of one text-showing operator"""
+    
+    __slots__ = ("op_index", "operator", "operands", "font_size", "h_scale", "glyphs")
+    
+    def __init__(self, op_index: int, operator: bytes, operands: list, font_size: float, h_scale: float):
+        self.op_index = op_index
+        self.operator = operator
+        self.operands = operands
+        self.font_size = font_size
+        self.h_scale = h_scale
+        self.glyphs: List[Glyph] = []
+
+
+class PageTextLayer:
+    """Content-stream interpreter that locates every glyph of a page's text layer
+    
+    Only simple fonts are supported; pages with composite (Type0) or Type3
+    fonts, or with text inside form XObjects, raise ``UnsupportedPageError``.
+    """
+    
+    def __init__(self, page: PyPDF2.PageObject, reader: PyPDF2.PdfReader):
+        self.page = page
+        contents = page.get_contents()
+        self.content = ContentStream(contents, reader) if contents is not None else None
+        self.runs: List[TextRun] = []
+        # User-space boxes where images (or forms that may hold images) are painted
+        self.image_boxes: List[BBox] = []
+        self._fonts: Dict[str, FontInfo] = {}
+        
+        self.resources = resolve(page.get("/Resources"), {})
+        if self.content is not None:
+            self._interpret()
+        
+        self.text, self._char_glyphs = self._reconstruct_text()
+    
+    @property
+    def has_images(self) -> bool:
+        return bool(self.image_boxes)
+    
+    def overlaps_images(self, boxes: Iterable[BBox]) -> bool:
+        """Whether any of the boxes touches a painted image
+        
+        Covering such a box with a vector rectangle hides the image pixels
+        but leaves them in the image XObject.
+        """
+        return any(
+            x0 < ix1 and ix0 < x1 and y0 < iy1 and iy0 < y1
+            for x0, y0, x1, y1 in boxes
+            for ix0, iy0, ix1, iy1 in self.image_boxes
+        )
+    
+    def find(self, values: Iterable[str]) -> List[List[Tuple[int, int]]]:
+        """Occurrences of each value as lists of ``(run, glyph)`` references"""
+        occurrences = []
+        for value in values:
+            pattern = value_pattern(value)
+            if pattern is None:
+                continue
+            for match in pattern.finditer(self.text):
+                refs = [ref for ref in self._char_glyphs[match.start():match.end()] if ref is not None]
+                if refs:
+                    occurrences.append(refs)
+        return occurrences
+    
+    def glyph_bbox(self, refs: List[Tuple[int, int]]) -> List[BBox]:
+        """Union of glyph boxes per run, i.e. one box per line segment of an occurrence"""
+        boxes: Dict[int, List[float]] = {}
+        for run_index, glyph_index in refs:
+            x0, y0, x1, y1 = self.runs[run_index].glyphs[glyph_index].bbox
+            box = boxes.setdefault(run_index, [x0, y0, x1, y1])
+            box[0], box[1] = min(box[0], x0), min(box[1], y0)
+            box[2], box[3] = max(box[2], x1), max(box[3], y1)
+        return [tuple(box) for box in boxes.values()]
+    
+    def _font(self, name: str) -> FontInfo:
+        if name not in self._fonts:
+            fonts = resolve(self.resources.get("/Font"), {})
+            if name not in fonts:
+                raise UnsupportedPageError(f"Font {name} not found in page resources")
+            self._fonts[name] = FontInfo(fonts[name].get_object())
+        return self._fonts[name]
+    
+    def _interpret(self) -> None:
+        ctm = IDENTITY
+        tm = tlm = IDENTITY
+        state = {"font": None, "size": 0.0, "tc": 0.0, "tw": 0.0, "th": 1.0, "tl": 0.0, "rise": 0.0}
+        stack = []
+        
+        for op_index, (operands, operator) in enumerate(self.content.operations):
+            if operator == b"q":
+                stack.append((ctm, dict(state)))
+            elif operator == b"Q":
+                if stack:
+                    ctm, state = stack.pop()
+            elif operator == b"cm":
+                ctm = multiply(tuple(float(v) for v in operands), ctm)
+            elif operator == b"BT":
+                tm = tlm = IDENTITY
+            elif operator == b"Tf":
+                state["font"] = self._font(str(operands[0]))
+                state["size"] = float(operands[1])
+            elif operator == b"Tc":
+                state["tc"] = float(operands[0])
+            elif operator == b"Tw":
+                state["tw"] = float(operands[0])
+            elif operator == b"Tz":
+                state["th"] = float(operands[0]) / 100.0
+            elif operator == b"TL":
+                state["tl"] = float(operands[0])
+            elif operator == b"Ts":
+                state["rise"] = float(operands[0])
+            elif operator in (b"Td", b"TD"):
+                tx, ty = float(operands[0]), float(operands[1])
+                if operator == b"TD":
+                    state["tl"] = -ty
+                tm = tlm = multiply((1.0, 0.0, 0.0, 1.0, tx, ty), tlm)
+            elif operator == b"Tm":
+                tm = tlm = tuple(float(v) for v in operands)
+            elif operator == b"T*":
+                tm = tlm = multiply((1.0, 0.0, 0.0, 1.0, 0.0, -state["tl"]), tlm)
+            elif operator in (b"Tj", b"TJ", b"'", b'"'):
+                if operator in (b"'", b'"'):
+                    if operator == b'"':
+                        state["tw"], state["tc"] = float(operands[0]), float(operands[1])
+                    tm = tlm = multiply((1.0, 0.0, 0.0, 1.0, 0.0, -state["tl"]), tlm)
+                tm = self._show(op_index, operator, operands, state, tm, ctm)
+            elif operator == b"Do":
+                self._check_xobject(str(operands[0]), ctm)
+            elif operator == b"INLINE IMAGE":
+                self.image_boxes.append(transform_bbox(0.0, 0.0, 1.0, 1.0, ctm))
+    
+    def _show(self, op_index: int, operator: bytes, operands: list, state: Dict,
+              tm: Matrix, ctm: Matrix) -> Matrix:
+        font: FontInfo = state["font"]
+        if font is None:
+            raise UnsupportedPageError("Text shown without a font")
+        
+        size, th = state["size"], state["th"]
+        run = TextRun(op_index, operator, operands, size, th)
+        elements = operands[0] if operator == b"TJ" else [operands[-1]]
+        
+        for element_index, element in enumerate(elements):
+            if isinstance(element, (int, float)):
+                tm = multiply((1.0, 0.0, 0.0, 1.0, -float(element) / 1000.0 * size * th, 0.0), tm)
+                continue
+            for byte_index, code in enumerate(string_bytes(element)):
+                w0 = font.width(code) / 1000.0
+                trm = multiply(multiply((size * th, 0.0, 0.0, size, 0.0, state["rise"]), tm), ctm)
+                bbox = transform_bbox(0.0, font.descent / 1000.0, w0, font.ascent / 1000.0, trm)
+                advance = (w0 * size + state["tc"] + (state["tw"] if code == 32 else 0.0)) * th
+                run.glyphs.append(Glyph(font.decode(code), element_index, byte_index, advance, bbox))
+                tm = multiply((1.0, 0.0, 0.0, 1.0, advance, 0.0), tm)
+        
+        if run.glyphs:
+            self.runs.append(run)
+        return tm
+    
+    def _check_xobject(self, name: str, ctm: Matrix) -> None:
+        xobjects = resolve(self.resources.get("/XObject"), {})
+        if name not in xobjects:
+            return
+        xobject = xobjects[name].get_object()
+        if xobject.get("/Subtype") == "/Image":
+            self.image_boxes.append(transform_bbox(0.0, 0.0, 1.0, 1.0, ctm))
+        elif xobject.get("/Subtype") == "/Form":
+            resources = resolve(xobject.get("/Resources"), {})
+            if resources.get("/Font"):
+                raise UnsupportedPageError(f"Text inside form XObject {name}")
+            # Any image inside a form may need visual redaction; the whole form box counts
+            if resources.get("/XObject"):
+                matrix = multiply(tuple(float(v) for v in resolve(xobject.get("/Matrix"), IDENTITY)), ctm)
+                self.image_boxes.append(transform_bbox(*(float(v) for v in xobject["/BBox"]), matrix))
+    
+    def _reconstruct_text(self) -> Tuple[str, List[Optional[Tuple[int, int]]]]:
+        """Page text with a glyph reference for each character (None for inserted whitespace)"""
+        chars: List[str] = []
+        refs: List[Optional[Tuple[int, int]]] = []
+        previous: Optional[Glyph] = None
+        
+        for run_index, run in enumerate(self.runs):
+            first = run.glyphs[0]
+            if previous is not None:
+                height = max(first.bbox[3] - first.bbox[1], 1.0)
+                if abs(first.bbox[1] - previous.bbox[1]) > height / 2:
+                    chars.append("\n")
+                    refs.append(None)
+                elif first.bbox[0] - previous.bbox[2] > height * 0.15:
+                    chars.append(" ")
+                    refs.append(None)
+            for glyph_index, glyph in enumerate(run.glyphs):
+                for char in glyph.char:
+                    chars.append(char)
+                    refs.append((run_index, glyph_index))
+            previous = run.glyphs[-1]
+        
+        return "".join(chars), refs
+
+
+class VectorRedactor:
+    """Redact text PII directly in a PDF's content streams
+    
+    Matching glyphs are removed from their text-showing operators (the
+    remaining glyphs keep their positions) and black rectangles are drawn
+    over them as vector operations, so the rest of the text layer survives.
+    """
+    
+    def __init__(self, padding: float = 1.0):
+        self.logger = setup_logger(__name__)
+        self.padding = padding
+    
+    def redact(self, layer: PageTextLayer, values: Iterable[str]) -> Tuple[Optional[DecodedStreamObject], List[BBox]]:
+        """Build a redacted content stream for a page
+        
+        Returns the new content stream and the redacted boxes in user space,
+        or ``(None, [])`` when none of the values occur on the page.
+        """
+        occurrences = layer.find(values)
+        if not occurrences:
+            return None, []
+        
+        removed: Dict[int, Set[int]] = {}
+        boxes: List[BBox] = []
+        for refs in occurrences:
+            for run_index, glyph_index in refs:
+                removed.setdefault(run_index, set()).add(glyph_index)
+            boxes.extend(layer.glyph_bbox(refs))
+        
+        operations = list(layer.content.operations)
+        # Rewrite from the end so earlier op indices stay valid while splicing
+        for run_index in sorted(removed, reverse=True):
+            run = layer.runs[run_index]
+            operations[run.op_index:run.op_index + 1] = self._rewrite_run(run, removed[run_index])
+        
+        content = ContentStream(None, None)
+        content.operations = [([], b"q")] + operations + [([], b"Q")] + self._box_operations(boxes)
+        
+        stream = DecodedStreamObject()
+        stream.set_data(content.get_data())
+        return stream, boxes
+    
+    def _rewrite_run(self, run: TextRun, removed: Set[int]) -> List[Tuple[list, bytes]]:
+        """Replace a show operator by a TJ that skips the removed glyphs but keeps spacing"""
+        elements = run.operands[0] if run.operator == b"TJ" else [run.operands[-1]]
+        scale = run.font_size * run.h_scale
+        glyphs_by_position = {(g.element, g.byte): (i, g) for i, g in enumerate(run.glyphs)}
+        
+        new_elements = ArrayObject()
+        pending = bytearray()
+        shift = 0.0
+        
+        def flush_text():
+            if pending:
+                new_elements.append(ByteStringObject(bytes(pending)))
+                pending.clear()
+        
+        def flush_shift():
+            nonlocal shift
+            if shift and scale:
+                new_elements.append(FloatObject(round(-shift * 1000.0 / scale, 3)))
+            shift = 0.0
+        
+        for element_index, element in enumerate(elements):
+            if isinstance(element, (int, float)):
+                flush_text()
+                flush_shift()
+                new_elements.append(element)
+                continue
+            for byte_index, code in enumerate(string_bytes(element)):
+                glyph_index, glyph = glyphs_by_position[(element_index, byte_index)]
+                if glyph_index in removed:
+                    flush_text()
+                    shift += glyph.advance
+                else:
+                    flush_shift()
+                    pending.append(code)
+        flush_text()
+        flush_shift()
+        
+        operations = []
+        if run.operator == b'"':
+            operations += [([run.operands[0]], b"Tw"), ([run.operands[1]], b"Tc")]
+        if run.operator in (b"'", b'"'):
+            operations.append(([], b"T*"))
+        operations.append(([new_elements], b"TJ"))
+        return operations
+    
+    def _box_operations(self, boxes: List[BBox]) -> List[Tuple[list, bytes]]:
+        if not boxes:
+            return []
+        operations = [([], b"q"), ([NumberObject(0)], b"g")]
+        for x0, y0, x1, y1 in boxes:
+            operations.append(([
+                FloatObject(round(x0 - self.padding, 3)), FloatObject(round(y0 - self.padding, 3)),
+                FloatObject(round(x1 - x0 + 2 * self.padding, 3)), FloatObject(round(y1 - y0 + 2 * self.padding, 3)),
+            ], b"re"))
+            operations.append(([], b"f"))
+        operations.append(([], b"Q"))
+        return operations
+
+
+def to_pixel_boxes(page: PyPDF2.PageObject, boxes: Iterable[BBox], dpi: float) -> List[Tuple[int, int, int, int]]:
+    """Convert user-space boxes to pixel boxes of the page as rasterized at ``dpi``
+    
+    Accounts for the crop box origin and the page's /Rotate, which the
+    rasterizer applies.
+    """
+    scale = dpi / 72.0
+    crop = page.cropbox
+    left, bottom, right, top = float(crop.left), float(crop.bottom), float(crop.right), float(crop.top)
+    width, height = (right - left) * scale, (top - bottom) * scale
+    rotation = int(page.get("/Rotate", 0) or 0) % 360
+    
+    pixel_boxes = []
+    for x0, y0, x1, y1 in boxes:
+        # Unrotated image coordinates have their origin at the top left
+        u0, u1 = (x0 - left) * scale, (x1 - left) * scale
+        v0, v1 = (top - y1) * scale, (top - y0) * scale
+        if rotation == 90:
+            u0, v0, u1, v1 = height - v1, u0, height - v0, u1
+        elif rotation == 180:
+            u0, v0, u1, v1 = width - u1, height - v1, width - u0, height - v0
+        elif rotation == 270:
+            u0, v0, u1, v1 = v0, width - u1, v1, width - u0
+        pixel_boxes.append((int(u0), int(v0), int(round(u1 + 0.5)), int(round(v1 + 0.5))))
+    return pixel_boxes
+
+
+def remaining_values(text: str, values: Iterable[str]) -> List[str]:
+    """Values still present in a text, using the same whitespace-tolerant matching"""
+    remaining = []
+    for value in values:
+        pattern = value_pattern(value)
+        if pattern is not None and pattern.search(text):
+            remaining.append(value)
+    return remaining
\ No newline at end of file
@@ -0,0 +1,81 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from ..processing.pdf_redactor import value_pattern
+
+Word = Tuple[str, Tuple[int, int, int, int]]
+
+
+class WordBoxIndex:
+    """Map character spans of OCR text back to the word boxes they came from
+    
+    The page text is the OCR words joined by single spaces, or by newlines
+    where ``line_ids`` changes. Word start and end offsets are kept sorted,
+    so the words under a span are found with two binary searches regardless
+    of how many words the page has.
+    """
+    
+    def __init__(self, words: Iterable[Word], line_ids: Optional[Sequence[int]] = None):
+        self.words: List[Word] = [(text, tuple(box)) for text, box in words]
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        
+        parts = []
+        offset = 0
+        for i, (text, _) in enumerate(self.words):
+            if i:
+                parts.append("\n" if line_ids is not None and line_ids[i] != line_ids[i - 1] else " ")
+                offset += 1
+            self._starts.append(offset)
+            offset += len(text)
+            self._ends.append(offset)
+            parts.append(text)
+        
+        self.text = "".join(parts)
+    
+    def words_in_span(self, start: int, end: int) -> range:
+        """Indices of the words overlapping ``text[start:end]``"""
+        return range(bisect_right(self._ends, start), bisect_left(self._starts, end))
+    
+    def boxes_for_span(self, start: int, end: int) -> List[Word]:
+        """``(text, (x, y, w, h))`` areas covering a span, one per line it runs over
+        
+        Words cut by the span are trimmed in proportion to the characters
+        covered, so a value glued to a label ("SSN:123-45-6789") does not
+        black out the label too.
+        """
+        areas: List[Word] = []
+        for index in self.words_in_span(start, end):
+            text, (x, y, w, h) = self.words[index]
+            word_start = self._starts[index]
+            if text:
+                first = max(start - word_start, 0)
+                last = min(end - word_start, len(text))
+                x, w = x + w * first // len(text), max(w * (last - first) // len(text), 1)
+                text = text[first:last]
+            
+            if areas and self._same_line(areas[-1][1], (x, y, w, h)):
+                prev_text, (px, py, pw, ph) = areas[-1]
+                x0, y0 = min(px, x), min(py, y)
+                x1, y1 = max(px + pw, x + w), max(py + ph, y + h)
+                areas[-1] = (f"{prev_text} {text}", (x0, y0, x1 - x0, y1 - y0))
+            else:
+                areas.append((text, (x, y, w, h)))
+        return areas
+    
+    def find(self, values: Sequence[str]) -> List[Word]:
+        """Areas of every occurrence of the given values, e.g. PII detected in ``text``"""
+        areas: List[Word] = []
+        for value in values:
+            pattern = value_pattern(value)
+            if pattern is None:
+                continue
+            for match in pattern.finditer(self.text):
+                areas.extend(self.boxes_for_span(match.start(), match.end()))
+        return areas
+    
+    @staticmethod
+    def _same_line(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+        # Boxes on one line overlap vertically by at least half the smaller height
+        overlap = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+        return overlap >= min(a[3], b[3]) / 2
\ No newline at end of file
@@ -0,0 +1,347 @@
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from .config import Config
+from .helpers import get_pii_scanner
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bump when a code change alters redaction output for the same input and config
+CACHE_VERSION = 7
+
+# Random key of a cache directory for digests of PII values
+SECRET_NAME = ".secret"
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def config_fingerprint() -> str:
+    """Hash of every setting and model identifier that affects redaction output"""
+    settings = {
+        "version": CACHE_VERSION,
+        "pii_patterns": get_pii_scanner().patterns,
+        "confidence_threshold": Config.CONFIDENCE_THRESHOLD,
+        "regex_confidence": Config.REGEX_CONFIDENCE,
+        "context_window": Config.CONTEXT_WINDOW,
+        "distant_context_weight": Config.DISTANT_CONTEXT_WEIGHT,
+        "cascade": [Config.SPACY_POLICY, Config.TRANSFORMER_POLICY, Config.CASCADE_MIN_ALPHA_RATIO,
+                    Config.CASCADE_REGION_CHARS],
+        "models": {
+            "spacy": Config.SPACY_MODEL,
+            "spacy_exclude": Config.SPACY_EXCLUDE,
+            "ner": Config.NER_MODEL,
+            "ner_window": [Config.NER_WINDOW_TOKENS, Config.NER_WINDOW_OVERLAP],
+            "yolo": Config.YOLO_MODEL,
+            "enabled": [Config.ENABLE_SPACY, Config.ENABLE_TRANSFORMER_NER, Config.ENABLE_VISUAL_DETECTION],
+        },
+        "pdf_dpi": Config.PDF_DPI,
+        "tesseract": [Config.TESSERACT_LANG, Config.TESSERACT_PSM, Config.TESSERACT_OEM, Config.OCR_DPI],
+        "triage": [Config.TRIAGE_MIN_TEXT_DENSITY, Config.TRIAGE_IMAGE_COVERAGE],
+        "pdf_redaction": [Config.PDF_REDACTION_MODE, Config.TEXT_REDACTION_TYPES, Config.TEXT_REDACTION_MIN_CHARS],
+    }
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class _DiskCache:
+    """Directory-per-entry disk cache with size-bounded LRU eviction
+    
+    Entries older than ``max_age`` seconds (when set) are treated as misses
+    and removed on eviction.
+    """
+    
+    def __init__(self, cache_dir: Path, max_bytes: int, fingerprint: str = None, max_age: float = None):
+        self.logger = setup_logger(__name__)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._secret = None
+    
+    def _config_fingerprint(self) -> str:
+        return self.fingerprint or config_fingerprint()
+    
+    @staticmethod
+    def _touch(entry: Path) -> None:
+        # Touching the entry marks it as recently used for LRU eviction
+        now = time.time()
+        try:
+            os.utime(entry, (now, now))
+        except OSError:
+            pass
+    
+    def digest(self, value: str) -> str:
+        """Keyed digest of a PII value, ignoring whitespace differences
+        
+        The key is a random secret of this cache, so digests of short values
+        such as account numbers cannot be reversed by hashing every candidate
+        without it.
+        """
+        normalized = " ".join(value.split()).encode("utf-8")
+        return hmac.new(self._get_secret(), normalized, hashlib.sha256).hexdigest()
+    
+    def _get_secret(self) -> bytes:
+        if self._secret is None:
+            path = self.cache_dir / SECRET_NAME
+            if not path.exists():
+                staging = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+                self._write_private(staging, os.urandom(32))
+                # Linking fails if another process got there first, so all of them use one secret
+                try:
+                    os.link(staging, path)
+                except FileExistsError:
+                    pass
+                finally:
+                    staging.unlink()
+            self._secret = path.read_bytes()
+        return self._secret
+    
+    def _expired(self, path: Path) -> bool:
+        """Whether the entry file ``path`` was written more than ``max_age`` seconds ago"""
+        if self.max_age is None:
+            return False
+        try:
+            return time.time() - path.stat().st_mtime > self.max_age
+        except OSError:
+            return True
+    
+    @staticmethod
+    def _write_private(path: Path, data: bytes) -> None:
+        """Atomically write a file only this user can read"""
+        staging = path.with_name(f".tmp-{uuid.uuid4().hex}")
+        with os.fdopen(os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+            f.write(data)
+        os.replace(staging, path)
+    
+    def evict(self) -> None:
+        with self._lock:
+            self._evict()
+    
+    def _evict(self) -> None:
+        """Remove expired entries, then least recently used ones until the cache fits in ``max_bytes``"""
+        entries = []
+        total = 0
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith(".tmp-"):
+                continue
+            files = [f for f in entry.iterdir() if f.is_file()]
+            if self.max_age is not None and all(self._expired(f) for f in files):
+                shutil.rmtree(entry, ignore_errors=True)
+                self.logger.debug(f"Expired cache entry {entry.name}")
+                continue
+            size = sum(f.stat().st_size for f in files)
+            entries.append((entry.stat().st_mtime, size, entry))
+            total += size
+        
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            self.logger.debug(f"Evicted cache entry {entry.name}")
+
+
+class ResultCache(_DiskCache):
+    """Content-addressed disk cache of redacted outputs and their audit logs
+    
+    Entries are keyed on the SHA-256 of the input bytes plus the config
+    fingerprint, so a config or model change never serves a stale result.
+    The cache is bounded by total size and evicts least recently used entries.
+    
+    Cached audit logs list keyed digests (see ``digest``) in place of the
+    text PII values, so a cache hit reports what was found, and how often,
+    without the cache keeping the values.
+    """
+    
+    OUTPUT_NAME = "output"
+    AUDIT_NAME = "audit.json"
+    
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None, fingerprint: str = None):
+        super().__init__(
+            cache_dir or Config.CACHE_DIR / "results",
+            Config.RESULT_CACHE_MAX_BYTES if max_bytes is None else max_bytes,
+            fingerprint
+        )
+    
+    def key_for(self, input_path: Path) -> str:
+        return hashlib.sha256(f"{file_sha256(input_path)}:{self._config_fingerprint()}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str, input_path: Path, output_path: Path) -> Optional[Dict]:
+        """Copy a cached output to ``output_path`` and return its audit data, or None on a miss"""
+        entry = self.cache_dir / key
+        output_file = entry / self.OUTPUT_NAME
+        audit_file = entry / self.AUDIT_NAME
+        
+        try:
+            with open(audit_file) as f:
+                audit_data = json.load(f)
+            shutil.copyfile(output_file, output_path)
+        except (OSError, ValueError):
+            return None
+        
+        self._touch(entry)
+        
+        audit_data.update({
+            "document": str(input_path),
+            "redacted_output": str(output_path),
+            "cache_key": key,
+            "cache_hit": True,
+        })
+        return audit_data
+    
+    def put(self, key: str, output_path: Path, audit_data: Dict) -> None:
+        """Store a redacted output and its audit data"""
+        if not output_path.exists():
+            return
+        
+        entry = self.cache_dir / key
+        staging = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+        try:
+            staging.mkdir(mode=0o700)
+            shutil.copyfile(output_path, staging / self.OUTPUT_NAME)
+            with open(staging / self.AUDIT_NAME, 'w') as f:
+                json.dump(self._without_values(audit_data), f, indent=2, default=str)
+            
+            # The rename is atomic, so readers never see a half-written entry
+            with self._lock:
+                if entry.exists():
+                    shutil.rmtree(staging, ignore_errors=True)
+                else:
+                    os.replace(staging, entry)
+                self._evict()
+        except OSError as e:
+            self.logger.warning(f"Could not write result cache entry {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    def _without_values(self, audit_data: Dict) -> Dict:
+        """Audit data with each text PII value replaced by its digest"""
+        if "text_pii" not in audit_data:
+            return audit_data
+        text_pii = {
+            pii_type: [[f"hmac-sha256:{self.digest(str(value))}", *rest] for value, *rest in entries]
+            for pii_type, entries in audit_data["text_pii"].items()
+        }
+        return {**audit_data, "text_pii": text_pii}
+
+
+class PageCache(_DiskCache):
+    """Per-page cache of redacted page images and what is needed to reuse them
+    
+    Pages are keyed on a hash of their PDF content plus the config fingerprint,
+    so a revised document only re-runs the pages that actually changed. An entry
+    is complete once both its result JSON and its redacted image are written.
+    
+    Entries hold no page text and no PII values, only boxes, PII types and
+    keyed digests of values (see ``digest``). The digests tell whether a page
+    was checked against every value of a document and let a page's values be
+    found on the other pages of a revised document. Files are private to the
+    user and entries expire after ``max_age`` seconds.
+    """
+    
+    RESULT_NAME = "result.json"
+    IMAGE_NAME = "redacted.png"
+    # Longest value, in whitespace-separated words, that ``find_values`` looks for
+    MAX_VALUE_WORDS = 8
+    
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None, fingerprint: str = None,
+                 max_age: float = None):
+        super().__init__(
+            cache_dir or Config.CACHE_DIR / "pages",
+            Config.PAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes,
+            fingerprint,
+            Config.PAGE_CACHE_MAX_AGE if max_age is None else max_age
+        )
+    
+    def keys_for(self, content_hashes: List[str]) -> List[str]:
+        fingerprint = self._config_fingerprint()
+        return [
+            hashlib.sha256(f"{content_hash}:{fingerprint}".encode("utf-8")).hexdigest()
+            for content_hash in content_hashes
+        ]
+    
+    def find_values(self, text: str, digests: Dict[str, str]) -> List[Tuple[str, str]]:
+        """``(value, pii_type)`` for each run of words in ``text`` whose digest maps to a type in ``digests``"""
+        if not digests:
+            return []
+        words = list(re.finditer(r"\S+", text))
+        found = {}
+        for i, first in enumerate(words):
+            for start in _word_bounds(first, leading=True):
+                for last in words[i:i + self.MAX_VALUE_WORDS]:
+                    for end in _word_bounds(last, leading=False):
+                        if end > start:
+                            value = text[start:end]
+                            pii_type = digests.get(self.digest(value))
+                            if pii_type is not None:
+                                found[" ".join(value.split())] = pii_type
+        return list(found.items())
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached entry of a page, or None if the page has not been fully processed recently"""
+        entry = self.cache_dir / key
+        if not (entry / self.IMAGE_NAME).exists() or self._expired(entry / self.RESULT_NAME):
+            return None
+        try:
+            with open(entry / self.RESULT_NAME) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        self._touch(entry)
+        return result
+    
+    def put(self, key: str, result: Dict) -> None:
+        entry = self.cache_dir / key
+        try:
+            entry.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self._write_private(entry / self.RESULT_NAME, json.dumps(result, default=str).encode("utf-8"))
+        except OSError as e:
+            self.logger.warning(f"Could not write page cache entry {key}: {e}")
+    
+    def image_path(self, key: str) -> Path:
+        return self.cache_dir / key / self.IMAGE_NAME
+    
+    def load_image(self, key: str) -> Image.Image:
+        with Image.open(self.image_path(key)) as image:
+            image.load()
+            return image
+    
+    @staticmethod
+    def save_image(image: Image.Image, path: Path) -> None:
+        """Atomically write a redacted page image that only this user can read"""
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        staging = path.with_name(f".tmp-{uuid.uuid4().hex}.png")
+        with os.fdopen(os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+            image.save(f, format="PNG", compress_level=1)
+        os.replace(staging, path)
+
+
+def _word_bounds(word: re.Match, leading: bool) -> Iterable[int]:
+    """Where a value may start (or end) in a word: at its edge, or past surrounding punctuation"""
+    token = word.group()
+    stripped = token.lstrip() if leading else token.rstrip()
+    trimmed = re.sub(r"^\W+", "", stripped) if leading else re.sub(r"\W+$", "", stripped)
+    if leading:
+        bounds = {word.start(), word.end() - len(trimmed)}
+    else:
+        bounds = {word.end(), word.start() + len(trimmed)}
+    return sorted(bound for bound in bounds if word.start() <= bound <= word.end())
\ No newline at end of file
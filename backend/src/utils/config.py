@@ -11,9 +11,10 @@ class Config:
     INPUT_DIR = DATA_DIR / "input"
     OUTPUT_DIR = DATA_DIR / "output"
     MODELS_DIR = DATA_DIR / "models"
+    CACHE_DIR = DATA_DIR / "cache"
     
     # Create directories if they don't exist
-    for directory in [INPUT_DIR, OUTPUT_DIR, MODELS_DIR]:
+    for directory in [INPUT_DIR, OUTPUT_DIR, MODELS_DIR, CACHE_DIR]:
         directory.mkdir(parents=True, exist_ok=True)
     
     # PII patterns for regex detection
@@ -27,10 +28,121 @@ class Config:
     
     # Model settings
     USE_GPU = os.getenv("USE_GPU", "false").lower() == "true"
+    
+    # Models are loaded lazily; a disabled detector never imports its libraries
+    ENABLE_SPACY = os.getenv("ENABLE_SPACY", "true").lower() == "true"
+    ENABLE_TRANSFORMER_NER = os.getenv("ENABLE_TRANSFORMER_NER", "true").lower() == "true"
+    ENABLE_VISUAL_DETECTION = os.getenv("ENABLE_VISUAL_DETECTION", "true").lower() == "true"
+    WARM_MODELS_ON_STARTUP = os.getenv("WARM_MODELS_ON_STARTUP", "false").lower() == "true"
     CONFIDENCE_THRESHOLD = 0.8
     
+    # spaCy NER: only the ner component is kept (en_core_web_sm's ner has its own tok2vec),
+    # and text is streamed through nlp.pipe in page/paragraph segments
+    SPACY_MODEL = "en_core_web_sm"
+    SPACY_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+    SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+    SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+    SPACY_MAX_SEGMENT_CHARS = 5000
+    CLI_BATCH_DOCUMENTS = int(os.getenv("CLI_BATCH_DOCUMENTS", "16"))  # Documents per shared NER stream
+    
+    # Transformer NER runs over overlapping token windows, several windows per forward pass
+    NER_MODEL = "dslim/bert-base-NER"
+    NER_WINDOW_TOKENS = 400  # Leaves room for special tokens under BERT's 512 limit
+    NER_WINDOW_OVERLAP = 64
+    NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "8"))
+    
+    # Regex hits get REGEX_CONFIDENCE when a financial keyword is within CONTEXT_WINDOW
+    # characters, and are down-weighted when the context is only found elsewhere in the document
+    REGEX_CONFIDENCE = 0.9
+    CONTEXT_WINDOW = int(os.getenv("CONTEXT_WINDOW", "200"))
+    DISTANT_CONTEXT_WEIGHT = 0.8
+    
+    # Detection cascade: regex runs over all text; SPACY_POLICY and TRANSFORMER_POLICY are
+    # "always", "never" or "cascade". In cascade mode spaCy only sees paragraphs with at least
+    # CASCADE_MIN_ALPHA_RATIO letters and a name candidate (capitalized or all-caps word runs,
+    # capitalized words after a label or honorific), and the transformer only sees the lines
+    # within CASCADE_REGION_CHARS of spaCy's name-like hits, all-caps runs or unchecked candidates
+    SPACY_POLICY = os.getenv("SPACY_POLICY", "cascade").lower()
+    TRANSFORMER_POLICY = os.getenv("TRANSFORMER_POLICY", "cascade").lower()
+    CASCADE_MIN_ALPHA_RATIO = float(os.getenv("CASCADE_MIN_ALPHA_RATIO", "0.5"))
+    CASCADE_REGION_CHARS = int(os.getenv("CASCADE_REGION_CHARS", "100"))
+    
+    YOLO_MODEL = "yolov8n.pt"  # Using nano version for speed
+    VISUAL_BATCH_SIZE = int(os.getenv("VISUAL_BATCH_SIZE", "4"))  # Pages per YOLO forward pass
+    
+    # Micro-batching: NER windows and YOLO pages from concurrent documents are collected for up
+    # to MICRO_BATCH_WAIT_MS (or NER_BATCH_SIZE/VISUAL_BATCH_SIZE inputs) into one forward pass
+    MICRO_BATCHING = os.getenv("MICRO_BATCHING", "true").lower() == "true"
+    MICRO_BATCH_WAIT_MS = float(os.getenv("MICRO_BATCH_WAIT_MS", "5"))
+    
+    # PDF rasterization
+    PDF_DPI = 300
+    PDF_PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", "4"))  # Pages rasterized at a time
+    
+    # PDF redaction: "vector" edits the content streams and keeps the text layer, "raster"
+    # re-renders every page as an image, "auto" uses vector whenever the PDF has a text layer
+    PDF_REDACTION_MODE = os.getenv("PDF_REDACTION_MODE", "auto").lower()
+    TEXT_REDACTION_TYPES = None  # PII types removed from the text layer, None for all
+    TEXT_REDACTION_MIN_CHARS = 2
+    
+    # Page triage: pages whose text layer is denser than TRIAGE_MIN_TEXT_DENSITY (non-space
+    # characters per square inch) skip OCR; image coverage separates scans with an OCR layer
+    TRIAGE_MIN_TEXT_DENSITY = float(os.getenv("TRIAGE_MIN_TEXT_DENSITY", "0.2"))
+    TRIAGE_IMAGE_COVERAGE = 0.5
+    
+    # Worker processes for page rasterization, OCR and redaction (0 or 1 runs them inline)
+    PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    
+    # Result cache: redacted outputs keyed by input hash and config fingerprint. Off by default
+    # since the cache keeps redacted documents on disk
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "false").lower() == "true"
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+    
+    # Page cache: redacted pages with their visual boxes and PII digests, keyed by page content.
+    # Off by default since the cache keeps redacted documents on disk; entries expire after
+    # PAGE_CACHE_MAX_AGE seconds
+    PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE", "false").lower() == "true"
+    PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(4 * 1024 ** 3)))
+    PAGE_CACHE_MAX_AGE = float(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    
+    # API: documents are processed on API_WORKERS threads; past API_MAX_IN_FLIGHT uploads the
+    # API answers 429 with a Retry-After of API_RETRY_AFTER seconds
+    API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+    API_MAX_IN_FLIGHT = int(os.getenv("API_MAX_IN_FLIGHT", "4"))
+    API_RETRY_AFTER = int(os.getenv("API_RETRY_AFTER", "5"))
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 ** 2)))
+    
+    # Job queue: submitted documents are stored in a SQLite queue and processed by JOB_WORKERS
+    # worker processes, which poll it every JOB_POLL_INTERVAL seconds when idle. A job interrupted
+    # JOB_MAX_ATTEMPTS times (e.g. by a worker crash) is failed rather than requeued. Workers send a
+    # heartbeat every JOB_HEARTBEAT_INTERVAL seconds; a running job is requeued once its worker
+    # process is gone or silent for JOB_HEARTBEAT_TIMEOUT seconds
+    JOBS_DB = Path(os.getenv("JOBS_DB", str(DATA_DIR / "jobs.sqlite3")))
+    JOBS_DIR = DATA_DIR / "jobs"
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+    JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))
+    
     # Tesseract path (update this for your Windows installation)
     TESSERACT_PATH = r"C:\Users\BITTU\AppData\Local\Programs\Tesseract-OCR"
     
+    # Tesseract settings; OCR_DPI is the resolution hint for images without DPI metadata
+    TESSERACT_LANG = os.getenv("TESSERACT_LANG", "eng")
+    TESSERACT_PSM = int(os.getenv("TESSERACT_PSM", "3"))  # Fully automatic page segmentation
+    TESSERACT_OEM = int(os.getenv("TESSERACT_OEM", "3"))  # Default engine (LSTM where available)
+    OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+    
+    # OCR backend: "tesserocr" keeps an in-process engine per thread, "pytesseract" runs the
+    # tesseract binary per page, "auto" prefers tesserocr and falls back to pytesseract
+    OCR_BACKEND = os.getenv("OCR_BACKEND", "auto").lower()
+    TESSDATA_PATH = os.getenv("TESSDATA_PREFIX")
+    
+    # Metrics: per-stage timings for /metrics and the audit log; disabled timers are no-ops
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
     # Logging
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json" (one object per line)
\ No newline at end of file
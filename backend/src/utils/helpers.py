@@ -1,21 +1,129 @@
 import re
 import json
-from typing import Dict, List, Any
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Any, NamedTuple, Optional, Pattern, Tuple
 from pathlib import Path
 from .config import Config
 
+class PIIMatch(NamedTuple):
+    """A regex PII hit with its character offsets in the scanned text"""
+    type: str
+    value: str
+    start: int
+    end: int
+
+class PIIScanner:
+    """Regex scanner for a set of named PII patterns
+    
+    Patterns are compiled once, but a scan still makes one ``finditer`` pass
+    over the text per pattern, N passes for N patterns. One alternation of
+    all patterns would be a single pass but reports one type per position,
+    while text matching several patterns (a card number is also a 16-digit
+    account number) must be reported once per type. Matches are returned in
+    text order, ties in registration order.
+    """
+    
+    def __init__(self, patterns: Dict[str, str] = None):
+        self._patterns: Dict[str, str] = {}
+        self._compiled: Optional[List[Tuple[str, Pattern]]] = None
+        
+        for pii_type, pattern in (Config.PII_PATTERNS if patterns is None else patterns).items():
+            self.register(pii_type, pattern)
+    
+    @property
+    def patterns(self) -> Dict[str, str]:
+        return dict(self._patterns)
+    
+    def register(self, pii_type: str, pattern: str, flags: int = 0) -> None:
+        """Add or replace a pattern; takes effect on the next scan"""
+        # Fail early on invalid patterns instead of on the next scan
+        re.compile(pattern, flags)
+        if flags:
+            pattern = f"(?{self._flag_letters(flags)}:{pattern})"
+        
+        self._patterns.pop(pii_type, None)
+        self._patterns[pii_type] = pattern
+        self._compiled = None
+    
+    def unregister(self, pii_type: str) -> None:
+        if self._patterns.pop(pii_type, None) is not None:
+            self._compiled = None
+    
+    def scan(self, text: str) -> List[PIIMatch]:
+        """Find all PII matches of every pattern, in text order, with one pass per pattern"""
+        hits = []
+        for index, (pii_type, compiled) in enumerate(self._compile()):
+            for match in compiled.finditer(text):
+                hits.append((match.start(), index, PIIMatch(pii_type, match.group(), match.start(), match.end())))
+        hits.sort(key=lambda hit: hit[:2])
+        return [match for _, _, match in hits]
+    
+    def _compile(self) -> List[Tuple[str, Pattern]]:
+        if self._compiled is None:
+            self._compiled = [(pii_type, re.compile(pattern)) for pii_type, pattern in self._patterns.items()]
+        return self._compiled
+    
+    @staticmethod
+    def _flag_letters(flags: int) -> str:
+        letters = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.VERBOSE: "x", re.ASCII: "a"}
+        return "".join(letter for flag, letter in letters.items() if flags & flag)
+
+_default_scanner: Optional[PIIScanner] = None
+
+def get_pii_scanner() -> PIIScanner:
+    """Shared scanner built from Config.PII_PATTERNS"""
+    global _default_scanner
+    if _default_scanner is None:
+        _default_scanner = PIIScanner()
+    return _default_scanner
+
+def register_pii_pattern(pii_type: str, pattern: str, flags: int = 0) -> None:
+    """Register an extra PII pattern with the shared scanner at runtime"""
+    get_pii_scanner().register(pii_type, pattern, flags)
+
 def detect_pii_with_regex(text: str) -> Dict[str, List[str]]:
     """Detect PII using regex patterns"""
     detected_pii = {}
     
-    for pii_type, pattern in Config.PII_PATTERNS.items():
-        matches = re.findall(pattern, text)
-        if matches:
-            detected_pii[pii_type] = matches
+    for match in get_pii_scanner().scan(text):
+        detected_pii.setdefault(match.type, []).append(match.value)
     
     return detected_pii
 
-def save_audit_log(document_path: Path, redacted_fields: List[str], 
+_SEGMENT_BREAK = re.compile(r"\f|\n[ \t]*\n")
+
+def split_text_segments(text: str, max_chars: int = 5000) -> List[Tuple[int, str]]:
+    """Split text into pages/paragraphs of at most ``max_chars`` characters
+    
+    Returns ``(offset, segment)`` pairs so positions inside a segment can be
+    mapped back to the full text. Whitespace-only segments are skipped.
+    """
+    segments = []
+    start = 0
+    for match in _SEGMENT_BREAK.finditer(text):
+        segments.extend(_split_long_segment(text, start, match.start(), max_chars))
+        start = match.end()
+    segments.extend(_split_long_segment(text, start, len(text), max_chars))
+    return segments
+
+def _split_long_segment(text: str, start: int, end: int, max_chars: int) -> List[Tuple[int, str]]:
+    pieces = []
+    while start < end:
+        stop = end
+        if stop - start > max_chars:
+            # Prefer cutting at a line break, then at a space
+            limit = start + max_chars
+            cut = text.rfind("\n", start, limit)
+            if cut <= start:
+                cut = text.rfind(" ", start, limit)
+            stop = cut if cut > start else limit
+        if text[start:stop].strip():
+            pieces.append((start, text[start:stop]))
+        start = stop
+    return pieces
+
+def save_audit_log(document_path: Path, redacted_fields: List[str],
                   confidence_scores: List[float], output_path: Path) -> None:
     """Save audit log in JSON format"""
     audit_data = {
@@ -28,10 +136,72 @@ def save_audit_log(document_path: Path, redacted_fields: List[str],
     with open(output_path, 'w') as f:
         json.dump(audit_data, f, indent=2)
 
+FINANCIAL_KEYWORDS = ["account", "bank", "financial", "loan", "transaction", "balance", "payment"]
+
+class KeywordIndex:
+    """Multi-keyword matcher that finds every keyword occurrence in one pass
+    
+    The keywords are compiled into a single case-insensitive alternation of
+    literals, which the regex engine scans in C; this plays the role of an
+    Aho-Corasick automaton without a per-character Python loop.
+    """
+    
+    def __init__(self, keywords: List[str]):
+        # Longest first so overlapping keywords prefer the most specific one
+        ordered = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(keyword) for keyword in ordered), re.IGNORECASE)
+    
+    def find_all(self, text: str) -> List[int]:
+        """Start offsets of all keyword occurrences, in ascending order"""
+        return [match.start() for match in self._pattern.finditer(text)]
+    
+    def contains_any(self, text: str) -> bool:
+        return self._pattern.search(text) is not None
+
+class FinancialContext:
+    """Financial keyword positions of one document, for per-match context scoring
+    
+    The document is scanned once when the context is built; each lookup is then
+    a binary search over the keyword positions.
+    """
+    
+    _default_index: Optional[KeywordIndex] = None
+    
+    def __init__(self, text: str, keywords: List[str] = None, window: int = None):
+        self.window = Config.CONTEXT_WINDOW if window is None else window
+        self.positions = self._index_for(keywords).find_all(text)
+    
+    @property
+    def is_financial(self) -> bool:
+        """Whether the document mentions any financial keyword at all"""
+        return bool(self.positions)
+    
+    def keyword_count(self, start: int, end: int) -> int:
+        """Number of keywords within ``window`` characters of ``text[start:end]``"""
+        low = bisect_left(self.positions, start - self.window)
+        high = bisect_right(self.positions, end + self.window)
+        return high - low
+    
+    def confidence(self, start: int, end: int, base: float = None) -> float:
+        """Confidence for a regex hit, weighted by how close financial context is"""
+        base = Config.REGEX_CONFIDENCE if base is None else base
+        if self.keyword_count(start, end):
+            return base
+        if self.is_financial:
+            return round(base * Config.DISTANT_CONTEXT_WEIGHT, 4)
+        return 0.0
+    
+    @classmethod
+    def _index_for(cls, keywords: Optional[List[str]]) -> KeywordIndex:
+        if keywords is not None:
+            return KeywordIndex(keywords)
+        if cls._default_index is None:
+            cls._default_index = KeywordIndex(FINANCIAL_KEYWORDS)
+        return cls._default_index
+
 def is_financial_context(text: str, keywords: List[str] = None) -> bool:
     """Check if text contains financial context keywords"""
     if keywords is None:
-        keywords = ["account", "bank", "financial", "loan", "transaction", "balance", "payment"]
+        keywords = FINANCIAL_KEYWORDS
     
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in keywords)
\ No newline at end of file
+    return KeywordIndex(keywords).contains_any(text)
\ No newline at end of file
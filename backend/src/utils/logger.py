@@ -1,23 +1,146 @@
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+
 from .config import Config
 
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp records with the correlation id of the context that logged them"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        cid = _correlation_id.get()
+        record.correlation_id = cid
+        record.correlation = f"[{cid}] " if cid else ""
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class LocalQueueHandler(QueueHandler):
+    """Queue handler for a listener in the same process
+    
+    The stock ``prepare`` formats the record with a plain formatter and drops
+    ``exc_info``, which would fold tracebacks into the message before the
+    listener's formatter sees them. Here only the message is resolved, so
+    formatters get the record as they would without the queue.
+    """
+    
+    # Set once the listener thread is stopped; records are then handled in the logging thread
+    stopped_listener: Optional[QueueListener] = None
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.stopped_listener is not None:
+            self.stopped_listener.handle(record)
+        else:
+            super().enqueue(record)
+
+
+def _formatter() -> logging.Formatter:
+    if Config.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(correlation)s%(message)s")
+
+def _queue_handler_for_process() -> QueueHandler:
+    """The process's one queue handler; console and file writes happen on the listener thread"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _queue_handler is None:
+            formatter = _formatter()
+            c_handler = logging.StreamHandler(sys.stdout)
+            f_handler = logging.FileHandler(Config.BASE_DIR / "app.log")
+            c_handler.setFormatter(formatter)
+            f_handler.setFormatter(formatter)
+            
+            log_queue = queue.SimpleQueue()
+            _queue_handler = LocalQueueHandler(log_queue)
+            # Filters on the queue handler run in the logging thread, where the context is
+            _queue_handler.addFilter(CorrelationFilter())
+            _listener = QueueListener(log_queue, c_handler, f_handler, respect_handler_level=True)
+            _listener.start()
+            # Flush what is still queued when the process exits
+            atexit.register(_listener.stop)
+        return _queue_handler
+
+def stop_log_listener() -> None:
+    """Write out the queued log records and stop the listener thread
+    
+    Records logged afterwards, e.g. while the process exits, are written
+    directly by the thread that logs them.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        atexit.unregister(_listener.stop)
+        _listener.stop()
+        _queue_handler.stopped_listener = _listener
+        _listener = None
+
 def setup_logger(name=__name__):
+    """Get a logger that writes through the shared queue handler; safe to call repeatedly"""
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, Config.LOG_LEVEL))
     
-    # Create handlers
-    c_handler = logging.StreamHandler(sys.stdout)
-    f_handler = logging.FileHandler(Config.BASE_DIR / "app.log")
+    handler = _queue_handler_for_process()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
     
-    # Create formatters and add it to handlers
-    format_str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    formatter = logging.Formatter(format_str)
-    c_handler.setFormatter(formatter)
-    f_handler.setFormatter(formatter)
+    return logger
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+@contextmanager
+def correlation_id(value: str = None) -> Iterator[str]:
+    """Tag every log line in this context with a correlation id
     
-    # Add handlers to the logger
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
+    Without a value, an id already set by an outer context (e.g. the API
+    request or job) is kept, otherwise a new one is generated.
+    """
+    current = _correlation_id.get()
+    if value is None and current is not None:
+        yield current
+        return
     
-    return logger
\ No newline at end of file
+    token = _correlation_id.set(value or uuid.uuid4().hex[:12])
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
\ No newline at end of file
@@ -0,0 +1,187 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .config import Config
+
+# Upper bounds in seconds, from a regex pass over a page up to OCR of a dense scan
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Process-wide counters, gauges and histograms, rendered in the Prometheus text format"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+    
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+    
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+    
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+    
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    self._header(lines, name, kind)
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{name}{self._labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{self._labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{self._labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+    
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        _, help_text = self._help.get(name, (kind, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+    
+    @staticmethod
+    def _labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
+metrics.describe("redaction_stage_seconds", "histogram", "Time spent in each pipeline stage")
+metrics.describe("redaction_pages_processed_total", "counter", "Pages written to redacted outputs")
+metrics.describe("redaction_documents_processed_total", "counter", "Documents processed, by outcome")
+metrics.describe("redaction_queue_depth", "gauge", "Documents waiting or being processed")
+metrics.describe("redaction_model_load_seconds", "gauge", "Time taken to load each model")
+metrics.describe("redaction_detection_chars_total", "counter", "Characters of text seen by each detection tier")
+
+
+class StageTimings:
+    """Stage durations collected for one document or one worker task
+    
+    ``forward`` collectors (documents) also feed the process-wide histograms;
+    worker-task collectors only gather durations to send back to the parent,
+    which records them with ``record_stages``.
+    """
+    
+    def __init__(self, forward: bool = True):
+        self.forward = forward
+        self.durations: Dict[str, List[float]] = {}
+    
+    def add(self, stage: str, seconds: float) -> None:
+        self.durations.setdefault(stage, []).append(seconds)
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Total seconds and number of calls per stage, for the audit log"""
+        return {
+            stage: {"seconds": round(sum(values), 4), "calls": len(values)}
+            for stage, values in self.durations.items()
+        }
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+    
+    def __init__(self, stage: str):
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        _record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_TIMER = nullcontext()
+
+def stage_timer(stage: str):
+    """Context manager timing one pipeline stage; a shared no-op when metrics are disabled"""
+    if not Config.METRICS_ENABLED:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+def _record(stage: str, seconds: float) -> None:
+    collector = _current.get()
+    if collector is None or collector.forward:
+        metrics.observe("redaction_stage_seconds", seconds, stage=stage)
+    if collector is not None:
+        collector.add(stage, seconds)
+
+def record_stages(durations: Dict[str, List[float]]) -> None:
+    """Record durations measured elsewhere, e.g. in a page worker process"""
+    for stage, values in durations.items():
+        for seconds in values:
+            _record(stage, seconds)
+
+@contextmanager
+def collect_stages(forward: bool = True) -> Iterator[StageTimings]:
+    """Collect the stage timings of everything run in this context"""
+    timings = StageTimings(forward)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+def current_timings() -> Optional[StageTimings]:
+    """The collector of the document being processed in this context, if any"""
+    return _current.get()
+
+def get_metrics() -> Metrics:
+    return metrics
\ No newline at end of file
@@ -0,0 +1,689 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from src.api.jobs import DONE, FAILED, QUEUED, RUNNING, JobStore, job_timings
+from src.processing.batch import BatchRunner, Manifest, discover_inputs, output_paths
+from src.processing.ocr import OCRPage
+from src.processing.page_triage import PageTriage
+from src.processing.pdf_handler import PDFHandler
+from src.processing.pdf_redactor import PageTextLayer, UnsupportedPageError, VectorRedactor, remaining_values
+from src.processing.word_index import WordBoxIndex
+from src.utils.cache import PageCache, ResultCache
+from src.utils.config import Config
+from src.utils.logger import CorrelationFilter, JsonFormatter, LocalQueueHandler, correlation_id, setup_logger
+from src.utils.metrics import Metrics, collect_stages, record_stages, stage_timer
+
+HELVETICA = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+def build_pdf(content: bytes, font: bytes = HELVETICA, objects=(), page_extra: bytes = b"", catalog_extra: bytes = b"",
+              resources: bytes = b"") -> bytes:
+    """One-page PDF showing ``content`` with font /F1 (object 5); ``objects`` are numbered from 6"""
+    bodies = [
+        b"<< /Type /Catalog /Pages 2 0 R " + catalog_extra + b">>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> " + resources + b">> " + page_extra + b">>",
+        stream_object(content),
+        font,
+    ] + list(objects)
+    
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(bodies, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(bodies) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(bodies) + 1, xref)
+    return bytes(data)
+
+def stream_object(data: bytes) -> bytes:
+    return b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data)
+
+class TestVectorRedaction(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def redact(self, data: bytes, values):
+        """Redact the page's content stream and return its text layer and the re-extracted text"""
+        import io
+        import PyPDF2
+        
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        page = reader.pages[0]
+        layer = PageTextLayer(page, reader)
+        stream, _ = VectorRedactor().redact(layer, values)
+        self.assertIsNotNone(stream)
+        page[PyPDF2.generic.NameObject("/Contents")] = stream
+        return layer, page.extract_text()
+    
+    def process(self, data: bytes, values):
+        pdf_path = self.tmp_dir / "statement.pdf"
+        pdf_path.write_bytes(data)
+        output_path = self.tmp_dir / "redacted_statement.pdf"
+        
+        from src.processing.document_processor import DocumentProcessor
+        
+        settings = (Config.RESULT_CACHE_ENABLED, Config.PAGE_CACHE_ENABLED, Config.PDF_REDACTION_MODE)
+        Config.RESULT_CACHE_ENABLED = Config.PAGE_CACHE_ENABLED = False
+        Config.PDF_REDACTION_MODE = "vector"
+        processor = DocumentProcessor()
+        try:
+            audit = processor.process_document(pdf_path, output_path, text_pii={"account_number": [(v, "regex", 0.9) for v in values]})
+        finally:
+            processor.close()
+            Config.RESULT_CACHE_ENABLED, Config.PAGE_CACHE_ENABLED, Config.PDF_REDACTION_MODE = settings
+        return audit, output_path
+    
+    def test_show_operators(self):
+        content = (
+            b"BT /F1 12 Tf 14 TL 72 700 Td (Account 1234567890 ) Tj [(SSN 123-)-20(45-6789)] TJ "
+            b"(Card 4111111111111111) ' 2 0.5 (Phone 5551234567) \" ET"
+        )
+        values = ["1234567890", "123-45-6789", "4111111111111111", "5551234567"]
+        layer, text = self.redact(build_pdf(content), values)
+        
+        self.assertEqual(remaining_values(layer.text, values), values)
+        self.assertEqual(remaining_values(text, values), [])
+        for word in ["Account", "SSN", "Card", "Phone"]:
+            self.assertIn(word, text)
+    
+    def test_value_split_across_runs(self):
+        layer, text = self.redact(build_pdf(b"BT /F1 12 Tf 72 700 Td (Account 12345) Tj (67890) Tj ET"), ["1234567890"])
+        
+        self.assertIn("1234567890", layer.text)
+        self.assertNotIn("12345", text)
+        self.assertNotIn("67890", text)
+    
+    def test_to_unicode_bfrange_forms(self):
+        # Digits use the array form of bfrange, letters the base-code form
+        cmap = (
+            b"1 beginbfchar <20> <0020> endbfchar\n2 beginbfrange\n"
+            b"<01> <0A> [<0031> <0032> <0033> <0034> <0035> <0036> <0037> <0038> <0039> <0030>]\n"
+            b"<41> <5A> <0041>\nendbfrange"
+        )
+        font = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /ToUnicode 6 0 R >>"
+        data = build_pdf(b"BT /F1 12 Tf 72 700 Td (ACCOUNT ) Tj <0102030405060708090A> Tj ET", font, [stream_object(cmap)])
+        layer, text = self.redact(data, ["1234567890"])
+        
+        self.assertEqual(layer.text, "ACCOUNT 1234567890")
+        self.assertNotIn("1234567890", text)
+        self.assertIn("ACCOUNT", text)
+    
+    def test_identity_h_font_is_unsupported(self):
+        import io
+        import PyPDF2
+        
+        font = b"<< /Type /Font /Subtype /Type0 /BaseFont /Arial /Encoding /Identity-H /DescendantFonts [] >>"
+        reader = PyPDF2.PdfReader(io.BytesIO(build_pdf(b"BT /F1 12 Tf 72 700 Td <00240025> Tj ET", font)))
+        with self.assertRaises(UnsupportedPageError):
+            PageTextLayer(reader.pages[0], reader)
+    
+    @unittest.skipUnless(shutil.which("pdftoppm") and shutil.which("tesseract"), "needs poppler and Tesseract")
+    def test_unsupported_page_falls_back_to_raster(self):
+        import PyPDF2
+        
+        cmap = b"1 beginbfrange <0000> <00FF> <0000> endbfrange"
+        font = (
+            b"<< /Type /Font /Subtype /Type0 /BaseFont /Helvetica /Encoding /Identity-H /ToUnicode 6 0 R "
+            b"/DescendantFonts [<< /Type /Font /Subtype /CIDFontType2 /BaseFont /Helvetica "
+            b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> >>] >>"
+        )
+        digits = "".join(f"{ord(c):04X}" for c in "1234567890").encode()
+        audit, output_path = self.process(build_pdf(b"BT /F1 12 Tf 72 700 Td <" + digits + b"> Tj ET", font, [stream_object(cmap)]), ["1234567890"])
+        
+        self.assertEqual((audit["vector_pages"], audit["raster_pages"]), ([], [1]))
+        self.assertNotIn("1234567890", PyPDF2.PdfReader(str(output_path)).pages[0].extract_text())
+    
+    # An image painted under the value, e.g. the scan below an OCR text layer; its one pixel is red ink
+    RED_PIXEL = b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceRGB /BitsPerComponent 8 /Length 3 >>\nstream\n\xff\x00\x00\nendstream"
+    INKED = b"q 64 0 0 6 74 700 cm /Im1 Do Q BT 3 Tr /F1 12 Tf 72 700 Td (123-45-6789) Tj ET"
+    
+    def test_redaction_over_image_is_detected(self):
+        import io
+        import PyPDF2
+        
+        for content, overlaps in [(self.INKED, True), (b"q 64 0 0 6 74 500 cm /Im1 Do Q BT /F1 12 Tf 72 700 Td (123-45-6789) Tj ET", False)]:
+            data = build_pdf(content, objects=[self.RED_PIXEL], resources=b"/XObject << /Im1 6 0 R >> ")
+            reader = PyPDF2.PdfReader(io.BytesIO(data))
+            layer = PageTextLayer(reader.pages[0], reader)
+            _, boxes = VectorRedactor().redact(layer, ["123-45-6789"])
+            
+            self.assertTrue(layer.has_images)
+            self.assertEqual(layer.overlaps_images(boxes), overlaps)
+    
+    @unittest.skipUnless(shutil.which("pdftoppm"), "rasterizing needs poppler")
+    def test_image_under_redaction_is_rasterized(self):
+        import io
+        import PyPDF2
+        
+        data = build_pdf(self.INKED, objects=[self.RED_PIXEL], resources=b"/XObject << /Im1 6 0 R >> ")
+        audit, output_path = self.process(data, ["123-45-6789"])
+        
+        self.assertEqual((audit["vector_pages"], audit["raster_pages"]), ([], [1]))
+        images = [Image.open(io.BytesIO(image.data)).convert("RGB") for image in PyPDF2.PdfReader(str(output_path)).pages[0].images]
+        self.assertTrue(images)
+        for image in images:
+            self.assertFalse(any(r > 200 and g < 60 and b < 60 for r, g, b in image.getdata()))
+    
+    def test_annotations_and_form_fields_are_dropped(self):
+        import PyPDF2
+        
+        field = b"<< /Type /Annot /Subtype /Widget /FT /Tx /T (account) /V (1234567890) /Rect [72 600 300 620] /P 3 0 R >>"
+        thumbnail = b"<< /Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8 /Length 1 >>\nstream\n\x00\nendstream"
+        metadata = stream_object(b"<x:xmpmeta><rdf:Description>Account 1234567890</rdf:Description></x:xmpmeta>")
+        data = build_pdf(
+            b"BT /F1 12 Tf 72 700 Td (Account 1234567890) Tj ET", objects=[field, thumbnail, metadata],
+            page_extra=b"/Annots [6 0 R] /Thumb 7 0 R /Metadata 8 0 R /PieceInfo << /App << /Private (1234567890) >> >> ",
+            catalog_extra=b"/AcroForm << /Fields [6 0 R] >> "
+        )
+        audit, output_path = self.process(data, ["1234567890"])
+        
+        self.assertEqual(audit["vector_pages"], [1])
+        reader = PyPDF2.PdfReader(str(output_path))
+        for key in ["/Annots", "/Thumb", "/Metadata", "/PieceInfo"]:
+            self.assertNotIn(key, reader.pages[0])
+        self.assertNotIn("/AcroForm", reader.trailer["/Root"])
+        self.assertNotIn(b"1234567890", output_path.read_bytes())
+        self.assertIn("Account", reader.pages[0].extract_text())
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.input_path = self.tmp_dir / "statement.pdf"
+        self.input_path.write_bytes(b"%PDF-1.4 fake statement")
+        self.output_path = self.tmp_dir / "redacted_statement.pdf"
+        self.output_path.write_bytes(b"redacted bytes")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_hit_returns_output_and_audit(self):
+        cache = ResultCache(self.tmp_dir / "cache", max_bytes=10 ** 6, fingerprint="config-a")
+        key = cache.key_for(self.input_path)
+        self.assertIsNone(cache.get(key, self.input_path, self.output_path))
+        
+        cache.put(key, self.output_path, {"text_pii": {"ssn": [["123-45-6789", "regex", 0.9]]}})
+        
+        new_output = self.tmp_dir / "second.pdf"
+        audit = cache.get(key, self.input_path, new_output)
+        self.assertTrue(audit["cache_hit"])
+        self.assertEqual(audit["redacted_output"], str(new_output))
+        self.assertEqual(new_output.read_bytes(), b"redacted bytes")
+        
+        # The cache keeps the number of values found but not the values
+        (value, source, confidence), = audit["text_pii"]["ssn"]
+        self.assertEqual([value, source, confidence], [f"hmac-sha256:{cache.digest('123-45-6789')}", "regex", 0.9])
+        for path in (cache.cache_dir / key).iterdir():
+            self.assertNotIn(b"123-45-6789", path.read_bytes())
+    
+    def test_config_change_invalidates(self):
+        key_a = ResultCache(self.tmp_dir / "cache", fingerprint="config-a").key_for(self.input_path)
+        key_b = ResultCache(self.tmp_dir / "cache", fingerprint="config-b").key_for(self.input_path)
+        self.assertNotEqual(key_a, key_b)
+    
+    def test_lru_eviction(self):
+        # Room for one entry: the 14-byte output plus a 2-byte audit log
+        cache = ResultCache(self.tmp_dir / "cache", max_bytes=20, fingerprint="config-a")
+        cache.put("old", self.output_path, {})
+        os.utime(cache.cache_dir / "old", (0, 0))
+        cache.put("new", self.output_path, {})
+        
+        self.assertFalse((cache.cache_dir / "old").exists())
+        self.assertTrue((cache.cache_dir / "new").exists())
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache = PageCache(self.tmp_dir / "pages", max_bytes=10 ** 6, fingerprint="config-a")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def put_page(self, key: str, result: dict) -> None:
+        self.cache.put(key, result)
+        PageCache.save_image(Image.new("RGB", (40, 20), "white"), self.cache.image_path(key))
+    
+    def test_keys_follow_page_content(self):
+        paths = {}
+        for name, content, catalog_extra in [("a", b"(Hi) Tj", b""), ("b", b"(Hi) Tj", b"/Lang (en) "), ("c", b"(Ho) Tj", b"")]:
+            paths[name] = self.tmp_dir / f"{name}.pdf"
+            paths[name].write_bytes(build_pdf(b"BT /F1 12 Tf 72 720 Td " + content + b" ET", catalog_extra=catalog_extra))
+        (a,), (b,), (c,) = (PDFHandler().page_fingerprints(paths[name]) for name in "abc")
+        
+        # Only the page itself counts, not the rest of the document
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        key_a = self.cache.keys_for([a])
+        self.assertEqual(self.cache.keys_for([b]), key_a)
+        self.assertNotEqual(PageCache(self.tmp_dir / "pages", fingerprint="config-b").keys_for([a]), key_a)
+    
+    def test_entry_needs_result_and_image(self):
+        entry = {"visual": {"signature": [], "logo": []}, "pii": [["PERSON", self.cache.digest("John Smith")]]}
+        self.cache.put("page", entry)
+        # The redacted image has not been written yet
+        self.assertIsNone(self.cache.get("page"))
+        
+        PageCache.save_image(Image.new("RGB", (40, 20), "white"), self.cache.image_path("page"))
+        self.assertEqual(self.cache.get("page"), entry)
+        self.assertEqual(self.cache.load_image("page").size, (40, 20))
+    
+    def test_entries_are_private_and_expire(self):
+        self.put_page("page", {"pii": [["SSN", self.cache.digest("123-45-6789")]]})
+        for path in (self.cache.cache_dir / "page").iterdir():
+            self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+            self.assertNotIn(b"123-45-6789", path.read_bytes())
+        self.assertEqual((self.cache.cache_dir / "page").stat().st_mode & 0o777, 0o700)
+        
+        self.cache.max_age = 60
+        self.assertIsNotNone(self.cache.get("page"))
+        for path in (self.cache.cache_dir / "page").iterdir():
+            os.utime(path, (0, 0))
+        self.assertIsNone(self.cache.get("page"))
+        self.cache.evict()
+        self.assertFalse((self.cache.cache_dir / "page").exists())
+    
+    def test_values_are_found_by_digest(self):
+        digests = {self.cache.digest("John  Smith"): "PERSON", self.cache.digest("123-45-6789"): "SSN"}
+        found = self.cache.find_values("Paid to (John Smith), SSN: 123-45-6789.", digests)
+        self.assertEqual(sorted(found), [("123-45-6789", "SSN"), ("John Smith", "PERSON")])
+        # Digests are keyed by the secret of the cache
+        other = PageCache(self.tmp_dir / "other", fingerprint="config-a")
+        self.assertNotEqual(other.digest("John Smith"), self.cache.digest("John Smith"))
+    
+    def test_lru_eviction(self):
+        self.put_page("old", {})
+        self.put_page("used", {})
+        size = sum(f.stat().st_size for f in (self.cache.cache_dir / "old").iterdir())
+        for key in ["old", "used"]:
+            os.utime(self.cache.cache_dir / key, (0, 0))
+        # Reading an entry marks it as recently used
+        self.cache.get("used")
+        
+        self.cache.max_bytes = size
+        self.cache.evict()
+        self.assertFalse((self.cache.cache_dir / "old").exists())
+        self.assertIsNotNone(self.cache.get("used"))
+    
+    @unittest.skipUnless(shutil.which("pdftoppm"), "rasterizing needs poppler")
+    def test_pages_with_given_text_pii_are_cached(self):
+        from src.processing.document_processor import DocumentProcessor
+        
+        pdf_path = self.tmp_dir / "statement.pdf"
+        pdf_path.write_bytes(build_pdf(b"BT /F1 12 Tf 72 700 Td (Account 1234567890) Tj ET"))
+        text_pii = {"account_number": [("1234567890", "regex", 0.9)]}
+        
+        settings = (Config.CACHE_DIR, Config.RESULT_CACHE_ENABLED, Config.PAGE_CACHE_ENABLED, Config.PDF_REDACTION_MODE)
+        Config.CACHE_DIR = self.tmp_dir
+        Config.RESULT_CACHE_ENABLED, Config.PAGE_CACHE_ENABLED, Config.PDF_REDACTION_MODE = False, True, "raster"
+        processor = DocumentProcessor()
+        try:
+            # text_pii as passed in by the batch runner, which detects it ahead of processing
+            audits = [processor.process_document(pdf_path, self.tmp_dir / "redacted.pdf", text_pii=text_pii) for _ in range(2)]
+        finally:
+            processor.close()
+            Config.CACHE_DIR, Config.RESULT_CACHE_ENABLED, Config.PAGE_CACHE_ENABLED, Config.PDF_REDACTION_MODE = settings
+        
+        self.assertNotIn("page_cache", audits[0])
+        self.assertEqual(audits[1]["page_cache"], {"pages": [1], "pii_types": {"account_number": 1}})
+
+class TestPageTriage(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.pdf_path = self.tmp_dir / "mixed.pdf"
+        scan_path = self.tmp_dir / "scan.png"
+        Image.new("RGB", (850, 1100), (255, 255, 255)).save(scan_path)
+        
+        # Page 1 is generated text, page 2 a full-page scan, page 3 is blank
+        c = canvas.Canvas(str(self.pdf_path))
+        for line in range(20):
+            c.drawString(72, 720 - line * 14, f"Account 1234567890 statement line {line}")
+        c.showPage()
+        c.drawImage(str(scan_path), 0, 0, width=595, height=842)
+        c.showPage()
+        c.showPage()
+        c.save()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_only_scanned_pages_need_ocr(self):
+        page_texts = PDFHandler().extract_page_texts(self.pdf_path)
+        triage = PageTriage().classify(self.pdf_path, page_texts)
+        
+        self.assertEqual([page["kind"] for page in triage], ["born_digital", "scanned", "blank"])
+        self.assertEqual([page["ocr"] for page in triage], [False, True, False])
+        self.assertGreater(triage[1]["image_coverage"], 0.9)
+
+class TestWordBoxIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = WordBoxIndex([
+            ("Name:", (10, 10, 50, 20)),
+            ("John", (70, 10, 40, 20)),
+            ("Smith", (120, 12, 50, 20)),
+            ("SSN:123-45-6789", (10, 40, 150, 20)),
+            ("Smith", (10, 70, 50, 20)),
+        ])
+    
+    def test_multi_word_value_is_one_area(self):
+        self.assertEqual(self.index.find(["John Smith"]), [("John Smith", (70, 10, 100, 22))])
+    
+    def test_partial_word_is_trimmed(self):
+        (text, (x, y, w, h)), = self.index.find(["123-45-6789"])
+        self.assertEqual(text, "123-45-6789")
+        self.assertEqual((x, w), (50, 110))
+    
+    def test_every_occurrence_is_found(self):
+        self.assertEqual(len(self.index.find(["Smith"])), 2)
+
+class TestOCRPage(unittest.TestCase):
+    def setUp(self):
+        # image_to_data columns: a page row, then words on two lines of one paragraph
+        self.page = OCRPage.from_tesseract({
+            "text": ["", "Account", "holder", "Jane", "Doe"],
+            "conf": [-1, 96.0, 91.5, 88.0, 42.0],
+            "block_num": [0, 1, 1, 1, 1],
+            "par_num": [0, 1, 1, 1, 1],
+            "line_num": [0, 1, 1, 2, 2],
+            "left": [0, 10, 90, 10, 60],
+            "top": [0, 10, 10, 40, 41],
+            "width": [1000, 70, 60, 40, 40],
+            "height": [1000, 20, 20, 20, 20],
+        })
+    
+    def test_text_and_lines(self):
+        self.assertEqual(self.page.text, "Account holder\nJane Doe")
+        self.assertEqual([text for text, _ in self.page.lines], ["Account holder", "Jane Doe"])
+        self.assertEqual(self.page.word_boxes(min_confidence=60), [("Account", (10, 10, 70, 20)), ("holder", (90, 10, 60, 20)), ("Jane", (10, 40, 40, 20))])
+    
+    def test_find_and_round_trip(self):
+        restored = OCRPage.from_dict(self.page.to_dict())
+        self.assertEqual(restored.find(["Jane Doe"]), [("Jane Doe", (10, 40, 90, 21))])
+    
+    def test_ocr_errors_are_raised(self):
+        # A page that could not be read must not look like a page without PII
+        handler = PDFHandler(ocr_backend="missing")
+        with self.assertRaises(RuntimeError):
+            handler.ocr_page(Image.new("RGB", (40, 20), "white"))
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.store = JobStore(self.tmp_dir / "jobs.sqlite3")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_jobs_are_claimed_once_in_order(self):
+        first = self.store.create("a.pdf", self.tmp_dir / "a.pdf", self.tmp_dir / "out_a.pdf")
+        second = self.store.create("b.pdf", self.tmp_dir / "b.pdf", self.tmp_dir / "out_b.pdf")
+        
+        self.assertEqual(self.store.claim_next(1)["id"], first)
+        self.assertEqual(self.store.claim_next(2)["id"], second)
+        self.assertIsNone(self.store.claim_next(3))
+    
+    def test_progress_and_completion(self):
+        job_id = self.store.create("a.pdf", self.tmp_dir / "a.pdf", self.tmp_dir / "out_a.pdf")
+        self.store.claim_next(1)
+        self.store.update_progress(job_id, 2, 5)
+        job = self.store.get(job_id)
+        self.assertEqual((job["status"], job["pages_done"], job["pages_total"]), (RUNNING, 2, 5))
+        
+        self.store.complete(job_id, {"text_pii": {}})
+        job = self.store.get(job_id)
+        self.assertEqual((job["status"], job["pages_done"], job["audit"]), (DONE, 5, {"text_pii": {}}))
+        self.assertIn("processing_seconds", job_timings(job))
+    
+    @staticmethod
+    def dead_pid() -> int:
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+        return process.pid
+    
+    def test_running_jobs_survive_restart(self):
+        job_id = self.store.create("a.pdf", self.tmp_dir / "a.pdf", self.tmp_dir / "out_a.pdf")
+        self.store.claim_next(self.dead_pid())
+        
+        # A new store over the same database, as after an API restart
+        restarted = JobStore(self.tmp_dir / "jobs.sqlite3")
+        self.assertEqual(restarted.requeue_running(), 1)
+        self.assertEqual(restarted.get(job_id)["status"], QUEUED)
+        self.assertEqual(restarted.claim_next(2)["attempts"], 2)
+    
+    def test_jobs_of_live_workers_are_not_requeued(self):
+        job_id = self.store.create("a.pdf", self.tmp_dir / "a.pdf", self.tmp_dir / "out_a.pdf")
+        self.store.claim_next(os.getpid())
+        self.assertEqual(self.store.requeue_running(stale_after=60), 0)
+        self.assertEqual(self.store.get(job_id)["status"], RUNNING)
+        
+        # A live process that stopped sending heartbeats, e.g. a reused pid or a hung worker
+        self.store.heartbeat(job_id)
+        self.assertEqual(self.store.requeue_running(stale_after=-1), 1)
+        self.assertEqual(self.store.get(job_id)["status"], QUEUED)
+    
+    def test_repeatedly_interrupted_job_fails(self):
+        input_path = self.tmp_dir / "a.pdf"
+        input_path.write_bytes(b"")
+        job_id = self.store.create("a.pdf", input_path, self.tmp_dir / "out_a.pdf")
+        
+        self.store.claim_next(self.dead_pid())
+        self.assertEqual(self.store.requeue_running(max_attempts=2), 1)
+        self.assertTrue(input_path.exists())
+        self.store.claim_next(self.dead_pid())
+        self.assertEqual(self.store.requeue_running(max_attempts=2), 0)
+        
+        job = self.store.get(job_id)
+        self.assertEqual((job["status"], job["attempts"]), (FAILED, 2))
+        self.assertIsNone(self.store.claim_next(1))
+        self.assertFalse(input_path.exists())
+
+class TestAPILimits(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from fastapi.testclient import TestClient
+        
+        # The app opens its job store on import, so it is pointed at a scratch database first
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        original = Config.JOBS_DB
+        try:
+            Config.JOBS_DB = cls.tmp_dir / "jobs.sqlite3"
+            from src.api import app
+        finally:
+            Config.JOBS_DB = original
+        cls.api = app
+        # Without a context manager the lifespan (job workers, model warm-up) does not run
+        cls.client = TestClient(app.app)
+    
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+    
+    def setUp(self):
+        self.original = (self.api.in_flight, self.api.executor, Config.MAX_UPLOAD_BYTES)
+    
+    def tearDown(self):
+        self.api.in_flight, self.api.executor, Config.MAX_UPLOAD_BYTES = self.original
+    
+    def post(self, content: bytes = b"%PDF-1.4"):
+        return self.client.post("/redact/", files={"file": ("a.pdf", content, "application/pdf")})
+    
+    def test_limiter_counts_documents_in_flight(self):
+        limiter = self.api.InFlightLimiter(1)
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        limiter.release()
+        self.assertTrue(limiter.try_acquire())
+    
+    def test_saturated_server_answers_429(self):
+        self.api.in_flight = self.api.InFlightLimiter(0)
+        response = self.post()
+        
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], str(Config.API_RETRY_AFTER))
+        self.assertEqual(self.api.in_flight.count, 0)
+    
+    def test_shutting_down_answers_503(self):
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.api.executor = ThreadPoolExecutor(max_workers=1)
+        self.api.executor.shutdown()
+        response = self.post()
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(self.api.in_flight.count, 0)
+    
+    def test_oversized_uploads_are_rejected(self):
+        Config.MAX_UPLOAD_BYTES = 1000
+        # Declared size over the limit: refused from the Content-Length header
+        self.assertEqual(self.post(b"x" * (200 * 1024)).status_code, 413)
+        # Within the multipart allowance of the header check: refused while the upload is saved
+        response = self.post(b"x" * 2000)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("1000 bytes", response.json()["detail"])
+        self.assertEqual(self.api.in_flight.count, 0)
+
+class TestBatchInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        (self.tmp_dir / "docs" / "2024").mkdir(parents=True)
+        for name in ["docs/a.pdf", "docs/2024/b.PNG", "docs/2024/notes.txt", "c.jpg"]:
+            (self.tmp_dir / name).write_bytes(b"")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_discovery_walks_directories_once(self):
+        found = list(discover_inputs([self.tmp_dir / "docs", self.tmp_dir / "c.jpg", self.tmp_dir / "missing"]))
+        self.assertEqual(found, [
+            self.tmp_dir / "docs" / "a.pdf",
+            self.tmp_dir / "docs" / "2024" / "b.PNG",
+            self.tmp_dir / "c.jpg",
+        ])
+    
+    def test_manifest_resumes_completed_inputs(self):
+        manifest = Manifest(self.tmp_dir / "manifest.jsonl")
+        manifest.record([{"input": "a.pdf", "status": "done"}, {"input": "b.pdf", "status": "failed"}])
+        with open(manifest.path, "a") as f:
+            f.write('{"input": "c.pdf", "sta')  # interrupted mid-write
+        
+        self.assertEqual(Manifest(manifest.path).completed(), {"a.pdf"})
+    
+    def test_resume_from_another_directory(self):
+        manifest = Manifest(self.tmp_dir / "manifest.jsonl")
+        cwd = os.getcwd()
+        try:
+            # The first run was started from the parent directory of the inputs
+            os.chdir(self.tmp_dir)
+            first = output_paths(list(discover_inputs([Path("docs")])), self.tmp_dir / "out", root=Path("docs"))
+            manifest.record([{"input": str(path.resolve()), "output": str(output), "status": "done"} for path, output in first.items()])
+            
+            os.chdir(self.tmp_dir / "docs" / "2024")
+            summary = BatchRunner(manifest=manifest).run(discover_inputs([Path("..")]), self.tmp_dir / "out", root=Path(".."))
+            second = output_paths(list(discover_inputs([Path("..")])), self.tmp_dir / "out", root=Path(".."))
+        finally:
+            os.chdir(cwd)
+        
+        self.assertEqual((summary["skipped"], summary["results"]), (2, []))
+        self.assertEqual(sorted(first.values()), sorted(second.values()))
+    
+    def test_outputs_mirror_input_layout(self):
+        (self.tmp_dir / "docs" / "2025").mkdir()
+        (self.tmp_dir / "docs" / "2025" / "b.PNG").write_bytes(b"")
+        inputs = list(discover_inputs([self.tmp_dir / "docs"]))
+        outputs = output_paths(inputs, Path("out"))
+        
+        self.assertEqual(sorted(map(str, outputs.values())), [
+            os.path.join("out", "2024", "redacted_b.PNG"),
+            os.path.join("out", "2025", "redacted_b.PNG"),
+            os.path.join("out", "redacted_a.pdf"),
+        ])
+    
+    def test_summary_sums_audit_stages(self):
+        entries = [
+            {"status": "done", "pages": 2, "stages": {"text_pii_batch": 0.5, "rasterize": 1.0, "ocr": 2.0}},
+            {"status": "done", "pages": 1, "stages": {"text_pii_batch": 0.5, "rasterize": 0.5}},
+            {"status": "failed", "pages": 0, "stages": {}},
+        ]
+        summary = BatchRunner().summary(entries, 4.0, discovery_seconds=0.25)
+        
+        self.assertEqual(summary["stage_seconds"], {"discovery": 0.25, "text_pii_batch": 1.0, "rasterize": 1.5, "ocr": 2.0})
+        self.assertEqual((summary["documents"], summary["failed"], summary["pages"]), (2, 1, 3))
+
+class TestMetrics(unittest.TestCase):
+    def test_worker_timings_reach_the_document(self):
+        with collect_stages() as document:
+            with stage_timer("regex"):
+                pass
+            # A page worker only collects; its timings are recorded when the parent takes the result
+            with collect_stages(forward=False) as worker:
+                with stage_timer("ocr"):
+                    pass
+            self.assertNotIn("ocr", document.durations)
+            record_stages(worker.durations)
+        
+        self.assertEqual({stage: entry["calls"] for stage, entry in document.summary().items()}, {"regex": 1, "ocr": 1})
+    
+    def test_prometheus_rendering(self):
+        metrics = Metrics()
+        metrics.inc("pages_total", 3)
+        metrics.observe("stage_seconds", 0.02, stage="ocr")
+        metrics.observe("stage_seconds", 7.0, stage="ocr")
+        text = metrics.render()
+        
+        self.assertIn("pages_total 3", text)
+        self.assertIn('stage_seconds_bucket{stage="ocr",le="0.025"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="ocr",le="+Inf"} 2', text)
+        self.assertIn('stage_seconds_count{stage="ocr"} 2', text)
+
+class TestLogging(unittest.TestCase):
+    def test_setup_is_idempotent(self):
+        logger = setup_logger("tests.logging")
+        setup_logger("tests.logging")
+        self.assertEqual(len(logger.handlers), 1)
+    
+    def test_correlation_id_reaches_records(self):
+        import json
+        import logging
+        
+        record = logging.LogRecord("tests", logging.INFO, __file__, 1, "page %d done", (3,), None)
+        with correlation_id("job-42"):
+            with correlation_id() as inner:
+                self.assertEqual(inner, "job-42")
+            CorrelationFilter().filter(record)
+        
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual((entry["message"], entry["correlation_id"]), ("page 3 done", "job-42"))
+    
+    def test_tracebacks_survive_the_queue(self):
+        import json
+        import logging
+        import queue
+        
+        log_queue = queue.SimpleQueue()
+        logger = logging.getLogger("tests.logging.queue")
+        logger.propagate = False
+        logger.addHandler(LocalQueueHandler(log_queue))
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("page %d failed", 3)
+        
+        entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+        self.assertEqual(entry["message"], "page 3 failed")
+        self.assertIn("ZeroDivisionError", entry["exception"])
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
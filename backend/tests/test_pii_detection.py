@@ -23,6 +23,255 @@ class TestPIIDetection(unittest.TestCase):
         
         self.assertTrue(is_financial_context(financial_text))
         self.assertFalse(is_financial_context(non_financial_text))
+    
+    def test_windowed_context_confidence(self):
+        from src.utils.config import Config
+        from src.utils.helpers import FinancialContext
+        
+        text = "account 1234567890" + " " * 1000 + "9876543210"
+        context = FinancialContext(text, window=50)
+        
+        near = text.index("1234567890")
+        far = text.index("9876543210")
+        self.assertEqual(context.confidence(near, near + 10), Config.REGEX_CONFIDENCE)
+        self.assertLess(context.confidence(far, far + 10), Config.REGEX_CONFIDENCE)
+        self.assertEqual(FinancialContext("no keywords here").confidence(0, 2), 0.0)
+
+class TestPIIScanner(unittest.TestCase):
+    def test_scan_with_offsets(self):
+        from src.utils.helpers import PIIScanner
+        
+        text = "SSN 123-45-6789, SWIFT ABCDUS33XXX"
+        matches = PIIScanner().scan(text)
+        
+        self.assertEqual([m.type for m in matches], ["ssn", "swift_code"])
+        for match in matches:
+            self.assertEqual(text[match.start:match.end], match.value)
+        # The whole code is returned, not just the optional branch suffix
+        self.assertEqual(matches[1].value, "ABCDUS33XXX")
+    
+    def test_overlapping_patterns_report_every_type(self):
+        from src.utils.helpers import PIIScanner
+        
+        matches = PIIScanner().scan("Card 4111111111111111 phone 5551234567")
+        
+        self.assertEqual(
+            [(m.type, m.value) for m in matches],
+            [("account_number", "4111111111111111"), ("credit_card", "4111111111111111"),
+             ("account_number", "5551234567"), ("phone", "5551234567")]
+        )
+    
+    def test_runtime_registration(self):
+        import re
+        from src.utils.helpers import PIIScanner
+        
+        scanner = PIIScanner({"ssn": r"\b\d{3}-\d{2}-\d{4}\b"})
+        scanner.register("iban", r"\bgb\d{2}[a-z]{4}\d{14}\b", flags=re.IGNORECASE)
+        
+        matches = scanner.scan("IBAN GB29NWBK60161331926819, SSN 123-45-6789")
+        self.assertEqual([m.type for m in matches], ["iban", "ssn"])
+
+class TestModelRegistry(unittest.TestCase):
+    def test_lazy_shared_loading(self):
+        from src.models.registry import ModelRegistry
+        
+        loads = []
+        registry = ModelRegistry()
+        registry.register("ner", lambda: loads.append("ner") or object())
+        registry.register("yolo", lambda: loads.append("yolo") or object(), enabled=lambda: False)
+        self.assertEqual(loads, [])
+        
+        model = registry.get("ner")
+        self.assertIs(registry.get("ner"), model)
+        self.assertIsNone(registry.get("yolo"))
+        self.assertEqual(loads, ["ner"])
+        self.assertEqual(registry.status(), {"ner": "loaded", "yolo": "disabled"})
+    
+    def test_failed_load_degrades(self):
+        from src.models.registry import ModelRegistry
+        
+        registry = ModelRegistry()
+        registry.register("spacy", lambda: __import__("missing_model_package"))
+        detector = PIIDetector(registry)
+        
+        self.assertEqual(detector.detect_pii_spacy("John Smith"), {})
+        self.assertTrue(registry.is_ready())
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_inputs_share_batches(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.models.batching import MicroBatcher
+        
+        batch_sizes = []
+        def run(items):
+            batch_sizes.append(len(items))
+            return [item * 2 for item in items]
+        
+        batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=50)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda n: batcher.submit([n, n + 100]), range(6)))
+        
+        self.assertEqual(results, [[n * 2, (n + 100) * 2] for n in range(6)])
+        self.assertEqual(sum(batch_sizes), 12)
+        self.assertLess(len(batch_sizes), 6)
+        self.assertTrue(all(size <= 8 for size in batch_sizes))
+    
+    def test_batch_error_reaches_callers(self):
+        from src.models.batching import MicroBatcher
+        
+        batcher = MicroBatcher(lambda items: 1 / 0, max_batch_size=4, max_wait_ms=1)
+        with self.assertRaises(ZeroDivisionError):
+            batcher.submit(["page"])
+
+class TestTransformerWindows(unittest.TestCase):
+    # Seven filler words put the window overlap in the middle of "Smith"
+    TEXT = "data " * 7 + "John Smith" + " data" * 20
+    
+    class FakeNER:
+        """Tokenizes into pieces of at most four characters and tags every (John) Smith as a person"""
+        
+        def tokenizer(self, text, **kwargs):
+            import re
+            return {"offset_mapping": [match.span() for match in re.finditer(r"\w{1,4}|\S", text)]}
+        
+        def __call__(self, chunks, batch_size=None):
+            import re
+            return [
+                [{"entity_group": "PER", "start": match.start(), "end": match.end(),
+                  "score": 0.7 if match.group().startswith("John") else 0.95}
+                 for match in re.finditer(r"(?:John )?Smith", chunk)]
+                for chunk in chunks
+            ]
+    
+    def setUp(self):
+        from src.models.registry import ModelRegistry
+        from src.utils.config import Config
+        
+        registry = ModelRegistry()
+        registry.register("transformer_ner", self.FakeNER)
+        self.detector = PIIDetector(registry)
+        self.original = (Config.NER_WINDOW_TOKENS, Config.NER_WINDOW_OVERLAP, Config.MICRO_BATCHING)
+        Config.NER_WINDOW_TOKENS, Config.NER_WINDOW_OVERLAP, Config.MICRO_BATCHING = 12, 3, False
+    
+    def tearDown(self):
+        from src.utils.config import Config
+        Config.NER_WINDOW_TOKENS, Config.NER_WINDOW_OVERLAP, Config.MICRO_BATCHING = self.original
+    
+    def test_windows_overlap_on_word_boundaries(self):
+        windows = self.detector._token_windows(self.TEXT)
+        tokens = self.FakeNER().tokenizer(self.TEXT)["offset_mapping"]
+        
+        self.assertGreater(len(windows), 2)
+        self.assertEqual((windows[0][0], windows[-1][1]), (0, len(self.TEXT)))
+        for (start, end), (next_start, _) in zip(windows, windows[1:]):
+            self.assertLess(next_start, end)
+            self.assertEqual(self.TEXT[next_start - 1], " ")
+        for start, end in windows:
+            self.assertLessEqual(sum(start <= a and b <= end for a, b in tokens), 12)
+        # The overlap started inside "Smith" and was moved back to its first character
+        self.assertEqual(windows[1][0], self.TEXT.index("Smith"))
+    
+    def test_entity_in_overlap_is_reported_once(self):
+        # The first window sees "John Smith", the second only "Smith"; the longer span wins
+        self.assertEqual(self.detector.detect_pii_transformers(self.TEXT), {"PER": [("John Smith", 0.7)]})
+
+class TestPIISpans(unittest.TestCase):
+    def test_overlapping_spans_fuse(self):
+        from src.models.spans import PIISpan, fuse_spans
+        
+        fused = fuse_spans([
+            PIISpan(20, 30, "location", "spacy", 0.85),
+            PIISpan(0, 10, "name", "spacy", 0.85),
+            PIISpan(2, 14, "name", "transformer", 0.9),
+            PIISpan(3, 8, "name", "transformer", 0.95),
+            PIISpan(22, 28, "name", "transformer", 0.9),
+        ])
+        
+        # Overlapping spans of different types are kept apart
+        self.assertEqual([(s.start, s.end, s.type) for s in fused], [(0, 14, "name"), (20, 30, "location"), (22, 28, "name")])
+        self.assertEqual(fused[0].source, "spacy+transformer")
+        # Noisy-OR over each detector's best score
+        self.assertAlmostEqual(fused[0].confidence, 1 - 0.15 * 0.05)
+        self.assertEqual(fused[1].confidence, 0.85)
+    
+    def test_locate_values_whole_tokens(self):
+        from src.models.spans import locate_values, spans_to_results
+        
+        text = "Acct 12345 and 123-45-6789; acct 12345 again"
+        spans = locate_values(text, [("account_number", "12345", 0.8), ("other", "123", 0.5)], "spacy")
+        
+        self.assertEqual([(s.start, s.end) for s in spans], [(5, 10), (33, 38)])
+        self.assertEqual(spans_to_results(text, spans), {"account_number": [("12345", "spacy", 0.8)]})
+
+class TestDetectionCascade(unittest.TestCase):
+    STATEMENT = (
+        "Statement for John Smith\n"
+        "2024-01-02  $120.00  4411\n"
+        "2024-01-03  $75.10  4411\n"
+        "2024-01-09  $9.99  4411"
+    )
+    
+    def test_prefilter_skips_tables(self):
+        from src.models.cascade import spacy_prefilter
+        
+        self.assertTrue(spacy_prefilter("Payment received from Example National Bank"))
+        self.assertFalse(spacy_prefilter("2024-01-02  $120.00  4411\n2024-01-03  $75.10  4411"))
+        self.assertFalse(spacy_prefilter("all lower case words only"))
+    
+    def test_prefilter_passes_uncased_and_labelled_names(self):
+        from src.models.cascade import spacy_prefilter
+        
+        for segment in ["ACCOUNT HOLDER: JOHN SMITH", "Account holder: Smith", "Payment to Mr. Smith"]:
+            self.assertTrue(spacy_prefilter(segment), segment)
+    
+    def test_all_caps_lines_reach_the_transformer(self):
+        from src.models.cascade import transformer_regions
+        from src.utils.config import Config
+        
+        text = "ACCOUNT HOLDER: JOHN SMITH\n2024-01-02  $120.00  4411"
+        original = Config.CASCADE_REGION_CHARS
+        try:
+            Config.CASCADE_REGION_CHARS = 0
+            # spaCy saw the whole text and found nothing, but it has no casing to go by on the first line
+            self.assertEqual(transformer_regions(text, [(0, len(text))], {}), [(0, 26)])
+            self.assertEqual(transformer_regions("Account holder: Smith", [], {}), [(0, 21)])
+        finally:
+            Config.CASCADE_REGION_CHARS = original
+    
+    def test_transformer_sees_flagged_lines_only(self):
+        from src.models.registry import ModelRegistry
+        from src.utils.config import Config
+        
+        class FakeNER:
+            def tokenizer(self, *args, **kwargs):
+                # Like a slow tokenizer without offsets, so windows fall back to characters
+                raise NotImplementedError
+            
+            def __init__(self):
+                self.chunks = []
+            
+            def __call__(self, chunks, batch_size=None):
+                self.chunks.extend(chunks)
+                return [[] for _ in chunks]
+        
+        ner = FakeNER()
+        registry = ModelRegistry()
+        registry.register("spacy", lambda: None, enabled=lambda: False)
+        registry.register("transformer_ner", lambda: ner)
+        detector = PIIDetector(registry)
+        
+        original = (Config.TRANSFORMER_POLICY, Config.CASCADE_REGION_CHARS)
+        try:
+            Config.CASCADE_REGION_CHARS = 0
+            for policy, expected in [("cascade", ["Statement for John Smith"]), ("always", [self.STATEMENT]), ("never", [])]:
+                Config.TRANSFORMER_POLICY = policy
+                ner.chunks.clear()
+                tiers = detector.detect_entities_batch([self.STATEMENT])[0]["tiers"]
+                
+                self.assertEqual(ner.chunks, expected)
+                self.assertEqual(tiers, {"spacy": 0, "transformer": sum(len(chunk) for chunk in expected)})
+        finally:
+            Config.TRANSFORMER_POLICY, Config.CASCADE_REGION_CHARS = original
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file